@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Store intrinsic dimensions, dominant color and BlurHash on existing images
+
+    python backfill_image_metadata.py            # images without a placeholder yet
+    python backfill_image_metadata.py --all      # recompute every image
+    python backfill_image_metadata.py --dry-run  # only report what would change
+
+Originals are decoded at reduced scale in the image process pool, one job
+per worker at a time. Running API processes drop their cached image
+listings within RESPONSE_CACHE_VERSION_TTL of the backfill finishing.
+"""
+
+import argparse
+import asyncio
+
+from cache import response_cache
+from database import portfolio_images_collection
+from file_upload import ensure_local, image_metadata, storage, url_to_path
+from image_processing import IMAGE_WORKERS, run_image_job, shutdown_image_pool
+
+
+async def backfill(recompute: bool, dry_run: bool):
+    query = {} if recompute else {"blurhash": {"$in": [None, ""]}}
+    slots = asyncio.Semaphore(IMAGE_WORKERS)
+    counts = {"updated": 0, "failed": 0}
+
+    async def process(doc: dict):
+        url = doc.get("image_url", "")
+        if storage.key_for_url(url) is None:
+            counts["failed"] += 1
+            print(f"   ⚠️ {doc.get('title', doc['_id'])}: not an upload ({url})")
+            return
+        async with slots:
+            try:
+                path = await ensure_local(url_to_path(url))
+            except FileNotFoundError:
+                path = url_to_path(url)
+            metadata = await run_image_job(image_metadata, path)
+        if not metadata.get("blurhash"):
+            counts["failed"] += 1
+            print(f"   ❌ {doc.get('title', doc['_id'])}: could not decode {url}")
+        if not metadata:
+            return
+        counts["updated"] += 1
+        print(f"   {'🔎' if dry_run else '✅'} {doc.get('title', doc['_id'])}: "
+              f"{metadata['width']}x{metadata['height']} {metadata.get('dominant_color', '')}")
+        if not dry_run:
+            await portfolio_images_collection.update_one({"_id": doc["_id"]}, {"$set": metadata})
+
+    try:
+        docs = await portfolio_images_collection.find(query, {"title": 1, "image_url": 1}).to_list(None)
+        print(f"🖼️ {len(docs)} images to process")
+        await asyncio.gather(*(process(doc) for doc in docs))
+    finally:
+        shutdown_image_pool()
+        if counts["updated"] and not dry_run:
+            await response_cache.bump(portfolio_images_collection.name)
+
+    verb = "Would update" if dry_run else "Updated"
+    print(f"\n🎉 {verb} {counts['updated']} images ({counts['failed']} without a placeholder)")
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--all", action="store_true", help="recompute images that already have a placeholder")
+    parser.add_argument("--dry-run", action="store_true")
+    args = parser.parse_args()
+    await backfill(args.all, args.dry_run)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Benchmark per-item serialization cost of list responses
+
+Compares FastAPI's response_model path (model validation + jsonable_encoder),
+the precompiled TypeAdapter path and the opt-in FAST_SERIALIZATION path.
+
+    python bench_serialization.py [--items 1000] [--rounds 20]
+"""
+
+import argparse
+import json
+import time
+from datetime import datetime
+from typing import List
+
+from bson import ObjectId
+from fastapi.encoders import jsonable_encoder
+
+from models import PortfolioImage
+from serialization import render
+
+
+def make_documents(count: int) -> List[dict]:
+    """Build raw documents shaped like portfolio_images rows"""
+    now = datetime.utcnow()
+    return [
+        {
+            "_id": ObjectId(),
+            "title": f"Fashion Portrait {i}",
+            "description": "Professional fashion photography showcasing modern elegance",
+            "category": "fashion",
+            "image_url": f"/api/uploads/images/fashion/{ObjectId()}.jpg",
+            "thumbnail_url": f"/api/uploads/thumbnails/thumb_{ObjectId()}.jpg",
+            "order": i,
+            "featured": i % 7 == 0,
+            "created_at": now,
+            "updated_at": now
+        }
+        for i in range(count)
+    ]
+
+
+def response_model_path(docs: List[dict]) -> bytes:
+    """What FastAPI does for response_model=List[PortfolioImage]"""
+    validated = [PortfolioImage.model_validate(doc) for doc in docs]
+    content = jsonable_encoder(validated, by_alias=True)
+    return json.dumps(content, ensure_ascii=False, separators=(",", ":")).encode()
+
+
+def time_per_item(fn, docs: List[dict], rounds: int) -> float:
+    """Best-of-rounds microseconds per item"""
+    best = float("inf")
+    for _ in range(rounds):
+        start = time.perf_counter()
+        fn(docs)
+        best = min(best, time.perf_counter() - start)
+    return best / len(docs) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--items", type=int, default=1000)
+    parser.add_argument("--rounds", type=int, default=20)
+    args = parser.parse_args()
+
+    docs = make_documents(args.items)
+    paths = {
+        "response_model + jsonable_encoder": response_model_path,
+        "precompiled TypeAdapter": lambda d: render(List[PortfolioImage], d, fast=False),
+        "FAST_SERIALIZATION (orjson)": lambda d: render(List[PortfolioImage], d, fast=True),
+    }
+
+    # All paths must produce the same document
+    expected = json.loads(response_model_path(docs))
+    for name, fn in paths.items():
+        assert json.loads(fn(docs)) == expected, f"{name} output differs"
+
+    print(f"📊 Serializing {args.items} PortfolioImage documents (best of {args.rounds})")
+    baseline = None
+    for name, fn in paths.items():
+        cost = time_per_item(fn, docs, args.rounds)
+        baseline = baseline or cost
+        print(f"   {name:<36} {cost:8.2f} µs/item  ({baseline / cost:5.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
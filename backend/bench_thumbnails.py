@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+Benchmark the thumbnail and rendition pipeline on large JPEGs
+
+Compares decoding every original at full size (the previous pipeline) with
+the reduced-scale decode used by process_image. Each run happens in a fresh
+process so its peak RSS is measured in isolation.
+
+    python bench_thumbnails.py --corpus /path/to/jpegs
+    python bench_thumbnails.py --generate 3 --megapixels 48
+"""
+
+import argparse
+import io
+import multiprocessing
+import os
+import resource
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import List, Tuple
+
+from PIL import Image
+
+# file_upload pulls in the database module; the client is lazy and never connects here
+os.environ.setdefault("MONGO_URL", "mongodb://localhost:27017")
+os.environ.setdefault("DB_NAME", "bench")
+
+
+def make_corpus(directory: Path, count: int, megapixels: float) -> List[Path]:
+    """Write noisy gradient JPEGs, which compress like real photographs"""
+    width = int((megapixels * 1e6 * 3 / 2) ** 0.5)
+    height = int(width * 2 / 3)
+    paths = []
+    for i in range(count):
+        noise = Image.effect_noise((width, height), 48 + i * 8)
+        gradient = Image.linear_gradient("L").resize((width, height))
+        img = Image.merge("RGB", (noise, gradient, gradient.transpose(Image.Transpose.FLIP_LEFT_RIGHT)))
+        path = directory / f"corpus_{i}.jpg"
+        img.save(path, "JPEG", quality=92)
+        paths.append(path)
+    return paths
+
+
+def full_decode_pipeline(image_path: Path):
+    """The previous pipeline: a full decode for the renditions, encoded in memory"""
+    import file_upload
+
+    with Image.open(image_path) as img:
+        thumbnail = img.convert("RGB") if img.mode in ("RGBA", "P") else img
+        thumbnail.thumbnail(file_upload.THUMBNAIL_SIZE, Image.Resampling.LANCZOS)
+        thumbnail.save(io.BytesIO(), "JPEG", quality=85)
+
+    with Image.open(image_path) as img:
+        img.load()
+        widths = [width for width in file_upload.RENDITION_WIDTHS if width < img.width] or [img.width]
+        for width in reversed(widths):
+            resized = img.resize((width, max(1, round(img.height * width / img.width))), Image.Resampling.LANCZOS)
+            for fmt in file_upload.RENDITION_FORMATS:
+                converted = resized.convert("RGB") if fmt == "jpeg" and resized.mode != "RGB" else resized
+                converted.save(io.BytesIO(), fmt.upper(), quality=file_upload.RENDITION_QUALITY[fmt])
+
+
+def scaled_decode_pipeline(image_path: Path):
+    import file_upload
+
+    file_upload.process_image(str(image_path))
+
+
+PIPELINES = {
+    "full decode": full_decode_pipeline,
+    "draft/reduce": scaled_decode_pipeline,
+}
+
+
+def peak_rss_mb() -> float:
+    """High-water RSS of this process image (VmHWM is reset on exec, ru_maxrss is not)"""
+    try:
+        with open("/proc/self/status") as status:
+            for line in status:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def run_case(name: str, image_path: Path, output_dir: str) -> Tuple[float, float, float]:
+    """Seconds taken, baseline RSS and peak RSS (MB) for one pipeline run"""
+    import file_upload
+
+    # Derivatives go to a scratch tree instead of the real uploads directory
+    file_upload.UPLOAD_DIR = Path(output_dir)
+    file_upload.THUMBNAILS_DIR = Path(output_dir) / "thumbnails"
+    file_upload.RENDITIONS_DIR = Path(output_dir) / "renditions"
+    file_upload.THUMBNAILS_DIR.mkdir(exist_ok=True)
+    file_upload.RENDITIONS_DIR.mkdir(exist_ok=True)
+
+    baseline = peak_rss_mb()
+    start = time.perf_counter()
+    PIPELINES[name](image_path)
+    elapsed = time.perf_counter() - start
+    return elapsed, baseline, peak_rss_mb()
+
+
+def measure(name: str, image_path: Path, output_dir: str) -> Tuple[float, float, float]:
+    with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn")) as pool:
+        return pool.submit(run_case, name, image_path, output_dir).result()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--corpus", type=Path, help="directory of JPEGs to process")
+    parser.add_argument("--generate", type=int, default=3, help="synthetic JPEGs to create when no corpus is given")
+    parser.add_argument("--megapixels", type=float, default=48)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as scratch:
+        if args.corpus:
+            paths = sorted(p for p in args.corpus.iterdir() if p.suffix.lower() in (".jpg", ".jpeg"))
+        else:
+            print(f"🧪 Generating {args.generate} synthetic {args.megapixels:g}MP JPEGs...")
+            paths = make_corpus(Path(scratch), args.generate, args.megapixels)
+
+        totals = {name: [0.0, 0.0] for name in PIPELINES}
+        for path in paths:
+            with Image.open(path) as img:
+                print(f"\n📸 {path.name} ({img.width}x{img.height}, {img.width * img.height / 1e6:.0f}MP)")
+            for name in PIPELINES:
+                elapsed, baseline, peak = measure(name, path, scratch)
+                totals[name][0] += elapsed
+                totals[name][1] = max(totals[name][1], peak - baseline)
+                print(f"   {name:<14} {elapsed:7.2f} s   peak RSS {peak:7.0f} MB (+{peak - baseline:.0f} MB)")
+
+        print(f"\n📊 {len(paths)} images")
+        base_time = totals["full decode"][0]
+        for name, (elapsed, peak) in totals.items():
+            print(f"   {name:<14} {elapsed:7.2f} s total ({base_time / elapsed:4.1f}x)   worst extra RSS {peak:.0f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+from datetime import datetime
+from typing import Optional
+
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+
+from database import blobs_collection
+
+# Attempts to adopt or register a blob when racing a concurrent release
+REGISTER_ATTEMPTS = 3
+
+
+async def find_blob(sha256: str) -> Optional[dict]:
+    """The registered files for a content hash, without taking a reference"""
+    return await blobs_collection.find_one({"_id": sha256, "refcount": {"$gt": 0}})
+
+
+async def acquire_blob(sha256: str) -> Optional[dict]:
+    """Take a reference to the stored files for a content hash, if any"""
+    return await blobs_collection.find_one_and_update(
+        {"_id": sha256, "refcount": {"$gt": 0}},
+        {"$inc": {"refcount": 1}},
+        return_document=ReturnDocument.AFTER
+    )
+
+
+async def register_blob(sha256: str, files: dict) -> Optional[dict]:
+    """Record freshly processed files as the blob for a content hash.
+
+    Returns None when the files were registered with a first reference.
+    If a concurrent upload of the same bytes registered first, a reference
+    to that blob is returned instead and the caller should discard its own
+    files. Files that could not be registered stay untracked and are
+    removed with the document that points at them.
+    """
+    for _ in range(REGISTER_ATTEMPTS):
+        try:
+            await blobs_collection.insert_one({
+                "_id": sha256,
+                "refcount": 1,
+                **files,
+                "created_at": datetime.utcnow()
+            })
+            return None
+        except DuplicateKeyError:
+            existing = await acquire_blob(sha256)
+            if existing:
+                return existing
+    return None
+
+
+async def release_blob(sha256: str) -> bool:
+    """Drop a reference; True when the caller should delete the files.
+
+    That is the case when this was the last reference, or when the hash was
+    never registered and the files belong to the caller alone.
+    """
+    blob = await blobs_collection.find_one_and_update(
+        {"_id": sha256},
+        {"$inc": {"refcount": -1}},
+        return_document=ReturnDocument.AFTER
+    )
+    if blob is None:
+        return True
+    if blob["refcount"] > 0:
+        return False
+    result = await blobs_collection.delete_one({"_id": sha256, "refcount": {"$lte": 0}})
+    return result.deleted_count == 1
@@ -0,0 +1,197 @@
+import hashlib
+import os
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Iterable, Optional, Tuple
+
+from pymongo import ReturnDocument
+
+from database import collection_versions_collection
+from singleflight import SingleFlight
+
+RESPONSE_CACHE_SIZE = int(os.environ.get("RESPONSE_CACHE_SIZE", "256"))
+# How long versions read from MongoDB are trusted, bounding how stale a
+# response can be after another process writes; 0 reads them on every request
+RESPONSE_CACHE_VERSION_TTL = float(os.environ.get("RESPONSE_CACHE_VERSION_TTL", "1.0"))  # seconds
+
+VERSIONS_DOCUMENT_ID = "responses"
+
+
+class ResponseCache:
+    """In-process LRU cache of serialized API responses.
+
+    Entries are keyed by route and query parameters and remember which
+    collections they were built from. Writes call ``bump`` with the
+    collections they touched, which drops exactly the dependent entries and
+    bumps a per-collection version so loads racing with the write are not
+    stored. The same versions drive the ETag and Last-Modified validators, so
+    conditional requests can be answered without touching the database.
+    Compressed variants of a body are cached on its entry, so hot responses
+    are compressed once per content coding rather than once per request.
+
+    With a store, versions live in one MongoDB document that every writer
+    increments, whichever process it runs in (API workers, job workers,
+    scripts). ``refresh`` reads it at most once per version_ttl and drops
+    entries whose collections moved on elsewhere.
+    """
+
+    def __init__(self, max_entries: int = RESPONSE_CACHE_SIZE, store=None,
+                 version_ttl: float = RESPONSE_CACHE_VERSION_TTL):
+        self.max_entries = max_entries
+        self.store = store
+        self.version_ttl = version_ttl
+        self._entries: "OrderedDict[Hashable, Tuple[Any, Tuple[str, ...], Dict[str, bytes]]]" = OrderedDict()
+        self._versions: Dict[str, int] = {}
+        self._modified: Dict[str, float] = {}
+        # Identifies the version sequence; a process-local one lives only as long as this boot
+        self._epoch = uuid.uuid4().hex
+        self._started_at = float(int(time.time()))
+        self._refreshed_at = float("-inf")
+        self._refreshes = SingleFlight()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    @staticmethod
+    def make_key(route: str, params: Optional[dict] = None) -> Hashable:
+        """Build a cache key from a route name and its query parameters"""
+        items = tuple(sorted((k, v) for k, v in (params or {}).items() if v is not None))
+        return (route, items)
+
+    def versions(self, collections: Iterable[str]) -> Tuple[int, ...]:
+        """Snapshot the current versions of the given collections"""
+        return tuple(self._versions.get(name, 0) for name in collections)
+
+    def etag(self, key: Hashable, collections: Iterable[str], encoding: Optional[str] = None) -> str:
+        """Strong ETag for the response at key given its collections' versions.
+
+        Each content coding is a distinct representation and gets its own tag.
+        """
+        collections = tuple(collections)
+        digest = hashlib.sha1(
+            repr((self._epoch, key, collections, self.versions(collections))).encode()
+        ).hexdigest()
+        suffix = f"-{encoding}" if encoding else ""
+        return f'"{digest[:32]}{suffix}"'
+
+    def last_modified(self, collections: Iterable[str]) -> float:
+        """Timestamp of the most recent write to any of the given collections"""
+        return max([self._started_at] + [self._modified.get(name, 0.0) for name in collections])
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Return the cached value for key, or None on a miss"""
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[0]
+
+    def set(self, key: Hashable, value: Any, collections: Tuple[str, ...], versions: Tuple[int, ...]):
+        """Store value unless one of its collections changed since versions was taken"""
+        if self.versions(collections) != versions:
+            return
+        self._entries[key] = (value, collections, {})
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def get_encoded(self, key: Hashable, value: Any, encoding: str) -> Optional[bytes]:
+        """Return the cached compressed body for value, if it is still current"""
+        entry = self._entries.get(key)
+        if entry is None or entry[0] is not value:
+            return None
+        return entry[2].get(encoding)
+
+    def set_encoded(self, key: Hashable, value: Any, encoding: str, body: bytes):
+        """Cache a compressed body alongside value, if value is still current"""
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] is value:
+            entry[2][encoding] = body
+
+    def _next_modified(self, name: str) -> float:
+        # HTTP dates have one-second resolution, so every write must move
+        # Last-Modified forward by at least a second to stay observable
+        return float(max(int(time.time()), int(self.last_modified((name,))) + 1))
+
+    def _drop(self, collections: Iterable[str]):
+        collections = set(collections)
+        stale = [key for key, (_, deps, _) in self._entries.items() if set(deps) & collections]
+        for key in stale:
+            del self._entries[key]
+        self.invalidations += len(stale)
+
+    def invalidate(self, *collections: str):
+        """Drop every entry built from any of the given collections in this process only"""
+        for name in collections:
+            self._versions[name] = self._versions.get(name, 0) + 1
+            self._modified[name] = self._next_modified(name)
+        self._drop(collections)
+
+    async def bump(self, *collections: str):
+        """Record a write to the given collections for every process sharing the store"""
+        modified = {name: self._next_modified(name) for name in collections}
+        # Dropped locally first, so this process never serves the old data even if the update fails
+        self.invalidate(*collections)
+        if self.store is None:
+            return
+        shared = await self.store.find_one_and_update(
+            {"_id": VERSIONS_DOCUMENT_ID},
+            {
+                "$inc": {f"versions.{name}": 1 for name in collections},
+                "$max": {f"modified.{name}": value for name, value in modified.items()},
+                "$setOnInsert": {"epoch": uuid.uuid4().hex}
+            },
+            upsert=True,
+            return_document=ReturnDocument.AFTER
+        )
+        self._apply(shared)
+
+    async def refresh(self):
+        """Catch up with writes made by other processes, at most once per version_ttl"""
+        if self.store is None or time.monotonic() - self._refreshed_at < self.version_ttl:
+            return
+        await self._refreshes.do(VERSIONS_DOCUMENT_ID, self._load_versions)
+
+    async def _load_versions(self):
+        started = time.monotonic()
+        self._apply(await self.store.find_one({"_id": VERSIONS_DOCUMENT_ID}))
+        self._refreshed_at = started
+
+    def _apply(self, shared: Optional[dict]):
+        if shared is None:
+            return
+        if shared["epoch"] != self._epoch:
+            # Versions from another sequence may repeat numbers already used for other content
+            self._epoch = shared["epoch"]
+            self._versions.clear()
+            self._modified.clear()
+            self.clear()
+        versions = shared.get("versions", {})
+        self._drop(name for name, version in versions.items() if version != self._versions.get(name, 0))
+        self._versions.update(versions)
+        self._modified.update(shared.get("modified", {}))
+
+    def clear(self):
+        """Drop all entries"""
+        self._entries.clear()
+
+    def stats(self) -> dict:
+        """Return hit/miss counters and current occupancy"""
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations
+        }
+
+
+response_cache = ResponseCache(store=collection_versions_collection)
@@ -0,0 +1,85 @@
+import gzip
+import os
+from pathlib import Path
+from typing import List, Optional
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - brotli is optional
+    brotli = None
+
+# Bodies smaller than this are not worth the Content-Encoding overhead
+MIN_COMPRESS_SIZE = int(os.environ.get("MIN_COMPRESS_SIZE", "1024"))
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+# Sidecars are written once, so they can afford the slowest settings
+SIDECAR_GZIP_LEVEL = 9
+SIDECAR_BROTLI_QUALITY = 11
+
+SIDECAR_SUFFIXES = {"br": ".br", "gzip": ".gz"}
+
+# Static upload types that compress well; photos and videos are already compressed
+COMPRESSIBLE_TYPES = {
+    "application/json", "application/manifest+json", "application/xml",
+    "application/vnd.apple.mpegurl", "application/x-mpegurl",
+    "image/svg+xml", "text/css", "text/csv", "text/plain", "text/vtt", "text/xml",
+}
+
+
+def supported_encodings() -> List[str]:
+    """Content codings this process can produce, best first"""
+    return (["br"] if brotli is not None else []) + ["gzip"]
+
+
+def negotiate_encoding(accept_encoding: Optional[str]) -> Optional[str]:
+    """Choose the best supported coding from an Accept-Encoding header"""
+    if not accept_encoding:
+        return None
+    accepted = {}
+    for part in accept_encoding.split(","):
+        coding, _, params = part.strip().partition(";")
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[coding.strip().lower()] = quality
+    for coding in supported_encodings():
+        if accepted.get(coding, accepted.get("*", 0.0)) > 0:
+            return coding
+    return None
+
+
+def compress(body: bytes, encoding: str, sidecar: bool = False) -> bytes:
+    """Compress body with the given content coding"""
+    if encoding == "br":
+        return brotli.compress(body, quality=SIDECAR_BROTLI_QUALITY if sidecar else BROTLI_QUALITY)
+    if encoding == "gzip":
+        return gzip.compress(body, compresslevel=SIDECAR_GZIP_LEVEL if sidecar else GZIP_LEVEL, mtime=0)
+    raise ValueError(f"Unsupported content coding: {encoding}")
+
+
+def sidecar_path(path: Path, encoding: str) -> Path:
+    """Location of the precompressed copy of path"""
+    return path.with_name(path.name + SIDECAR_SUFFIXES[encoding])
+
+
+def write_sidecars(path: Path) -> List[Path]:
+    """Write .br/.gz copies of path next to it when they are actually smaller"""
+    body = path.read_bytes()
+    written = []
+    if len(body) < MIN_COMPRESS_SIZE:
+        return written
+    for encoding in supported_encodings():
+        compressed = compress(body, encoding, sidecar=True)
+        target = sidecar_path(path, encoding)
+        if len(compressed) < len(body):
+            tmp = target.with_name(target.name + ".tmp")
+            tmp.write_bytes(compressed)
+            os.replace(tmp, target)
+            written.append(target)
+        elif target.exists():
+            target.unlink()
+    return written
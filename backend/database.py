@@ -18,6 +18,11 @@ projects_collection = db.projects
 portfolio_images_collection = db.portfolio_images
 videos_collection = db.videos
 awards_collection = db.awards
+upload_sessions_collection = db.upload_sessions
+direct_uploads_collection = db.direct_uploads
+blobs_collection = db.blobs
+jobs_collection = db.jobs
+collection_versions_collection = db.collection_versions
 
 async def init_default_data():
     """Initialize database with default data if empty"""
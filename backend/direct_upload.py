@@ -0,0 +1,170 @@
+import asyncio
+import os
+import uuid
+from datetime import datetime, timedelta
+from typing import AsyncIterator
+
+from fastapi import HTTPException
+
+from database import direct_uploads_collection
+from file_upload import (
+    ALLOWED_IMAGE_TYPES, ALLOWED_VIDEO_TYPES, IMAGES_DIR, INCOMING_DIR, MAX_IMAGE_SIZE, MAX_VIDEO_SIZE,
+    UPLOAD_CHUNK_SIZE, UPLOAD_DIR, VIDEOS_DIR, StoredUpload, delete_file, digest_file, generate_filename,
+    hashed_path, move_file, sniff_content_type, storage, storage_key
+)
+from models import DirectUploadCreate
+from storage import PRESIGNED_UPLOAD_EXPIRES
+
+# Time after the upload URL expires in which a finished upload can still be completed
+DIRECT_UPLOAD_COMPLETE_WINDOW = timedelta(hours=1)
+
+# Allowed types, size limit and destination per kind of upload
+DIRECT_UPLOAD_KINDS = {
+    "image": (ALLOWED_IMAGE_TYPES, MAX_IMAGE_SIZE, IMAGES_DIR),
+    "video": (ALLOWED_VIDEO_TYPES, MAX_VIDEO_SIZE, VIDEOS_DIR),
+}
+
+
+async def create_direct_upload(kind: str, upload: DirectUploadCreate) -> dict:
+    """Register an upload and presign the URL the browser PUTs the file to"""
+    allowed_types, max_size, _ = DIRECT_UPLOAD_KINDS[kind]
+    if upload.content_type not in allowed_types:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Invalid {kind} type. Allowed types: {', '.join(allowed_types)}"
+        )
+    if upload.size > max_size:
+        raise HTTPException(
+            status_code=413,
+            detail=f"File too large. Maximum size: {max_size // (1024*1024)}MB"
+        )
+
+    key = storage_key(str(INCOMING_DIR / generate_filename(upload.filename)))
+    presigned = storage.presign_put(key, upload.content_type, upload.size, PRESIGNED_UPLOAD_EXPIRES)
+    now = datetime.utcnow()
+    session = {
+        "_id": uuid.uuid4().hex,
+        "kind": kind,
+        **upload.dict(),
+        "key": key,
+        "status": "pending",
+        "created_at": now,
+        "expires_at": now + timedelta(seconds=PRESIGNED_UPLOAD_EXPIRES) + DIRECT_UPLOAD_COMPLETE_WINDOW
+    }
+    await direct_uploads_collection.insert_one(session)
+    return {
+        "upload_id": session["_id"],
+        "url": presigned.url,
+        "method": "PUT",
+        "headers": presigned.headers,
+        "expires_at": now + timedelta(seconds=PRESIGNED_UPLOAD_EXPIRES)
+    }
+
+
+async def receive_presigned_upload(
+    key: str, content_type: str, size: int, expires: int, signature: str, body: AsyncIterator[bytes]
+):
+    """Store the body of a PUT to a URL presigned by the local backend.
+
+    The bytes are only checked against the signed size here; their type is
+    sniffed when the upload is completed, as it would be for a bucket.
+    """
+    if storage.remote or not storage.verify_put(key, content_type, size, expires, signature):
+        raise HTTPException(status_code=403, detail="Invalid or expired upload signature")
+    if not await direct_uploads_collection.find_one({"key": key, "status": "pending"}):
+        raise HTTPException(status_code=409, detail="Upload is already being completed")
+    path = UPLOAD_DIR / key
+    temp = path.with_name(f"{path.name}.part")
+    received = 0
+    try:
+        with open(temp, "wb") as buffer:
+            pending = bytearray()
+            async for data in body:
+                received += len(data)
+                if received > size:
+                    raise HTTPException(status_code=413, detail="Body is larger than the signed size")
+                pending += data
+                if len(pending) >= UPLOAD_CHUNK_SIZE:
+                    await asyncio.to_thread(buffer.write, bytes(pending))
+                    pending.clear()
+            await asyncio.to_thread(buffer.write, bytes(pending))
+        if received != size:
+            raise HTTPException(status_code=400, detail="Body is smaller than the signed size")
+        os.replace(temp, path)
+    except BaseException:
+        temp.unlink(missing_ok=True)
+        raise
+
+
+async def claim_direct_upload(upload_id: str, kind: str) -> dict:
+    """Mark a pending upload as completing; only one caller can win"""
+    session = await direct_uploads_collection.find_one({"_id": upload_id, "kind": kind})
+    if not session or session["expires_at"] < datetime.utcnow():
+        raise HTTPException(status_code=404, detail="Upload not found")
+    claimed = await direct_uploads_collection.find_one_and_update(
+        {"_id": upload_id, "status": "pending"},
+        {"$set": {"status": "completing"}},
+        return_document=True
+    )
+    if not claimed:
+        raise HTTPException(status_code=409, detail="Upload is already being completed")
+    return claimed
+
+
+async def store_direct_upload(session: dict) -> StoredUpload:
+    """Validate an uploaded object and move it to its content-hashed place.
+
+    An upload that has not arrived yet can be completed again later; one
+    with the wrong size or content is deleted along with its session.
+    """
+    allowed_types, max_size, directory = DIRECT_UPLOAD_KINDS[session["kind"]]
+    key = session["key"]
+    try:
+        stat = await storage.stat(key)
+        if stat is None:
+            raise HTTPException(status_code=409, detail="The file has not been uploaded yet")
+    except BaseException:
+        await direct_uploads_collection.update_one({"_id": session["_id"]}, {"$set": {"status": "pending"}})
+        raise
+
+    try:
+        if stat.size > max_size:
+            raise HTTPException(
+                status_code=413,
+                detail=f"File too large. Maximum size: {max_size // (1024*1024)}MB"
+            )
+        path = await storage.fetch(key)
+        sha256, head = await asyncio.to_thread(digest_file, path)
+        content_type = sniff_content_type(head)
+        if content_type not in allowed_types:
+            raise HTTPException(status_code=400, detail="File content does not match an allowed type")
+    except HTTPException:
+        await delete_file(str(UPLOAD_DIR / key))
+        await finish_direct_upload(session["_id"])
+        raise
+    except BaseException:
+        await direct_uploads_collection.update_one({"_id": session["_id"]}, {"$set": {"status": "pending"}})
+        raise
+
+    category_dir = directory / session["category"]
+    category_dir.mkdir(parents=True, exist_ok=True)
+    destination = hashed_path(category_dir / path.name, sha256)
+    await move_file(path, destination)
+    return StoredUpload(destination, stat.size, sha256, content_type)
+
+
+async def finish_direct_upload(upload_id: str):
+    await direct_uploads_collection.delete_one({"_id": upload_id})
+
+
+async def cleanup_expired_direct_uploads() -> int:
+    """Delete expired sessions and whatever was uploaded for those never completed"""
+    expired = direct_uploads_collection.find({"expires_at": {"$lt": datetime.utcnow()}})
+    removed = 0
+    async for session in expired:
+        # A session stuck mid-completion may already back a document, so its object is kept
+        if session["status"] == "pending":
+            await delete_file(str(UPLOAD_DIR / session["key"]))
+        await direct_uploads_collection.delete_one({"_id": session["_id"]})
+        removed += 1
+    return removed
@@ -0,0 +1,219 @@
+import hashlib
+import mimetypes
+import os
+import secrets
+from email.utils import parsedate_to_datetime
+from pathlib import Path
+from typing import Iterable, List, Optional, Tuple
+
+import anyio
+from fastapi import HTTPException, Request
+from fastapi.responses import Response
+from starlette.types import Receive, Scope, Send
+
+from compression import COMPRESSIBLE_TYPES, negotiate_encoding, sidecar_path
+from file_upload import UPLOAD_DIR, content_hash_from_path
+from http_conditional import IMMUTABLE_CACHE_CONTROL, REVALIDATE_CACHE_CONTROL, http_date, not_modified
+
+# Bytes read per threadpool hop when zero-copy sending is unavailable
+SEND_CHUNK_SIZE = 256 * 1024
+# More ranges than this (after merging) are answered with the whole file
+MAX_RANGES = 32
+
+
+def upload_key(file_path: str, exclude: Iterable[Path] = ()) -> str:
+    """Normalize a URL path under /api/uploads to a key inside UPLOAD_DIR.
+
+    The checks run on the resolved path, so ".." segments (also when sent
+    percent-encoded) cannot reach outside UPLOAD_DIR or into an excluded
+    directory.
+    """
+    root = UPLOAD_DIR.resolve()
+    full_path = (root / file_path).resolve()
+    if root not in full_path.parents or any(full_path.is_relative_to(path.resolve()) for path in exclude):
+        raise HTTPException(status_code=404, detail="File not found")
+    return full_path.relative_to(root).as_posix()
+
+
+def resolve_upload_path(file_path: str, exclude: Iterable[Path] = ()) -> Path:
+    """Map a URL path under /api/uploads to a file inside UPLOAD_DIR and outside exclude"""
+    full_path = UPLOAD_DIR.resolve() / upload_key(file_path, exclude)
+    if not full_path.is_file():
+        raise HTTPException(status_code=404, detail="File not found")
+    return full_path
+
+
+def parse_range(header: Optional[str], size: int) -> Optional[List[Tuple[int, int]]]:
+    """Parse a bytes Range header into sorted, merged inclusive (start, end) pairs.
+
+    Returns None when the header is absent, malformed or asks for too many
+    ranges, in which case the full file is served. Raises 416 when no range
+    overlaps the file.
+    """
+    if not header or not header.startswith("bytes="):
+        return None
+    ranges = []
+    for spec in header[6:].split(","):
+        start, sep, end = spec.strip().partition("-")
+        if not sep:
+            return None
+        try:
+            if not start:
+                # Suffix range: the last N bytes
+                length = int(end)
+                if length == 0:
+                    continue
+                ranges.append((max(size - length, 0), size - 1))
+                continue
+            first = int(start)
+            last = int(end) if end else size - 1
+        except ValueError:
+            return None
+        if end and first > last:
+            return None
+        if first < size:
+            ranges.append((first, min(last, size - 1)))
+
+    if not ranges:
+        raise HTTPException(status_code=416, detail="Range not satisfiable", headers={"Content-Range": f"bytes */{size}"})
+
+    merged = []
+    for first, last in sorted(ranges):
+        if merged and first <= merged[-1][1] + 1:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], last))
+        else:
+            merged.append((first, last))
+    return merged if len(merged) <= MAX_RANGES else None
+
+
+def _if_range_matches(header: str, etag: str, mtime: float) -> bool:
+    """If-Range needs a strong ETag match or the exact Last-Modified date"""
+    header = header.strip()
+    if header.startswith('"') or header.startswith("W/"):
+        return header == etag
+    try:
+        return int(parsedate_to_datetime(header).timestamp()) == int(mtime)
+    except (TypeError, ValueError):
+        return False
+
+
+class RangeFileResponse(Response):
+    """File response with single and multipart byte ranges.
+
+    Uses the server's zero-copy send extension when it offers one; otherwise
+    the requested bytes are read with pread in the threadpool, so only the
+    ranges asked for ever pass through Python.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        request: Request,
+        media_type: str,
+        headers: Optional[dict] = None,
+        etag: Optional[str] = None
+    ):
+        self.path = path
+        self.media_type = media_type
+        self.background = None
+        stat = path.stat()
+        size = stat.st_size
+        # Without a content-derived tag, mtime and size stand in (as nginx does)
+        etag = etag or '"' + hashlib.md5(f"{stat.st_mtime}-{size}".encode()).hexdigest() + '"'
+        self.init_headers({
+            **(headers or {}),
+            "Accept-Ranges": "bytes",
+            "ETag": etag,
+            "Last-Modified": http_date(stat.st_mtime)
+        })
+        self.status_code = 200
+        self.ranges = [(0, size - 1)] if size else []
+        self.boundary = None
+
+        if not_modified(request.headers, etag, stat.st_mtime):
+            self.status_code = 304
+            self.ranges = []
+            del self.headers["content-type"]
+            return
+
+        if_range = request.headers.get("if-range")
+        ranges = None
+        if if_range is None or _if_range_matches(if_range, etag, stat.st_mtime):
+            ranges = parse_range(request.headers.get("range"), size)
+        if not ranges:
+            self.headers["Content-Length"] = str(size)
+            return
+
+        self.status_code = 206
+        self.ranges = ranges
+        if len(ranges) == 1:
+            first, last = ranges[0]
+            self.headers["Content-Range"] = f"bytes {first}-{last}/{size}"
+            self.headers["Content-Length"] = str(last - first + 1)
+            return
+
+        self.boundary = secrets.token_hex(16)
+        self.part_headers = [
+            (f"--{self.boundary}\r\nContent-Type: {media_type}\r\n"
+             f"Content-Range: bytes {first}-{last}/{size}\r\n\r\n").encode("latin-1")
+            for first, last in ranges
+        ]
+        self.closing = f"--{self.boundary}--\r\n".encode("latin-1")
+        length = sum(len(part) + last - first + 1 + 2 for part, (first, last) in zip(self.part_headers, ranges))
+        self.headers["Content-Type"] = f"multipart/byteranges; boundary={self.boundary}"
+        self.headers["Content-Length"] = str(length + len(self.closing))
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        await send({"type": "http.response.start", "status": self.status_code, "headers": self.raw_headers})
+        if scope["method"].upper() == "HEAD" or not self.ranges:
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+            return
+
+        zerocopy = "http.response.zerocopysend" in scope.get("extensions", {})
+        fd = os.open(self.path, os.O_RDONLY)
+        try:
+            for index, (first, last) in enumerate(self.ranges):
+                if self.boundary:
+                    await send({"type": "http.response.body", "body": self.part_headers[index], "more_body": True})
+                await self._send_range(send, fd, first, last - first + 1, zerocopy)
+                if self.boundary:
+                    await send({"type": "http.response.body", "body": b"\r\n", "more_body": True})
+            await send({"type": "http.response.body", "body": self.closing if self.boundary else b"", "more_body": False})
+        finally:
+            os.close(fd)
+
+    async def _send_range(self, send: Send, fd: int, offset: int, count: int, zerocopy: bool):
+        if zerocopy:
+            await send({"type": "http.response.zerocopysend", "file": fd, "offset": offset, "count": count, "more_body": True})
+            return
+        while count > 0:
+            chunk = await anyio.to_thread.run_sync(os.pread, fd, min(SEND_CHUNK_SIZE, count), offset)
+            if not chunk:
+                break
+            await send({"type": "http.response.body", "body": chunk, "more_body": True})
+            offset += len(chunk)
+            count -= len(chunk)
+
+
+def serve_file(request: Request, path: Path) -> Response:
+    """Serve a file with byte-range support, preferring a fresh precompressed sidecar when negotiated.
+
+    Files whose name or package directory embeds a content hash are cacheable
+    forever and use the hash as their ETag; legacy names are revalidated on
+    every use.
+    """
+    media_type = mimetypes.guess_type(path.name)[0] or "application/octet-stream"
+    content_hash = content_hash_from_path(path)
+    etag = f'"{content_hash}"' if content_hash else None
+    headers = {"Cache-Control": IMMUTABLE_CACHE_CONTROL if content_hash else REVALIDATE_CACHE_CONTROL}
+
+    if media_type in COMPRESSIBLE_TYPES:
+        headers["Vary"] = "Accept-Encoding"
+        encoding = negotiate_encoding(request.headers.get("accept-encoding"))
+        if encoding:
+            sidecar = sidecar_path(path, encoding)
+            if sidecar.is_file() and sidecar.stat().st_mtime >= path.stat().st_mtime:
+                headers["Content-Encoding"] = encoding
+                return RangeFileResponse(sidecar, request, media_type, headers, etag and f'"{content_hash}-{encoding}"')
+
+    return RangeFileResponse(path, request, media_type, headers, etag)
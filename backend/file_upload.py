@@ -1,22 +1,45 @@
+import io
+import math
 import os
+import re
 import uuid
 import shutil
+import asyncio
+import hashlib
+import numpy as np
 from fastapi import UploadFile, HTTPException
-from PIL import Image
+from PIL import ExifTags, Image, ImageOps, features
 import mimetypes
-from typing import List, Tuple
+from typing import Iterable, List, NamedTuple, Optional, Set, Tuple
 from pathlib import Path
 
+from blob_store import acquire_blob, find_blob, register_blob, release_blob
+from compression import SIDECAR_SUFFIXES, write_sidecars
+from http_conditional import IMMUTABLE_CACHE_CONTROL, REVALIDATE_CACHE_CONTROL
+from placeholders import PLACEHOLDER_SAMPLE_SIZE, placeholder
+from image_processing import run_image_job
+from storage import create_storage
+
 # Create upload directories
-UPLOAD_DIR = Path("/app/backend/uploads")
+UPLOAD_DIR = Path(os.environ.get("UPLOAD_DIR", "/app/backend/uploads"))
 IMAGES_DIR = UPLOAD_DIR / "images"
 VIDEOS_DIR = UPLOAD_DIR / "videos"
 THUMBNAILS_DIR = UPLOAD_DIR / "thumbnails"
+RENDITIONS_DIR = UPLOAD_DIR / "renditions"
+PREVIEWS_DIR = UPLOAD_DIR / "previews"
+HLS_DIR = UPLOAD_DIR / "hls"
+# Direct uploads land here until they are validated and moved into place
+INCOMING_DIR = UPLOAD_DIR / "incoming"
 
 # Create directories if they don't exist
-for directory in [UPLOAD_DIR, IMAGES_DIR, VIDEOS_DIR, THUMBNAILS_DIR]:
+for directory in [UPLOAD_DIR, IMAGES_DIR, VIDEOS_DIR, THUMBNAILS_DIR, RENDITIONS_DIR, PREVIEWS_DIR, HLS_DIR, INCOMING_DIR]:
     directory.mkdir(parents=True, exist_ok=True)
 
+# UPLOAD_DIR is the working copy; the storage backend is where files are served from
+storage = create_storage(UPLOAD_DIR)
+# Files uploaded to a remote backend at once, such as the segments of an HLS package
+PUBLISH_CONCURRENCY = 8
+
 # Allowed file types
 ALLOWED_IMAGE_TYPES = {
     "image/jpeg", "image/jpg", "image/png", "image/gif", "image/webp"
@@ -29,6 +52,46 @@ ALLOWED_VIDEO_TYPES = {
 MAX_IMAGE_SIZE = 50 * 1024 * 1024  # 50MB
 MAX_VIDEO_SIZE = 1000 * 1024 * 1024  # 1000MB (1GB)
 
+UPLOAD_CHUNK_SIZE = 1024 * 1024  # 1MB
+
+# Hex digits of the SHA-256 embedded in asset filenames (<stem>.<hash><ext>)
+CONTENT_HASH_LENGTH = 16
+HASHED_NAME_RE = re.compile(r"\.([0-9a-f]{%d})\.[^.]+$" % CONTENT_HASH_LENGTH)
+# Multi-file assets (HLS packages) hash the whole directory instead: <stem>.<hash>/
+HASHED_DIR_RE = re.compile(r"^[^.]+\.([0-9a-f]{%d})$" % CONTENT_HASH_LENGTH)
+
+class StoredUpload(NamedTuple):
+    path: Path
+    size: int
+    sha256: str
+    content_type: str
+
+class SavedImage(NamedTuple):
+    image_path: str
+    thumbnail_path: str
+    renditions: List[dict]
+    sha256: str
+    size: int
+    content_type: str
+    metadata: dict  # width, height, dominant_color and blurhash when known
+
+THUMBNAIL_SIZE = (300, 300)
+
+# Responsive rendition ladder (widths in px) used to build srcset on the client
+RENDITION_WIDTHS = sorted(
+    int(width) for width in os.environ.get("RENDITION_WIDTHS", "320,640,1280,1920,2560").split(",") if width.strip()
+)
+# AVIF encodes are slow, so they are opt-in and need Pillow's AVIF plugin
+ENABLE_AVIF = os.environ.get("ENABLE_AVIF", "").lower() in ("1", "true", "yes") and features.check("avif")
+RENDITION_FORMATS = ["webp", "jpeg"] + (["avif"] if ENABLE_AVIF else [])
+RENDITION_QUALITY = {"webp": 80, "jpeg": 82, "avif": 60}
+RENDITION_EXTENSIONS = {"webp": ".webp", "jpeg": ".jpg", "avif": ".avif"}
+
+# Video poster frames, in the same formats as image renditions
+POSTER_WIDTHS = sorted(
+    int(width) for width in os.environ.get("POSTER_WIDTHS", "320,640,1280").split(",") if width.strip()
+)
+
 def validate_file(file: UploadFile, file_type: str = "image") -> bool:
     """Validate uploaded file"""
     if file_type == "image":
@@ -56,14 +119,152 @@ def validate_file(file: UploadFile, file_type: str = "image") -> bool:
     
     return True
 
+def sniff_content_type(head: bytes) -> Optional[str]:
+    """Identify an allowed file type from its leading bytes"""
+    if head.startswith(b"\xff\xd8\xff"):
+        return "image/jpeg"
+    if head.startswith(b"\x89PNG\r\n\x1a\n"):
+        return "image/png"
+    if head[:6] in (b"GIF87a", b"GIF89a"):
+        return "image/gif"
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return "image/webp"
+    if head[:4] == b"RIFF" and head[8:12] == b"AVI ":
+        return "video/avi"
+    if head[4:8] == b"ftyp":
+        return "video/mov" if head[8:12] == b"qt  " else "video/mp4"
+    if head.startswith(b"\x1a\x45\xdf\xa3"):
+        return "video/webm"
+    if head.startswith(b"FLV"):
+        return "video/flv"
+    if head.startswith(b"\x30\x26\xb2\x75\x8e\x66\xcf\x11"):
+        return "video/wmv"
+    return None
+
+def _write_chunk(buffer, digest, chunk: bytes):
+    digest.update(chunk)
+    buffer.write(chunk)
+
+def _sync(buffer):
+    buffer.flush()
+    os.fsync(buffer.fileno())
+
+async def write_upload(file: UploadFile, destination: Path, max_size: int, allowed_types: Set[str]) -> StoredUpload:
+    """Stream an upload to disk in one pass.
+
+    Chunks are hashed and written in a worker thread so the event loop is
+    never blocked. The size limit is enforced as bytes arrive, regardless of
+    what the client declared, and the content type is sniffed from the first
+    chunk. A rejected or failed upload leaves no partial file behind; a
+    complete one is renamed to embed its content hash.
+    """
+    digest = hashlib.sha256()
+    size = 0
+    content_type = None
+    try:
+        with open(destination, "wb") as buffer:
+            while True:
+                chunk = await file.read(UPLOAD_CHUNK_SIZE)
+                if not chunk:
+                    break
+                if content_type is None:
+                    content_type = sniff_content_type(chunk[:16])
+                    if content_type not in allowed_types:
+                        raise HTTPException(
+                            status_code=400,
+                            detail="File content does not match an allowed type"
+                        )
+                size += len(chunk)
+                if size > max_size:
+                    raise HTTPException(
+                        status_code=413,
+                        detail=f"File too large. Maximum size: {max_size // (1024*1024)}MB"
+                    )
+                await asyncio.to_thread(_write_chunk, buffer, digest, chunk)
+            # The upload is acknowledged before any processing, so it must survive a crash
+            await asyncio.to_thread(_sync, buffer)
+        if content_type is None:
+            raise HTTPException(status_code=400, detail="Empty file")
+    except BaseException:
+        destination.unlink(missing_ok=True)
+        raise
+    
+    sha256 = digest.hexdigest()
+    path = destination.rename(hashed_path(destination, sha256))
+    return StoredUpload(path, size, sha256, content_type)
+
+def digest_file(path: Path) -> Tuple[str, bytes]:
+    """SHA-256 of a stored file and its leading bytes for sniffing (blocking)"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        head = f.read(16)
+        digest.update(head)
+        for chunk in iter(lambda: f.read(UPLOAD_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest(), head
+
+def hashed_filename(stem: str, digest: str, suffix: str) -> str:
+    """Filename embedding a content hash, safe to cache forever"""
+    return f"{stem}.{digest[:CONTENT_HASH_LENGTH]}{suffix}"
+
+def content_hash_from_name(name: str) -> Optional[str]:
+    """The content hash embedded in a filename, or None for legacy names"""
+    match = HASHED_NAME_RE.search(name)
+    return match.group(1) if match else None
+
+def content_hash_from_path(path: Path) -> Optional[str]:
+    """The content hash of an upload, from its own name or a hashed directory it sits in"""
+    content_hash = content_hash_from_name(path.name)
+    if content_hash:
+        return content_hash
+    root = UPLOAD_DIR.resolve()
+    for parent in path.parents:
+        if parent == root or parent == UPLOAD_DIR:
+            break
+        match = HASHED_DIR_RE.match(parent.name)
+        if match:
+            return match.group(1)
+    return None
+
+def _asset_stem(path: Path) -> str:
+    """Filename without its extension or embedded content hash"""
+    return path.name.split(".")[0]
+
+def hashed_path(path: Path, digest: str) -> Path:
+    """Final name of an upload: its stem and extension around the content hash"""
+    return path.with_name(hashed_filename(_asset_stem(path), digest, path.suffix))
+
+def rehashed_path(path: Path, digest: str) -> Path:
+    """Where rewritten content of an asset belongs: a new hashed name, or in place for legacy names"""
+    if content_hash_from_name(path.name) is None:
+        return path
+    return hashed_path(path, digest)
+
+def write_hashed(directory: Path, stem: str, suffix: str, data: bytes) -> Path:
+    """Write generated bytes under a name derived from their content"""
+    path = directory / hashed_filename(stem, hashlib.sha256(data).hexdigest(), suffix)
+    path.write_bytes(data)
+    return path
+
+def _save_hashed(img: Image.Image, directory: Path, stem: str, suffix: str, fmt: str, **params) -> Path:
+    """Encode an image and write it under a name derived from the encoded bytes"""
+    buffer = io.BytesIO()
+    img.save(buffer, fmt, **params)
+    return write_hashed(directory, stem, suffix, buffer.getvalue())
+
 def generate_filename(original_filename: str) -> str:
     """Generate unique filename"""
     file_extension = Path(original_filename).suffix.lower()
     unique_filename = f"{uuid.uuid4()}{file_extension}"
     return unique_filename
 
-async def save_image(file: UploadFile, category: str = "general") -> Tuple[str, str]:
-    """Save uploaded image and create thumbnail"""
+async def save_image(file: UploadFile, category: str = "general") -> SavedImage:
+    """Save an uploaded original.
+
+    Files are shared between uploads of identical bytes: a duplicate takes a
+    reference to the stored original and derivatives. Otherwise the returned
+    thumbnail_path is empty and create_image_derivatives has to run.
+    """
     validate_file(file, "image")
     
     # Generate unique filename
@@ -74,63 +275,407 @@ async def save_image(file: UploadFile, category: str = "general") -> Tuple[str,
     category_dir.mkdir(parents=True, exist_ok=True)
     
     # Save original image
-    image_path = category_dir / filename
-    with open(image_path, "wb") as buffer:
-        shutil.copyfileobj(file.file, buffer)
+    stored = await write_upload(file, category_dir / filename, MAX_IMAGE_SIZE, ALLOWED_IMAGE_TYPES)
     
-    # Create thumbnail
-    thumbnail_filename = f"thumb_{filename}"
-    thumbnail_path = THUMBNAILS_DIR / thumbnail_filename
+    saved = await register_image(stored)
+    if not saved.thumbnail_path:
+        await publish_file(saved.image_path)
+    return saved
+
+async def register_image(stored: StoredUpload) -> SavedImage:
+    """Share a stored original with an earlier upload of the same bytes, if any"""
+    blob = await acquire_blob(stored.sha256)
+    if blob is None:
+        metadata = await _image_metadata(str(stored.path))
+        return SavedImage(str(stored.path), "", [], stored.sha256, stored.size, stored.content_type, metadata)
     
+    await delete_file(str(stored.path))
+    metadata = await _image_metadata(blob["image_path"])
+    return SavedImage(
+        blob["image_path"], blob["thumbnail_path"], blob["renditions"],
+        stored.sha256, stored.size, stored.content_type, metadata
+    )
+
+async def _image_metadata(image_path: str) -> dict:
     try:
-        with Image.open(image_path) as img:
-            # Convert to RGB if necessary
-            if img.mode in ("RGBA", "P"):
-                img = img.convert("RGB")
-            
-            # Create thumbnail (max 300x300, maintain aspect ratio)
-            img.thumbnail((300, 300), Image.Resampling.LANCZOS)
-            img.save(thumbnail_path, "JPEG", quality=85)
+        return await run_image_job(image_metadata, image_path)
+    except HTTPException:
+        # A saturated pool must not fail an upload that is already stored; the backfill catches up
+        return {}
+
+def image_metadata(image_path: str) -> dict:
+    """Intrinsic size, dominant color and BlurHash of an original (CPU-bound).
+
+    The placeholder is computed from a buffer of at most 32px a side, decoded
+    at reduced scale, so it costs little next to the upload itself.
+    """
+    path = Path(image_path)
+    try:
+        with Image.open(path) as img:
+            width, height = _oriented_size(img)
+    except Exception:
+        return {}
+    metadata = {"width": width, "height": height}
+    try:
+        min_width = math.ceil(width * PLACEHOLDER_SAMPLE_SIZE / max(width, height))
+        with load_scaled(path, min_width) as base:
+            sample = base.copy()
+        sample.thumbnail((PLACEHOLDER_SAMPLE_SIZE, PLACEHOLDER_SAMPLE_SIZE), Image.Resampling.BOX)
+        if sample.mode == "RGBA":
+            # Transparent areas show the page behind them, assumed white
+            sample = Image.alpha_composite(Image.new("RGBA", sample.size, (255, 255, 255, 255)), sample)
+        metadata.update(placeholder(np.asarray(sample.convert("RGB"))))
+    except Exception:
+        # Truncated or exotic files still get their dimensions
+        pass
+    return metadata
+
+async def create_image_derivatives(image_path: str, sha256: str) -> dict:
+    """Create the thumbnail and renditions of a saved original and register them.
+
+    Returns the image, thumbnail and rendition files to reference, which are
+    another upload's if it registered the same bytes first. Safe to run again
+    for the same upload: a blob already registered for image_path is
+    returned as it is, without another reference.
+    """
+    registered = await find_blob(sha256)
+    if registered and registered["image_path"] == image_path:
+        return _blob_files(registered)
+
+    await ensure_local(image_path)
+    # Pillow work runs in the process pool so the event loop keeps serving requests
+    thumbnail_path, renditions = await run_image_job(process_image, image_path)
+    if thumbnail_path != image_path:
+        await publish_file(thumbnail_path)
+    await publish_files(url_to_path(rendition["url"]) for rendition in renditions)
+    files = {"image_path": image_path, "thumbnail_path": thumbnail_path, "renditions": renditions}
+    blob = await register_blob(sha256, files)
+    if blob is None:
+        return files
+    if blob["image_path"] == image_path:
+        # A concurrent run for this same upload registered it; the reference just taken is surplus
+        await release_blob(sha256)
+        return _blob_files(blob)
+    
+    # Lost a race with an identical upload; its files win. Derivative names
+    # come from the content hash, so only files the blob does not use are ours
+    shared = {blob["image_path"], blob["thumbnail_path"], *(url_to_path(r["url"]) for r in blob["renditions"])}
+    for path in [image_path, thumbnail_path, *(url_to_path(r["url"]) for r in renditions)]:
+        if path not in shared:
+            await delete_file(path)
+    return _blob_files(blob)
+
+def _blob_files(blob: dict) -> dict:
+    return {key: blob[key] for key in ("image_path", "thumbnail_path", "renditions")}
+
+def process_image(image_path: str) -> Tuple[str, List[dict]]:
+    """Create the thumbnail and renditions for a saved original (CPU-bound).
+
+    The original is decoded once, at the smallest scale that still covers
+    the widest derivative, and every output is resampled from that.
+    """
+    path = Path(image_path)
+    try:
+        base = load_scaled(path, derivative_width(path))
+    except Exception:
+        # Undecodable originals are served as-is
+        return str(path), []
+    with base:
+        return create_thumbnail(path, base), generate_renditions(path, base)
+
+def _oriented_size(img: Image.Image) -> Tuple[int, int]:
+    """Size of an image after its EXIF orientation is applied"""
+    orientation = img.getexif().get(ExifTags.Base.Orientation, 1)
+    return (img.height, img.width) if orientation in (5, 6, 7, 8) else img.size
+
+def _rendition_widths(width: int) -> List[int]:
+    return [rung for rung in RENDITION_WIDTHS if rung < width] or [width]
+
+def derivative_width(image_path: Path) -> int:
+    """Widest output the thumbnail and rendition ladder need from an original"""
+    with Image.open(image_path) as img:
+        width, height = _oriented_size(img)
+    thumbnail_width = math.ceil(width * min(1.0, THUMBNAIL_SIZE[0] / width, THUMBNAIL_SIZE[1] / height))
+    return max(thumbnail_width, max(_rendition_widths(width)))
+
+def load_scaled(image_path: Path, min_width: int) -> Image.Image:
+    """Decode an image at the smallest scale at least min_width wide once oriented.
+
+    JPEGs are decoded in the DCT domain at 1/2, 1/4 or 1/8 scale via draft();
+    other formats are decoded fully and shrunk with reduce() while at least
+    twice the target size remains. EXIF orientation is applied and the mode
+    normalized to RGB or RGBA.
+    """
+    with Image.open(image_path) as img:
+        width, height = _oriented_size(img)
+        # draft/reduce work on the stored axes, which orientations 5-8 swap
+        scale = min_width / width
+        request = (math.ceil(img.width * scale), math.ceil(img.height * scale))
+        if img.format == "JPEG":
+            img.draft(None, request)
+        img.load()
+        # reduce() cannot handle palette, bilevel or 16-bit images, so they are normalized first
+        base = _normalize_mode(img) if img.mode in ("1", "P") or img.mode.startswith("I;16") else img
+        factor = min(img.width // (request[0] * 2), img.height // (request[1] * 2))
+        scaled = base.reduce(factor) if factor > 1 else base.copy()
+    return _normalize_mode(ImageOps.exif_transpose(scaled))
+
+def _normalize_mode(img: Image.Image) -> Image.Image:
+    """Convert to RGB, or RGBA when the image has transparency"""
+    if img.mode in ("RGB", "RGBA"):
+        return img
+    icc_profile = img.info.get("icc_profile")
+    if img.mode == "CMYK" and icc_profile and features.check("littlecms2"):
+        # Print scans are often CMYK; a naive conversion shifts their colors
+        from PIL import ImageCms
+        source = ImageCms.ImageCmsProfile(io.BytesIO(icc_profile))
+        converted = ImageCms.profileToProfile(img, source, ImageCms.createProfile("sRGB"), outputMode="RGB")
+        converted.info.pop("icc_profile", None)
+        return converted
+    if img.mode in ("I", "I;16", "I;16B", "I;16L", "I;16N"):
+        # 16-bit grayscale would clip to white under a plain conversion
+        img = img.convert("I").point(lambda value: value * (1 / 256)).convert("L")
+    has_alpha = "A" in img.getbands() or (img.mode == "P" and "transparency" in img.info)
+    converted = img.convert("RGBA" if has_alpha else "RGB")
+    if img.mode == "CMYK":
+        converted.info.pop("icc_profile", None)
+    return converted
+
+def _encode_params(img: Image.Image, **params) -> dict:
+    """Carry the color profile of the source into an encoded derivative"""
+    icc_profile = img.info.get("icc_profile")
+    return {**params, "icc_profile": icc_profile} if icc_profile else params
+
+def transform_image(
+    image_path: str, destination: str, width: int, height: int, fit: str, fmt: str, quality: int
+) -> int:
+    """Render an original into a width x height box and write it atomically (CPU-bound).
+
+    A height of 0 keeps the aspect ratio. "cover" crops to fill the box,
+    "contain" letterboxes into it and "inside" only shrinks to fit; nothing
+    is upscaled. Returns the size of the written file.
+    """
+    path = Path(image_path)
+    with Image.open(path) as img:
+        original_width, original_height = _oriented_size(img)
+    if fit == "cover" and height:
+        # Crop scale: original pixels per box pixel for the largest centered crop
+        crop_scale = min(original_width / width, original_height / height)
+        output = (max(1, round(width * min(1.0, crop_scale))), max(1, round(height * min(1.0, crop_scale))))
+        min_width = math.ceil(original_width * min(1.0, 1 / crop_scale))
+    else:
+        scale = min(1.0, width / original_width, height / original_height if height else 1.0)
+        output = (max(1, round(original_width * scale)), max(1, round(original_height * scale)))
+        min_width = output[0]
+
+    with load_scaled(path, min_width) as base:
+        if fit == "cover" and height:
+            result = ImageOps.fit(base, output, Image.Resampling.LANCZOS)
+        else:
+            result = base.resize(output, Image.Resampling.LANCZOS) if base.size != output else base.copy()
+        if fit == "contain" and height and result.size != (width, height):
+            background = (0, 0, 0, 0) if result.mode == "RGBA" and fmt != "jpeg" else (255, 255, 255)
+            canvas = Image.new(result.mode if len(background) == 4 else "RGB", (width, height), background)
+            canvas.paste(result, ((width - result.width) // 2, (height - result.height) // 2))
+            result = canvas
+        if fmt == "jpeg" and result.mode != "RGB":
+            result = result.convert("RGB")
+        buffer = io.BytesIO()
+        result.save(buffer, fmt.upper(), **_encode_params(base, quality=quality))
+
+    temp = f"{destination}.{os.getpid()}.tmp"
+    with open(temp, "wb") as f:
+        f.write(buffer.getvalue())
+    os.replace(temp, destination)
+    return buffer.tell()
+
+def create_thumbnail(image_path: Path, base: Image.Image) -> str:
+    """Create a 300x300 JPEG thumbnail, falling back to the original on failure"""
+    try:
+        thumbnail = base.convert("RGB") if base.mode != "RGB" else base.copy()
+        
+        # Create thumbnail (max 300x300, maintain aspect ratio)
+        thumbnail.thumbnail(THUMBNAIL_SIZE, Image.Resampling.LANCZOS)
+        thumbnail_path = _save_hashed(
+            thumbnail, THUMBNAILS_DIR, f"thumb_{_asset_stem(image_path)}", ".jpg", "JPEG",
+            **_encode_params(base, quality=85)
+        )
     except Exception as e:
         # If thumbnail creation fails, use original image
         thumbnail_path = image_path
-        thumbnail_filename = filename
     
-    return str(image_path), str(thumbnail_path)
+    return str(thumbnail_path)
+
+def generate_renditions(image_path: Path, base: Image.Image) -> List[dict]:
+    """Create the responsive rendition ladder for an image.
+
+    Widths wider than the original are skipped; an image narrower than the
+    smallest rung gets a single rendition at its own width. Heights follow
+    the original's aspect ratio, not the possibly rounded decoded one.
+    """
+    renditions = []
+    try:
+        with Image.open(image_path) as img:
+            original_width, original_height = _oriented_size(img)
+        for width in reversed(_rendition_widths(original_width)):
+            height = max(1, round(original_height * width / original_width))
+            resized = base.resize((width, height), Image.Resampling.LANCZOS)
+            for fmt in RENDITION_FORMATS:
+                converted = resized.convert("RGB") if fmt == "jpeg" and resized.mode != "RGB" else resized
+                rendition_path = _save_hashed(
+                    converted, RENDITIONS_DIR, f"{_asset_stem(image_path)}_{width}w",
+                    RENDITION_EXTENSIONS[fmt], fmt.upper(),
+                    **_encode_params(base, quality=RENDITION_QUALITY[fmt])
+                )
+                renditions.append({
+                    "url": get_file_url(str(rendition_path)),
+                    "width": width,
+                    "height": height,
+                    "format": fmt
+                })
+    except Exception:
+        # Renditions are an optimization; the original is still served
+        return []
+    
+    return sorted(renditions, key=lambda r: (r["format"], r["width"]))
 
 async def save_video(file: UploadFile, category: str = "general") -> str:
     """Save uploaded video"""
     validate_file(file, "video")
     
-    # Generate unique filename
-    filename = generate_filename(file.filename)
+    # Save video
+    stored = await write_upload(file, video_destination(file.filename, category), MAX_VIDEO_SIZE, ALLOWED_VIDEO_TYPES)
+    await publish_file(str(stored.path))
     
-    # Create category directory
+    return str(stored.path)
+
+def video_destination(original_filename: str, category: str = "general") -> Path:
+    """Unique path for a new video inside its category directory"""
     category_dir = VIDEOS_DIR / category
     category_dir.mkdir(parents=True, exist_ok=True)
-    
-    # Save video
-    video_path = category_dir / filename
-    with open(video_path, "wb") as buffer:
-        shutil.copyfileobj(file.file, buffer)
-    
-    return str(video_path)
+    return category_dir / generate_filename(original_filename)
+
+def create_posters(video_path: str, frame: bytes) -> List[dict]:
+    """Encode a decoded video frame at each poster width"""
+    posters = []
+    with Image.open(io.BytesIO(frame)) as img:
+        base = img.convert("RGB")
+    widths = [width for width in POSTER_WIDTHS if width <= base.width] or [base.width]
+    for width in widths:
+        height = max(1, round(base.height * width / base.width))
+        resized = base.resize((width, height), Image.Resampling.LANCZOS) if width != base.width else base
+        for fmt in RENDITION_FORMATS:
+            poster_path = _save_hashed(
+                resized, THUMBNAILS_DIR, f"poster_{_asset_stem(Path(video_path))}_{width}w",
+                RENDITION_EXTENSIONS[fmt], fmt.upper(), quality=RENDITION_QUALITY[fmt]
+            )
+            posters.append({"url": get_file_url(str(poster_path)), "width": width, "height": height, "format": fmt})
+    return sorted(posters, key=lambda p: (p["format"], p["width"]))
+
+def save_sprite_file(video_path: str, suffix: str, data: bytes) -> Path:
+    """Write a scrub-preview sprite or its index for a video"""
+    return write_hashed(PREVIEWS_DIR, f"sprite_{_asset_stem(Path(video_path))}", suffix, data)
+
+def hls_staging_dir(video_path: str) -> Path:
+    """Empty directory to package a video's HLS ladder into"""
+    staging = HLS_DIR / f"{_asset_stem(Path(video_path))}.partial"
+    # Only the job holding the video's lease writes here, so leftovers are from a crashed attempt
+    shutil.rmtree(staging, ignore_errors=True)
+    staging.mkdir(parents=True)
+    return staging
+
+def finish_hls_package(staging: Path) -> Path:
+    """Move a packaged ladder to a directory named after the hash of all its files.
+
+    Every playlist and segment inside is then immutable. Playlists also get
+    precompressed sidecars. Returns the final directory.
+    """
+    digest = hashlib.sha256()
+    files = sorted(path for path in staging.rglob("*") if path.is_file())
+    for path in files:
+        digest.update(str(path.relative_to(staging)).encode() + b"\0")
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(UPLOAD_CHUNK_SIZE), b""):
+                digest.update(chunk)
+    for path in files:
+        if path.suffix == ".m3u8":
+            write_sidecars(path)
+
+    target = HLS_DIR / hashed_filename(staging.name.split(".")[0], digest.hexdigest(), "")
+    if target.exists():
+        # An identical package is already published
+        shutil.rmtree(staging)
+    else:
+        os.rename(staging, target)
+    return target
 
 async def delete_file(file_path: str) -> bool:
-    """Delete uploaded file"""
+    """Delete uploaded file, from the storage backend as well as the working copy"""
+    deleted = False
     try:
         if os.path.exists(file_path):
             os.remove(file_path)
-            return True
-        return False
+            deleted = True
     except Exception:
-        return False
+        pass
+    if storage.remote and Path(file_path).is_relative_to(UPLOAD_DIR):
+        try:
+            await storage.delete(storage_key(file_path))
+            deleted = True
+        except Exception:
+            pass
+    return deleted
+
+async def delete_tree(directory: str):
+    """Delete a directory of generated files, such as an HLS package"""
+    await asyncio.to_thread(shutil.rmtree, directory, True)
+    if storage.remote:
+        await storage.delete_prefix(storage_key(directory))
+
+def storage_key(file_path: str) -> str:
+    """Key of a file in the storage backend: its path inside UPLOAD_DIR"""
+    return Path(file_path).relative_to(UPLOAD_DIR).as_posix()
 
 def get_file_url(file_path: str) -> str:
     """Convert file path to URL"""
-    # Convert absolute path to relative URL
-    relative_path = str(Path(file_path).relative_to(UPLOAD_DIR))
-    return f"/api/uploads/{relative_path}"
+    return storage.url(storage_key(file_path))
+
+def url_to_path(url: str) -> str:
+    """Working-copy path of an uploaded file's URL; other URLs are returned unchanged"""
+    key = storage.key_for_url(url)
+    return url if key is None else str(UPLOAD_DIR / key)
+
+def cache_control_for(file_path: str) -> str:
+    return IMMUTABLE_CACHE_CONTROL if content_hash_from_path(Path(file_path)) else REVALIDATE_CACHE_CONTROL
+
+async def publish_file(file_path: str):
+    """Copy a new or rewritten working-copy file to the storage backend"""
+    await storage.publish(storage_key(file_path), cache_control_for(file_path))
+
+async def publish_files(file_paths: Iterable[str]):
+    slots = asyncio.Semaphore(PUBLISH_CONCURRENCY)
+
+    async def publish(file_path: str):
+        async with slots:
+            await publish_file(file_path)
+
+    await asyncio.gather(*(publish(file_path) for file_path in file_paths))
+
+async def publish_tree(directory: Path):
+    """Publish every file of a package; precompressed sidecars are only served locally"""
+    sidecars = tuple(SIDECAR_SUFFIXES.values())
+    files = await asyncio.to_thread(lambda: [path for path in directory.rglob("*") if path.is_file()])
+    await publish_files(str(path) for path in files if not path.name.endswith(sidecars))
+
+async def ensure_local(file_path: str) -> str:
+    """Make sure this node has a working copy of an uploaded file, fetching it if needed"""
+    await storage.fetch(storage_key(file_path))
+    return file_path
+
+async def move_file(source: Path, destination: Path):
+    """Rename an uploaded file in the working copy and the storage backend"""
+    await asyncio.to_thread(os.replace, source, destination)
+    await storage.move(storage_key(str(source)), storage_key(str(destination)), cache_control_for(str(destination)))
 
 def get_file_info(file_path: str) -> dict:
     """Get file information"""
@@ -10,6 +10,8 @@ from motor.motor_asyncio import AsyncIOMotorClient
 from dotenv import load_dotenv
 from pathlib import Path
 
+from cache import response_cache
+
 load_dotenv()
 
 # MongoDB connection
@@ -48,6 +50,8 @@ async def check_and_fix_images():
     # Remove broken images from database
     for broken_image in broken_images:
         await db.portfolio_images.delete_one({"_id": broken_image["_id"]})
+    if broken_images:
+        await response_cache.bump(db.portfolio_images.name)
     
     print(f"🧹 Cleaned up {len(broken_images)} broken images from database")
     
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Rewrite stored upload URLs to their content-hashed form
+
+    python hash_asset_urls.py            # rewrite image, thumbnail, rendition and video URLs
+    python hash_asset_urls.py --dry-run  # only report what would change
+
+Each legacy file gets a hard link named <stem>.<sha256 prefix><ext>, which is
+served with immutable caching. The legacy name is left in place so URLs
+already held by browsers or other documents keep working. Running API
+processes drop their cached listings within RESPONSE_CACHE_VERSION_TTL.
+"""
+
+import argparse
+import asyncio
+import hashlib
+import os
+import shutil
+from pathlib import Path
+from typing import Dict, Optional
+
+from cache import response_cache
+from database import portfolio_images_collection, videos_collection
+from file_upload import UPLOAD_DIR, UPLOAD_CHUNK_SIZE, content_hash_from_name, get_file_url, hashed_filename
+
+URL_PREFIX = "/api/uploads/"
+
+# Top-level URL fields rewritten in each collection
+URL_FIELDS = {
+    portfolio_images_collection: ("image_url", "thumbnail_url"),
+    videos_collection: ("video_url", "thumbnail_url"),
+}
+
+
+def file_sha256(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(UPLOAD_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def hashed_url(url: str, linked: Dict[Path, Path], dry_run: bool) -> Optional[str]:
+    """Hashed URL for a legacy upload URL, or None if it is not one"""
+    if not url or not url.startswith(URL_PREFIX):
+        return None
+    path = UPLOAD_DIR / url[len(URL_PREFIX):]
+    if content_hash_from_name(path.name) or not path.is_file():
+        return None
+
+    if path not in linked:
+        target = path.with_name(hashed_filename(path.stem, file_sha256(path), path.suffix))
+        if not dry_run and not target.exists():
+            try:
+                os.link(path, target)
+            except OSError:
+                shutil.copy2(path, target)
+        linked[path] = target
+    return get_file_url(str(linked[path]))
+
+
+async def rewrite(dry_run: bool):
+    linked: Dict[Path, Path] = {}
+    updated = 0
+    for collection, fields in URL_FIELDS.items():
+        print(f"\n📂 {collection.name}")
+        changed = updated
+        async for doc in collection.find():
+            changes = {}
+            for field in fields:
+                new_url = hashed_url(doc.get(field, ""), linked, dry_run)
+                if new_url:
+                    changes[field] = new_url
+
+            renditions = doc.get("renditions", [])
+            rewritten = [{**r, "url": hashed_url(r["url"], linked, dry_run) or r["url"]} for r in renditions]
+            if rewritten != renditions:
+                changes["renditions"] = rewritten
+
+            if not changes:
+                continue
+            updated += 1
+            print(f"   {'🔎' if dry_run else '✅'} {doc.get('title', doc['_id'])}: {', '.join(changes)}")
+            if not dry_run:
+                await collection.update_one({"_id": doc["_id"]}, {"$set": changes})
+        if updated > changed and not dry_run:
+            await response_cache.bump(collection.name)
+
+    verb = "Would update" if dry_run else "Updated"
+    print(f"\n🎉 {verb} {updated} documents ({len(linked)} files hashed)")
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--dry-run", action="store_true")
+    args = parser.parse_args()
+    await rewrite(args.dry_run)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
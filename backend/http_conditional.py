@@ -0,0 +1,45 @@
+from email.utils import formatdate, parsedate_to_datetime
+from typing import Mapping, Optional
+
+# Hashed names never change content; legacy names must be revalidated
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+REVALIDATE_CACHE_CONTROL = "public, no-cache"
+
+
+def http_date(timestamp: float) -> str:
+    """Format a POSIX timestamp as an HTTP-date"""
+    return formatdate(timestamp, usegmt=True)
+
+
+def _strip_weak(tag: str) -> str:
+    tag = tag.strip()
+    return tag[2:] if tag.startswith("W/") else tag
+
+
+def etag_matches(header: Optional[str], etag: str) -> bool:
+    """Weak comparison of an If-None-Match header against an ETag"""
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    return _strip_weak(etag) in {_strip_weak(tag) for tag in header.split(",")}
+
+
+def not_modified(headers: Mapping[str, str], etag: str, last_modified: Optional[float] = None) -> bool:
+    """Decide whether a GET can be answered with 304 Not Modified.
+
+    If-None-Match takes precedence; If-Modified-Since is only consulted when
+    the client sent no entity tags (RFC 9110 section 13.2.2).
+    """
+    if_none_match = headers.get("if-none-match")
+    if if_none_match is not None:
+        return etag_matches(if_none_match, etag)
+
+    if_modified_since = headers.get("if-modified-since")
+    if if_modified_since and last_modified is not None:
+        try:
+            since = parsedate_to_datetime(if_modified_since).timestamp()
+        except (TypeError, ValueError):
+            return False
+        return int(last_modified) <= since
+    return False
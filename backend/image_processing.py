@@ -0,0 +1,100 @@
+import asyncio
+import logging
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Optional, Tuple
+
+from fastapi import HTTPException
+
+logger = logging.getLogger(__name__)
+
+# Worker processes for Pillow work; defaults to one per core
+IMAGE_WORKERS = int(os.environ.get("IMAGE_WORKERS", "0")) or os.cpu_count() or 1
+# Jobs allowed to be queued or running before new uploads are turned away
+IMAGE_QUEUE_DEPTH = int(os.environ.get("IMAGE_QUEUE_DEPTH", "0")) or IMAGE_WORKERS * 4
+
+_executor: Optional[ProcessPoolExecutor] = None
+_pending = 0
+
+metrics = {
+    "submitted": 0,
+    "completed": 0,
+    "failed": 0,
+    "rejected": 0,
+    "queue_seconds_total": 0.0,
+    "run_seconds_total": 0.0,
+    "run_seconds_max": 0.0,
+}
+
+
+def _get_executor() -> ProcessPoolExecutor:
+    global _executor
+    if _executor is None:
+        # Spawned workers avoid forking the event loop and driver threads
+        _executor = ProcessPoolExecutor(
+            max_workers=IMAGE_WORKERS,
+            mp_context=multiprocessing.get_context("spawn")
+        )
+    return _executor
+
+
+def _timed(fn: Callable, args: tuple) -> Tuple[Any, float]:
+    """Run fn in the worker and report how long it took there"""
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - start
+
+
+async def run_image_job(fn: Callable, *args) -> Any:
+    """Run a picklable CPU-bound function in the image process pool.
+
+    Raises 503 when IMAGE_QUEUE_DEPTH jobs are already queued or running, so
+    a burst of uploads cannot build an unbounded backlog.
+    """
+    global _pending
+    if _pending >= IMAGE_QUEUE_DEPTH:
+        metrics["rejected"] += 1
+        raise HTTPException(status_code=503, detail="Image processing queue is full, please retry shortly")
+
+    _pending += 1
+    metrics["submitted"] += 1
+    submitted_at = time.perf_counter()
+    try:
+        loop = asyncio.get_running_loop()
+        result, run_seconds = await loop.run_in_executor(_get_executor(), _timed, fn, args)
+    except Exception:
+        metrics["failed"] += 1
+        raise
+    finally:
+        _pending -= 1
+
+    total_seconds = time.perf_counter() - submitted_at
+    metrics["completed"] += 1
+    metrics["run_seconds_total"] += run_seconds
+    metrics["run_seconds_max"] = max(metrics["run_seconds_max"], run_seconds)
+    metrics["queue_seconds_total"] += max(0.0, total_seconds - run_seconds)
+    logger.debug(f"{fn.__name__} ran in {run_seconds:.3f}s after {total_seconds - run_seconds:.3f}s queued")
+    return result
+
+
+def processing_stats() -> dict:
+    """Pool configuration, occupancy and per-job timing"""
+    completed = metrics["completed"]
+    return {
+        "workers": IMAGE_WORKERS,
+        "queue_depth": IMAGE_QUEUE_DEPTH,
+        "pending": _pending,
+        **metrics,
+        "run_seconds_avg": metrics["run_seconds_total"] / completed if completed else 0.0,
+        "queue_seconds_avg": metrics["queue_seconds_total"] / completed if completed else 0.0,
+    }
+
+
+def shutdown_image_pool():
+    """Stop the worker processes"""
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=True, cancel_futures=True)
+        _executor = None
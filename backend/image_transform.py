@@ -0,0 +1,197 @@
+import asyncio
+import hashlib
+import os
+from collections import OrderedDict
+from pathlib import Path
+from typing import NamedTuple, Optional, Set, Tuple
+
+from fastapi import HTTPException, Request
+from fastapi.responses import Response
+
+from file_serving import RangeFileResponse
+from file_upload import ENABLE_AVIF, RENDITION_EXTENSIONS, RENDITION_QUALITY, ensure_local, transform_image
+from image_processing import run_image_job
+from singleflight import SingleFlight
+
+# Rendered variants live outside the uploads tree so they are only reachable through /api/img
+TRANSFORM_CACHE_DIR = Path(os.environ.get("TRANSFORM_CACHE_DIR", "/app/backend/transform_cache"))
+TRANSFORM_CACHE_MAX_BYTES = int(os.environ.get("TRANSFORM_CACHE_MAX_MB", "1024")) * 1024 * 1024
+
+# Boxes (WIDTHxHEIGHT, height 0 keeps the aspect ratio) the endpoint renders.
+# Anything else is refused, so arbitrary sizes cannot be used to fill the cache.
+TRANSFORM_PRESETS: Set[Tuple[int, int]] = {
+    tuple(int(part) for part in preset.split("x")) for preset in os.environ.get(
+        "IMAGE_TRANSFORM_PRESETS",
+        # Responsive widths, 16:9 and 21:9 heroes, 4:5 covers and A4/A3 print previews at 150 dpi
+        "320x0,640x0,960x0,1280x0,1920x0,2560x0,"
+        "1280x720,1920x1080,2560x1440,1920x823,2560x1097,"
+        "400x500,800x1000,1200x1500,"
+        "1240x1754,1754x2480"
+    ).split(",") if preset.strip()
+}
+TRANSFORM_FITS = ("cover", "contain", "inside")
+TRANSFORM_FORMATS = ("avif", "webp", "jpeg") if ENABLE_AVIF else ("webp", "jpeg")
+TRANSFORM_QUALITIES = {50, 60, 70, 80, 90}
+MEDIA_TYPES = {"avif": "image/avif", "webp": "image/webp", "jpeg": "image/jpeg"}
+
+# The same id can point at a different original after an edit, so variants are revalidated daily
+TRANSFORM_CACHE_CONTROL = "public, max-age=86400"
+
+
+class Transform(NamedTuple):
+    width: int
+    height: int
+    fit: str
+    fmt: str
+    quality: int
+
+
+def parse_transform(
+    w: int, h: int, fit: str, fmt: Optional[str], q: Optional[int], accept: Optional[str]
+) -> Tuple[Transform, bool]:
+    """Validate query parameters against the allowlists.
+
+    Without fmt the best format the Accept header allows is chosen; the
+    second value says whether the response therefore varies on Accept.
+    """
+    if (w, h) not in TRANSFORM_PRESETS:
+        raise HTTPException(status_code=400, detail=f"Unsupported size {w}x{h}")
+    if fit not in TRANSFORM_FITS:
+        raise HTTPException(status_code=400, detail=f"fit must be one of: {', '.join(TRANSFORM_FITS)}")
+    negotiated = fmt is None
+    if negotiated:
+        accept = accept or ""
+        fmt = next((name for name in TRANSFORM_FORMATS[:-1] if MEDIA_TYPES[name] in accept), "jpeg")
+    elif fmt not in TRANSFORM_FORMATS:
+        raise HTTPException(status_code=400, detail=f"fmt must be one of: {', '.join(TRANSFORM_FORMATS)}")
+    if q is not None and q not in TRANSFORM_QUALITIES:
+        qualities = ", ".join(str(quality) for quality in sorted(TRANSFORM_QUALITIES))
+        raise HTTPException(status_code=400, detail=f"q must be one of: {qualities}")
+    return Transform(w, h, fit, fmt, q or RENDITION_QUALITY[fmt]), negotiated
+
+
+class TransformCache:
+    """Size-bounded LRU of rendered variants on disk.
+
+    Recency is kept in memory; a restarted process starts from the files'
+    write order. Files written by other processes are adopted when first
+    looked up.
+    """
+
+    def __init__(self, directory: Path, max_bytes: int):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._entries: Optional["OrderedDict[Path, int]"] = None
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _scan(self) -> "OrderedDict[Path, int]":
+        self.directory.mkdir(parents=True, exist_ok=True)
+        files = []
+        for path in self.directory.rglob("*"):
+            if path.name.endswith(".tmp"):
+                # Left behind by a render that crashed mid-write
+                path.unlink(missing_ok=True)
+            elif path.is_file():
+                stat = path.stat()
+                files.append((stat.st_mtime, path, stat.st_size))
+        return OrderedDict((path, size) for _, path, size in sorted(files))
+
+    async def _index(self) -> "OrderedDict[Path, int]":
+        if self._entries is None:
+            entries = await asyncio.to_thread(self._scan)
+            if self._entries is None:
+                self._entries = entries
+                self.total_bytes = sum(entries.values())
+        return self._entries
+
+    async def get(self, path: Path) -> bool:
+        """Whether a variant is cached, marking it most recently used"""
+        entries = await self._index()
+        try:
+            size = path.stat().st_size
+        except FileNotFoundError:
+            if path in entries:
+                # Evicted by another process
+                self.total_bytes -= entries.pop(path)
+            self.misses += 1
+            return False
+        if path in entries:
+            entries.move_to_end(path)
+        else:
+            await self.put(path, size)
+        self.hits += 1
+        return True
+
+    async def put(self, path: Path, size: int):
+        """Record a newly written variant and evict least recently used ones past the budget"""
+        entries = await self._index()
+        self.total_bytes += size - entries.pop(path, 0)
+        entries[path] = size
+        while self.total_bytes > self.max_bytes and len(entries) > 1:
+            oldest, oldest_size = entries.popitem(last=False)
+            self.total_bytes -= oldest_size
+            self.evictions += 1
+            oldest.unlink(missing_ok=True)
+
+    def stats(self) -> dict:
+        return {
+            "entries": len(self._entries or ()),
+            "bytes": self.total_bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions
+        }
+
+
+transform_cache = TransformCache(TRANSFORM_CACHE_DIR, TRANSFORM_CACHE_MAX_BYTES)
+
+# Concurrent requests for one variant share a single render
+_renders = SingleFlight()
+
+
+def variant_key(content_hash: str, transform: Transform) -> str:
+    return f"{content_hash[:16]}_{transform.width}x{transform.height}_{transform.fit}_q{transform.quality}"
+
+
+async def _render(source: str, destination: Path, transform: Transform) -> None:
+    if destination.exists():
+        # Rendered by a flight that finished after this request missed the cache
+        return
+    destination.parent.mkdir(parents=True, exist_ok=True)
+    # With remote storage the original may first have to be fetched to this node
+    await ensure_local(source)
+    size = await run_image_job(transform_image, source, str(destination), *transform)
+    await transform_cache.put(destination, size)
+
+
+async def serve_transform(
+    request: Request, source: str, content_hash: Optional[str], transform: Transform, negotiated: bool
+) -> Response:
+    """Serve a rendered variant of an original, rendering it on a cache miss"""
+    if not content_hash:
+        # Legacy documents carry no hash; the file's identity stands in for one
+        try:
+            stat = os.stat(source)
+        except OSError:
+            raise HTTPException(status_code=404, detail="Original image not found")
+        content_hash = hashlib.sha256(f"{source}:{stat.st_mtime_ns}:{stat.st_size}".encode()).hexdigest()
+    key = variant_key(content_hash, transform)
+    destination = TRANSFORM_CACHE_DIR / content_hash[:2] / f"{key}{RENDITION_EXTENSIONS[transform.fmt]}"
+
+    if not await transform_cache.get(destination):
+        try:
+            await _renders.do(destination, lambda: _render(source, destination, transform))
+        except FileNotFoundError as e:
+            raise HTTPException(status_code=404, detail="Original image not found") from e
+        except (OSError, ValueError) as e:
+            raise HTTPException(status_code=422, detail="Original image cannot be decoded") from e
+
+    headers = {"Cache-Control": TRANSFORM_CACHE_CONTROL}
+    if negotiated:
+        headers["Vary"] = "Accept"
+    etag = f'"{key}-{transform.fmt}"'
+    return RangeFileResponse(destination, request, MEDIA_TYPES[transform.fmt], headers, etag)
@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""
+Declarative MongoDB index registry for the portfolio collections
+
+    python indexes.py ensure   # create missing indexes (also runs at API startup)
+    python indexes.py report   # show missing/unused indexes and query plans
+"""
+
+import argparse
+import asyncio
+import logging
+from typing import Dict, List, Optional, Tuple
+
+from pymongo import ASCENDING, DESCENDING, IndexModel
+from pymongo.errors import OperationFailure
+
+from database import (
+    db, skills_collection, experience_collection, projects_collection,
+    portfolio_images_collection, videos_collection, awards_collection, upload_sessions_collection,
+    direct_uploads_collection, jobs_collection
+)
+from job_queue import JOB_RETENTION_SECONDS
+from pagination import PAGE_SORT
+
+logger = logging.getLogger(__name__)
+
+
+def _order_index() -> IndexModel:
+    return IndexModel([("order", ASCENDING), ("_id", ASCENDING)], name="order_id")
+
+
+def _category_order_index() -> IndexModel:
+    return IndexModel(
+        [("category", ASCENDING), ("order", ASCENDING), ("_id", ASCENDING)],
+        name="category_order_id"
+    )
+
+
+def _gallery_grid_index() -> IndexModel:
+    # Covers the grid view: find({"category": ...}, fields=_id,title,thumbnail_url,order)
+    return IndexModel(
+        [("category", ASCENDING), ("order", ASCENDING), ("_id", ASCENDING),
+         ("title", ASCENDING), ("thumbnail_url", ASCENDING)],
+        name="category_order_id_grid"
+    )
+
+
+def _featured_index() -> IndexModel:
+    return IndexModel(
+        [("featured", ASCENDING), ("order", ASCENDING)],
+        name="featured_order",
+        partialFilterExpression={"featured": True}
+    )
+
+
+# Indexes every collection should have, keyed by collection name
+INDEXES: Dict[str, List[IndexModel]] = {
+    portfolio_images_collection.name: [_gallery_grid_index(), _order_index(), _featured_index()],
+    videos_collection.name: [_category_order_index(), _order_index(), _featured_index()],
+    projects_collection.name: [_order_index(), _featured_index()],
+    skills_collection.name: [_order_index()],
+    experience_collection.name: [_order_index()],
+    awards_collection.name: [_order_index()],
+    # Serves the abandoned-session sweep
+    upload_sessions_collection.name: [IndexModel([("expires_at", ASCENDING)], name="expires_at")],
+    direct_uploads_collection.name: [
+        IndexModel([("expires_at", ASCENDING)], name="expires_at"),
+        # Presigned PUTs to the local backend look their session up by key
+        IndexModel([("key", ASCENDING)], name="key"),
+    ],
+    jobs_collection.name: [
+        # Claim order: runnable queued jobs by priority, then due time
+        IndexModel([("status", ASCENDING), ("priority", DESCENDING), ("run_at", ASCENDING)], name="status_priority_run_at"),
+        # Expired lease sweep
+        IndexModel([("status", ASCENDING), ("lease_expires_at", ASCENDING)], name="status_lease_expires_at"),
+        # Finished jobs are removed after the retention window
+        IndexModel([("finished_at", ASCENDING)], name="finished_at_ttl", expireAfterSeconds=JOB_RETENTION_SECONDS),
+    ],
+}
+
+# Grid view projection, answerable from the grid index alone
+GRID_PROJECTION = {"_id": 1, "title": 1, "thumbnail_url": 1, "order": 1}
+
+# Representative (filter, sort, projection) shapes issued by the API, used by the report
+QUERY_SHAPES: Dict[str, List[Tuple[dict, list, Optional[dict]]]] = {
+    portfolio_images_collection.name: [
+        ({"category": "fashion"}, PAGE_SORT, None),
+        ({"category": "fashion"}, PAGE_SORT, GRID_PROJECTION),
+        ({}, PAGE_SORT, None)
+    ],
+    videos_collection.name: [({"category": "tv-show"}, PAGE_SORT, None), ({}, PAGE_SORT, None)],
+    projects_collection.name: [
+        ({}, [("order", ASCENDING)], None),
+        ({"featured": True}, [("order", ASCENDING)], None)
+    ],
+    skills_collection.name: [({}, [("order", ASCENDING)], None)],
+    experience_collection.name: [({}, [("order", ASCENDING)], None)],
+    awards_collection.name: [({}, [("order", ASCENDING)], None)],
+}
+
+
+async def ensure_indexes() -> Dict[str, List[str]]:
+    """Create every registered index; existing identical indexes are left alone"""
+    created = {}
+    for name, models in INDEXES.items():
+        try:
+            created[name] = await db[name].create_indexes(models)
+        except OperationFailure as e:
+            # An index with the same name but a different spec needs a manual migration
+            logger.warning(f"Could not ensure indexes on {name}: {e}")
+    return created
+
+
+def _plan_stages(plan: dict) -> List[str]:
+    """Flatten the stage names of an explain plan tree"""
+    stages = [plan.get("stage", "?")]
+    if "inputStage" in plan:
+        stages += _plan_stages(plan["inputStage"])
+    for child in plan.get("inputStages", []):
+        stages += _plan_stages(child)
+    return stages
+
+
+async def report():
+    """Print missing, unregistered and unused indexes and the plan of each query shape"""
+    for name, models in INDEXES.items():
+        collection = db[name]
+        print(f"\n📂 {name}")
+
+        existing = await collection.index_information()
+        expected = {model.document["name"] for model in models}
+        for index_name in sorted(expected - set(existing)):
+            print(f"   ❌ missing: {index_name}")
+        for index_name in sorted(set(existing) - expected - {"_id_"}):
+            print(f"   ⚠️  not in registry: {index_name}")
+
+        try:
+            stats = await collection.aggregate([{"$indexStats": {}}]).to_list(None)
+        except OperationFailure as e:
+            print(f"   ⚠️  $indexStats unavailable: {e}")
+            stats = []
+        for stat in stats:
+            ops = stat["accesses"]["ops"]
+            marker = "💤 unused" if ops == 0 else "✅ used"
+            print(f"   {marker}: {stat['name']} ({ops} ops since {stat['accesses']['since']})")
+
+        for query, sort, projection in QUERY_SHAPES.get(name, []):
+            explain = await collection.find(query, projection).sort(sort).explain()
+            stages = _plan_stages(explain["queryPlanner"]["winningPlan"])
+            marker = "❌" if "COLLSCAN" in stages or "SORT" in stages else "✅"
+            covered = " (covered)" if projection and "FETCH" not in stages else ""
+            print(f"   {marker} plan for find({query}, {projection}).sort({sort}): {' <- '.join(stages)}{covered}")
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("command", choices=["ensure", "report"])
+    args = parser.parse_args()
+
+    if args.command == "ensure":
+        created = await ensure_indexes()
+        for name, index_names in created.items():
+            print(f"✅ {name}: {', '.join(index_names)}")
+    else:
+        await report()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
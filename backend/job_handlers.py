@@ -0,0 +1,198 @@
+import asyncio
+import os
+from datetime import datetime
+from pathlib import Path
+from typing import Optional, Tuple
+
+from bson import ObjectId
+
+from cache import response_cache
+from database import portfolio_images_collection, videos_collection
+from file_upload import (
+    create_image_derivatives, delete_file, delete_tree, ensure_local, get_file_url, publish_file, publish_files,
+    publish_tree, rehashed_path, url_to_path
+)
+from job_queue import enqueue, job_handler
+from mp4_metadata import faststart, probe
+from video_processing import HLS_PACKAGING, create_video_previews, ffmpeg_available, package_hls, probe_video
+
+# Derivatives for a fresh upload go ahead of maintenance work
+IMAGE_DERIVATIVES_PRIORITY = 10
+VIDEO_METADATA_PRIORITY = 5
+VIDEO_PREVIEWS_PRIORITY = 5
+# Transcoding is the heaviest job, so everything else goes first
+VIDEO_HLS_PRIORITY = 0
+
+# Width of the JPEG poster used as a video's thumbnail_url
+POSTER_THUMBNAIL_WIDTH = 640
+
+# Relocate moov to the front of uploaded MP4/MOV files so playback starts immediately
+VIDEO_FASTSTART = os.environ.get("VIDEO_FASTSTART", "true").lower() in ("1", "true", "yes")
+
+
+@job_handler("image.derivatives")
+async def image_derivatives(payload: dict) -> Optional[dict]:
+    """Create the thumbnail and renditions of an uploaded image"""
+    image = await portfolio_images_collection.find_one({"_id": ObjectId(payload["image_id"])})
+    if not image:
+        return {"skipped": "image deleted"}
+
+    files = await create_image_derivatives(url_to_path(image["image_url"]), image["sha256"])
+    await portfolio_images_collection.update_one(
+        {"_id": image["_id"]},
+        {"$set": {
+            "image_url": get_file_url(files["image_path"]),
+            "thumbnail_url": get_file_url(files["thumbnail_path"]),
+            "renditions": files["renditions"],
+            "updated_at": datetime.utcnow()
+        }}
+    )
+    await response_cache.bump(portfolio_images_collection.name)
+    return {"renditions": len(files["renditions"])}
+
+
+def _probe_video(path: Path) -> Tuple[Optional[dict], Path]:
+    """Read a video's metadata, rewriting it for faststart when needed.
+
+    Returns the metadata and the path now holding the video, which differs
+    from path when the rewritten file got a new content-hashed name.
+    """
+    info = probe(path)
+    if not info or info["faststart"] or not VIDEO_FASTSTART:
+        return info, path
+    temp = path.with_name(path.name + ".faststart")
+    try:
+        digest = faststart(path, temp)
+    except BaseException:
+        temp.unlink(missing_ok=True)
+        raise
+    if digest is None:
+        temp.unlink(missing_ok=True)
+        return info, path
+    target = rehashed_path(path, digest)
+    os.replace(temp, target)
+    info["faststart"] = True
+    info["rewritten"] = True
+    return info, target
+
+
+@job_handler("video.metadata")
+async def video_metadata(payload: dict) -> Optional[dict]:
+    """Fill in duration, dimensions and codecs of an uploaded video and make it faststart"""
+    video = await videos_collection.find_one({"_id": ObjectId(payload["video_id"])})
+    if not video:
+        return {"skipped": "video deleted"}
+
+    path = Path(await ensure_local(url_to_path(video["video_url"])))
+    info, new_path = await asyncio.to_thread(_probe_video, path)
+    if info is None:
+        await _enqueue_followups(payload["video_id"])
+        return {"skipped": "not an MP4/MOV file"}
+    if info.get("rewritten"):
+        await publish_file(str(new_path))
+
+    result = await videos_collection.update_one(
+        {"_id": video["_id"], "video_url": video["video_url"]},
+        {"$set": {
+            "video_url": get_file_url(str(new_path)),
+            "duration": round(info["duration"]),
+            "width": info["width"],
+            "height": info["height"],
+            "video_codec": info["video_codec"],
+            "audio_codec": info["audio_codec"],
+            "updated_at": datetime.utcnow()
+        }}
+    )
+    # The old file goes only once nothing points at it; a lost race keeps the original
+    if new_path != path:
+        await delete_file(str(path if result.matched_count else new_path))
+    await response_cache.bump(videos_collection.name)
+    await _enqueue_followups(payload["video_id"])
+    return {"duration": info["duration"], "relocated_moov": new_path != path}
+
+
+async def _enqueue_followups(video_id: str):
+    # Queued once any faststart rewrite has landed, so ffmpeg reads the final file
+    await enqueue("video.previews", {"video_id": video_id}, priority=VIDEO_PREVIEWS_PRIORITY)
+    if HLS_PACKAGING:
+        await enqueue("video.hls", {"video_id": video_id}, priority=VIDEO_HLS_PRIORITY)
+
+
+def _preview_urls(video: dict) -> set:
+    urls = {poster["url"] for poster in video.get("posters", [])}
+    return urls | {video.get("preview_sprite_url"), video.get("preview_vtt_url")} - {None, ""}
+
+
+@job_handler("video.previews")
+async def video_previews(payload: dict) -> Optional[dict]:
+    """Extract poster frames and a scrub-preview sprite for a video with ffmpeg"""
+    if not ffmpeg_available():
+        return {"skipped": "ffmpeg not installed"}
+    video = await videos_collection.find_one({"_id": ObjectId(payload["video_id"])})
+    if not video:
+        return {"skipped": "video deleted"}
+
+    path = await ensure_local(url_to_path(video["video_url"]))
+    update = {}
+    if not video.get("duration") or not video.get("width"):
+        # Containers other than MP4/MOV are left to ffprobe
+        probed = await probe_video(path)
+        if probed:
+            update = {"duration": round(probed["duration"]), "width": probed["width"], "height": probed["height"]}
+            video = {**video, **probed}
+    previews = await create_video_previews(path, video.get("duration", 0), video.get("width", 0), video.get("height", 0))
+    await publish_files(url_to_path(url) for url in _preview_urls(previews))
+    update.update(previews)
+
+    # A thumbnail set by hand is kept; an empty one or an older poster is replaced
+    old_urls = _preview_urls(video)
+    if not video.get("thumbnail_url") or video["thumbnail_url"] in old_urls:
+        jpeg = [poster for poster in previews["posters"] if poster["format"] == "jpeg"]
+        fitting = [poster for poster in jpeg if poster["width"] <= POSTER_THUMBNAIL_WIDTH]
+        update["thumbnail_url"] = (fitting or jpeg)[-1]["url"]
+
+    result = await videos_collection.update_one(
+        {"_id": video["_id"], "video_url": video["video_url"]},
+        {"$set": {**update, "updated_at": datetime.utcnow()}}
+    )
+    new_urls = _preview_urls(previews)
+    stale = old_urls - new_urls if result.matched_count else new_urls - old_urls
+    for url in stale:
+        await delete_file(url_to_path(url))
+    await response_cache.bump(videos_collection.name)
+    return {"posters": len(previews["posters"]), "sprite": bool(previews["preview_sprite_url"])}
+
+
+@job_handler("video.hls")
+async def video_hls(payload: dict) -> Optional[dict]:
+    """Package a video as an adaptive HLS ladder"""
+    if not ffmpeg_available():
+        return {"skipped": "ffmpeg not installed"}
+    video = await videos_collection.find_one({"_id": ObjectId(payload["video_id"])})
+    if not video:
+        return {"skipped": "video deleted"}
+
+    path = await ensure_local(url_to_path(video["video_url"]))
+    width, height = video.get("width", 0), video.get("height", 0)
+    has_audio = bool(video.get("audio_codec"))
+    if not video.get("video_codec") or not width or not height:
+        # Not parsed as MP4/MOV; without ffprobe the ladder is made from the video alone
+        probed = await probe_video(path)
+        if probed:
+            width, height, has_audio = probed["width"], probed["height"], probed["has_audio"]
+    if not width or not height:
+        # The ladder is capped at the source size; guessing would upscale small videos
+        return {"skipped": "video dimensions unknown"}
+    master, rungs = await package_hls(path, width, height, has_audio)
+    await publish_tree(master.parent)
+
+    result = await videos_collection.update_one(
+        {"_id": video["_id"], "video_url": video["video_url"]},
+        {"$set": {"hls_url": get_file_url(str(master)), "updated_at": datetime.utcnow()}}
+    )
+    old_master = url_to_path(video["hls_url"]) if video.get("hls_url") else None
+    stale = old_master if result.matched_count else str(master)
+    if stale and Path(stale).parent != master.parent:
+        await delete_tree(str(Path(stale).parent))
+    await response_cache.bump(videos_collection.name)
+    return {"rungs": [f"{size}p@{kbps}k" for size, kbps in rungs]}
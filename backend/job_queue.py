@@ -0,0 +1,236 @@
+import asyncio
+import logging
+import os
+import random
+import socket
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable, Dict, Iterable, List, Optional
+
+from bson import ObjectId
+from pymongo import ReturnDocument
+
+from database import jobs_collection
+
+logger = logging.getLogger(__name__)
+
+# A claimed job belongs to its worker until the lease runs out without a heartbeat
+JOB_LEASE_SECONDS = int(os.environ.get("JOB_LEASE_SECONDS", "60"))
+JOB_POLL_INTERVAL = float(os.environ.get("JOB_POLL_INTERVAL", "1.0"))
+JOB_MAX_ATTEMPTS = int(os.environ.get("JOB_MAX_ATTEMPTS", "5"))
+JOB_RETRY_BASE_SECONDS = float(os.environ.get("JOB_RETRY_BASE_SECONDS", "5"))
+JOB_RETRY_MAX_SECONDS = float(os.environ.get("JOB_RETRY_MAX_SECONDS", "900"))
+# Worker loops started inside each API process; 0 leaves the queue to job_worker.py
+JOB_CONCURRENCY = int(os.environ.get("JOB_CONCURRENCY", "2"))
+# Finished jobs are kept this long for the status endpoint
+JOB_RETENTION_SECONDS = int(os.environ.get("JOB_RETENTION_DAYS", "7")) * 86400
+
+JobHandler = Callable[[dict], Awaitable[Optional[dict]]]
+
+JOB_HANDLERS: Dict[str, JobHandler] = {}
+
+_worker_tasks: List[asyncio.Task] = []
+
+
+def job_handler(job_type: str):
+    """Register a coroutine as the handler for a job type"""
+    def register(fn: JobHandler) -> JobHandler:
+        JOB_HANDLERS[job_type] = fn
+        return fn
+    return register
+
+
+async def enqueue(
+    job_type: str,
+    payload: dict,
+    priority: int = 0,
+    max_attempts: int = JOB_MAX_ATTEMPTS,
+    delay: float = 0
+) -> ObjectId:
+    """Add a job to the queue; higher priorities are claimed first"""
+    now = datetime.utcnow()
+    result = await jobs_collection.insert_one(
+        _new_job(job_type, payload, priority, max_attempts, now + timedelta(seconds=delay))
+    )
+    return result.inserted_id
+
+
+def _new_job(job_type: str, payload: dict, priority: int, max_attempts: int, run_at: datetime) -> dict:
+    now = datetime.utcnow()
+    return {
+        "type": job_type,
+        "payload": payload,
+        "priority": priority,
+        "status": "queued",
+        "attempts": 0,
+        "max_attempts": max_attempts,
+        "run_at": run_at,
+        "lease_owner": None,
+        "lease_expires_at": None,
+        "last_error": None,
+        "result": None,
+        "created_at": now,
+        "updated_at": now
+    }
+
+
+async def enqueue_many(job_type: str, payloads: List[dict], priority: int = 0) -> List[ObjectId]:
+    """Add several jobs of one type with a single insert"""
+    if not payloads:
+        return []
+    now = datetime.utcnow()
+    result = await jobs_collection.insert_many(
+        [_new_job(job_type, payload, priority, JOB_MAX_ATTEMPTS, now) for payload in payloads]
+    )
+    return result.inserted_ids
+
+
+async def claim_job(worker_id: str, types: Iterable[str]) -> Optional[dict]:
+    """Atomically lease the most urgent runnable job of the given types"""
+    now = datetime.utcnow()
+    return await jobs_collection.find_one_and_update(
+        {"status": "queued", "run_at": {"$lte": now}, "type": {"$in": list(types)}},
+        {
+            "$set": {
+                "status": "running",
+                "lease_owner": worker_id,
+                "lease_expires_at": now + timedelta(seconds=JOB_LEASE_SECONDS),
+                "updated_at": now
+            },
+            "$inc": {"attempts": 1}
+        },
+        sort=[("priority", -1), ("run_at", 1)],
+        return_document=ReturnDocument.AFTER
+    )
+
+
+async def heartbeat(job: dict, worker_id: str) -> bool:
+    """Extend a lease; False when the job is no longer ours"""
+    result = await jobs_collection.update_one(
+        {"_id": job["_id"], "status": "running", "lease_owner": worker_id},
+        {"$set": {"lease_expires_at": datetime.utcnow() + timedelta(seconds=JOB_LEASE_SECONDS)}}
+    )
+    return result.matched_count == 1
+
+
+async def complete_job(job: dict, worker_id: str, result: Optional[dict]):
+    now = datetime.utcnow()
+    await jobs_collection.update_one(
+        {"_id": job["_id"], "status": "running", "lease_owner": worker_id},
+        {"$set": {
+            "status": "succeeded",
+            "result": result,
+            "lease_owner": None,
+            "lease_expires_at": None,
+            "finished_at": now,
+            "updated_at": now
+        }}
+    )
+
+
+def retry_delay(attempts: int) -> float:
+    """Exponential backoff with jitter after the given number of attempts"""
+    delay = min(JOB_RETRY_MAX_SECONDS, JOB_RETRY_BASE_SECONDS * 2 ** (attempts - 1))
+    return delay * random.uniform(0.5, 1.0)
+
+
+async def fail_job(job: dict, owner: Optional[str], error: str):
+    """Schedule a retry, or mark the job failed once its attempts are used up"""
+    now = datetime.utcnow()
+    if job["attempts"] < job["max_attempts"]:
+        update = {"status": "queued", "run_at": now + timedelta(seconds=retry_delay(job["attempts"]))}
+    else:
+        update = {"status": "failed", "finished_at": now}
+    await jobs_collection.update_one(
+        {"_id": job["_id"], "status": "running", "lease_owner": owner},
+        {"$set": {**update, "last_error": error, "lease_owner": None, "lease_expires_at": None, "updated_at": now}}
+    )
+
+
+async def requeue_expired() -> int:
+    """Treat jobs whose worker stopped heartbeating as failed attempts"""
+    expired = jobs_collection.find({"status": "running", "lease_expires_at": {"$lt": datetime.utcnow()}})
+    count = 0
+    async for job in expired:
+        await fail_job(job, job["lease_owner"], "Lease expired")
+        count += 1
+    return count
+
+
+async def run_job(job: dict, worker_id: str):
+    """Run a claimed job, heartbeating until the handler finishes"""
+    handler = JOB_HANDLERS[job["type"]]
+    task = asyncio.ensure_future(handler(job["payload"]))
+    try:
+        while True:
+            done, _ = await asyncio.wait({task}, timeout=JOB_LEASE_SECONDS / 3)
+            if done:
+                break
+            if not await heartbeat(job, worker_id):
+                logger.warning(f"Lost lease on job {job['_id']}, abandoning it")
+                task.cancel()
+                return
+        result = task.result()
+    except asyncio.CancelledError:
+        task.cancel()
+        raise
+    except Exception as e:
+        logger.warning(f"Job {job['_id']} ({job['type']}) attempt {job['attempts']} failed: {e}")
+        await fail_job(job, worker_id, f"{type(e).__name__}: {e}")
+        return
+    await complete_job(job, worker_id, result)
+
+
+async def worker_loop(worker_id: str, types: Optional[Iterable[str]] = None):
+    """Claim and run jobs until cancelled"""
+    types = list(types or JOB_HANDLERS)
+    while True:
+        try:
+            job = await claim_job(worker_id, types)
+            if job is None:
+                await requeue_expired()
+                await asyncio.sleep(JOB_POLL_INTERVAL)
+                continue
+            await run_job(job, worker_id)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.warning(f"Job worker {worker_id} error: {e}")
+            await asyncio.sleep(JOB_POLL_INTERVAL)
+
+
+def worker_id(index: int) -> str:
+    return f"{socket.gethostname()}:{os.getpid()}:{index}"
+
+
+def start_job_workers(concurrency: int = JOB_CONCURRENCY):
+    """Start draining the queue inside this process"""
+    while len(_worker_tasks) < concurrency:
+        _worker_tasks.append(asyncio.create_task(worker_loop(worker_id(len(_worker_tasks)))))
+
+
+def stop_job_workers():
+    """Cancel in-process workers; their jobs are retried once the leases lapse"""
+    for task in _worker_tasks:
+        task.cancel()
+    _worker_tasks.clear()
+
+
+async def get_job(job_id: ObjectId) -> Optional[dict]:
+    return await jobs_collection.find_one({"_id": job_id})
+
+
+async def job_stats() -> dict:
+    """Job counts by type and status, plus the age of the oldest runnable job"""
+    counts: Dict[str, Dict[str, int]] = {}
+    pipeline = [{"$group": {"_id": {"type": "$type", "status": "$status"}, "count": {"$sum": 1}}}]
+    async for row in jobs_collection.aggregate(pipeline):
+        counts.setdefault(row["_id"]["type"], {})[row["_id"]["status"]] = row["count"]
+    oldest = await jobs_collection.find_one(
+        {"status": "queued", "run_at": {"$lte": datetime.utcnow()}},
+        sort=[("run_at", 1)]
+    )
+    return {
+        "counts": counts,
+        "oldest_queued_seconds": (datetime.utcnow() - oldest["run_at"]).total_seconds() if oldest else 0.0,
+        "workers_in_process": len(_worker_tasks)
+    }
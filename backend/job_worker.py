@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+"""
+Dedicated background job worker
+
+Drains the same Mongo-backed queue as the API processes, so extra capacity
+can be added by starting more of these on any node.
+
+    python job_worker.py                            # all job types, 2 concurrent jobs
+    python job_worker.py --concurrency 4 --types image.derivatives
+"""
+
+import argparse
+import asyncio
+import logging
+
+import job_handlers  # noqa: F401 - registers the handlers
+from image_processing import shutdown_image_pool
+from job_queue import JOB_CONCURRENCY, JOB_HANDLERS, worker_id, worker_loop
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", type=int, default=JOB_CONCURRENCY or 2)
+    parser.add_argument("--types", help="comma-separated job types (default: all)")
+    args = parser.parse_args()
+
+    types = args.types.split(",") if args.types else list(JOB_HANDLERS)
+    unknown = set(types) - set(JOB_HANDLERS)
+    if unknown:
+        parser.error(f"unknown job types: {', '.join(sorted(unknown))}")
+
+    print(f"👷 Running {args.concurrency} workers for: {', '.join(types)}")
+    try:
+        await asyncio.gather(*(worker_loop(worker_id(index), types) for index in range(args.concurrency)))
+    finally:
+        shutdown_image_pool()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        print("👋 Worker stopped")
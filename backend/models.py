@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field, field_validator
-from typing import List, Optional, Any
+from typing import Dict, List, Optional, Any
 from datetime import datetime
 from bson import ObjectId
 
@@ -186,12 +186,24 @@ class Project(ProjectBase):
         json_encoders = {ObjectId: str}
 
 # Portfolio Images Models
+class ImageRendition(BaseModel):
+    url: str
+    width: int
+    height: int
+    format: str  # webp, jpeg, avif
+
 class PortfolioImageBase(BaseModel):
     title: str
     description: str = ""
     category: str  # fashion, covers, stillLife, artPhotoPainting, editorial
     image_url: str
     thumbnail_url: str = ""
+    renditions: List[ImageRendition] = []
+    # Intrinsic size and placeholder, so the gallery can lay out before images load
+    width: int = 0
+    height: int = 0
+    dominant_color: str = ""  # #rrggbb
+    blurhash: str = ""
     order: int = 0
     featured: bool = False
 
@@ -225,6 +237,14 @@ class VideoBase(BaseModel):
     video_url: str
     thumbnail_url: str = ""
     duration: int = 0  # in seconds
+    width: int = 0
+    height: int = 0
+    video_codec: str = ""  # RFC 6381 codec strings, e.g. avc1.640028
+    audio_codec: str = ""
+    posters: List[ImageRendition] = []
+    preview_sprite_url: str = ""  # Scrub-preview tiles, indexed by the WebVTT file
+    preview_vtt_url: str = ""
+    hls_url: str = ""  # Master playlist of the adaptive ladder, when packaged
     order: int = 0
     featured: bool = False
 
@@ -279,13 +299,76 @@ class Award(AwardBase):
         arbitrary_types_allowed = True
         json_encoders = {ObjectId: str}
 
+# Portfolio Bundle Model
+class PortfolioBundle(BaseModel):
+    personal: Optional[PersonalInfo] = None
+    social: Optional[SocialLinks] = None
+    skills: List[Skill] = []
+    experience: List[Experience] = []
+    projects: List[Project] = []
+    images: List[PortfolioImage] = []
+    videos: List[Video] = []
+    awards: List[Award] = []
+
+# Background Job Models
+class Job(BaseModel):
+    id: PyObjectId = Field(default_factory=PyObjectId, alias="_id")
+    type: str
+    status: str  # queued, running, succeeded, failed
+    priority: int = 0
+    attempts: int = 0
+    max_attempts: int
+    run_at: datetime
+    last_error: Optional[str] = None
+    result: Optional[dict] = None
+    created_at: datetime
+    updated_at: datetime
+    finished_at: Optional[datetime] = None
+
+    class Config:
+        populate_by_name = True
+        arbitrary_types_allowed = True
+        json_encoders = {ObjectId: str}
+
 # File Upload Models
 class UploadResponse(BaseModel):
     filename: str
     url: str
     size: int
     content_type: str
+    id: Optional[str] = None  # document created for the upload
+
+class BulkImageMetadata(BaseModel):
+    title: Optional[str] = None  # defaults to the file name
+    description: str = ""
+    category: Optional[str] = None  # defaults to the request's category
+    featured: bool = False
 
 class BulkUploadResponse(BaseModel):
     uploaded_files: List[UploadResponse]
-    failed_files: List[str] = []
\ No newline at end of file
+    failed_files: List[str] = []
+
+class ResumableUploadCreate(BaseModel):
+    filename: str
+    content_type: str
+    size: int = Field(..., gt=0)
+    title: str
+    description: str = ""
+    category: str
+    featured: bool = False
+
+class ResumableUploadStatus(BaseModel):
+    upload_id: str
+    offset: int  # bytes received contiguously from the start
+    size: int
+    expires_at: datetime
+
+class DirectUploadCreate(ResumableUploadCreate):
+    pass
+
+class DirectUploadTicket(BaseModel):
+    upload_id: str
+    url: str  # presigned; the file is sent here as the raw request body
+    method: str = "PUT"
+    headers: Dict[str, str]  # signed along with the URL, so they must be sent as given
+    expires_at: datetime
@@ -0,0 +1,290 @@
+import bisect
+import hashlib
+import os
+import struct
+from pathlib import Path
+from typing import BinaryIO, Callable, Iterator, List, NamedTuple, Optional, Tuple
+
+# moov is parsed in memory; anything larger is not a file we should be rewriting
+MAX_MOOV_SIZE = 64 * 1024 * 1024
+COPY_CHUNK_SIZE = 1024 * 1024
+
+# Boxes descended into when parsing or rewriting moov
+CONTAINER_BOXES = {b"moov", b"trak", b"mdia", b"minf", b"stbl"}
+
+
+class Box(NamedTuple):
+    type: bytes
+    offset: int
+    size: int
+    header_size: int
+
+
+def read_boxes(f: BinaryIO, start: int, end: int) -> Iterator[Box]:
+    """Yield the boxes between start and end, reading only their headers"""
+    position = start
+    while position + 8 <= end:
+        f.seek(position)
+        size, box_type = struct.unpack(">I4s", f.read(8))
+        header_size = 8
+        if size == 1:
+            size = struct.unpack(">Q", f.read(8))[0]
+            header_size = 16
+        elif size == 0:
+            size = end - position
+        if size < header_size or position + size > end:
+            raise ValueError(f"Corrupt {box_type!r} box at {position}")
+        yield Box(box_type, position, size, header_size)
+        position += size
+
+
+def _children(data: bytes) -> Iterator[Tuple[bytes, bytes]]:
+    """Yield (type, payload) for the boxes packed in data"""
+    position = 0
+    while position + 8 <= len(data):
+        size, box_type = struct.unpack_from(">I4s", data, position)
+        header_size = 8
+        if size == 1:
+            size = struct.unpack_from(">Q", data, position + 8)[0]
+            header_size = 16
+        elif size == 0:
+            size = len(data) - position
+        if size < header_size or position + size > len(data):
+            raise ValueError(f"Corrupt {box_type!r} box")
+        yield box_type, data[position + header_size:position + size]
+        position += size
+
+
+def _child(data: bytes, box_type: bytes) -> Optional[bytes]:
+    return next((payload for child_type, payload in _children(data) if child_type == box_type), None)
+
+
+def _timescale_duration(payload: bytes) -> Tuple[int, int]:
+    """Timescale and duration from an mvhd or mdhd payload"""
+    if payload[0] == 1:
+        return struct.unpack_from(">IQ", payload, 20)
+    return struct.unpack_from(">II", payload, 12)
+
+
+def _track_size(tkhd: bytes) -> Tuple[int, int]:
+    """Display width and height of a track, honouring a 90/270 degree matrix"""
+    matrix = 52 if tkhd[0] == 1 else 40
+    a, b, _, c, d = struct.unpack_from(">5i", tkhd, matrix)
+    width, height = (value >> 16 for value in struct.unpack_from(">II", tkhd, matrix + 36))
+    return (height, width) if a == 0 and d == 0 and b and c else (width, height)
+
+
+def _descriptor(data: bytes, position: int) -> Tuple[int, int, int]:
+    """Tag, payload start and payload length of an MPEG-4 descriptor"""
+    tag = data[position]
+    length = 0
+    position += 1
+    for _ in range(4):
+        byte = data[position]
+        position += 1
+        length = (length << 7) | (byte & 0x7F)
+        if not byte & 0x80:
+            break
+    return tag, position, length
+
+
+def _mp4a_codec(esds: bytes) -> str:
+    """RFC 6381 codec string (mp4a.40.2 etc.) from an esds payload"""
+    tag, position, _ = _descriptor(esds, 4)
+    if tag != 0x03:
+        return "mp4a"
+    flags = esds[position + 2]
+    position += 3
+    if flags & 0x80:
+        position += 2
+    if flags & 0x40:
+        position += 1 + esds[position]
+    if flags & 0x20:
+        position += 2
+    tag, position, _ = _descriptor(esds, position)
+    if tag != 0x04:
+        return "mp4a"
+    object_type = esds[position]
+    tag, specific, length = _descriptor(esds, position + 13)
+    if tag == 0x05 and length:
+        return f"mp4a.{object_type:02x}.{esds[specific] >> 3}"
+    return f"mp4a.{object_type:02x}"
+
+
+def _sample_codec(stsd: bytes, handler: bytes) -> Optional[str]:
+    """Codec string of the first sample description in an stsd payload"""
+    entries = list(_children(stsd[8:]))
+    if not entries:
+        return None
+    fourcc, entry = entries[0]
+    codec = fourcc.decode("latin-1").strip()
+    try:
+        if handler == b"vide" and fourcc in (b"avc1", b"avc3"):
+            avcc = _child(entry[78:], b"avcC")
+            if avcc:
+                return f"{codec}.{avcc[1]:02x}{avcc[2]:02x}{avcc[3]:02x}"
+        elif handler == b"soun" and fourcc == b"mp4a":
+            # QuickTime sound descriptions v1/v2 carry extra fields before the child boxes
+            version = struct.unpack_from(">H", entry, 8)[0]
+            esds = _child(entry[28 + {1: 16, 2: 36}.get(version, 0):], b"esds")
+            if esds:
+                return _mp4a_codec(esds)
+    except (IndexError, struct.error, ValueError):
+        pass
+    return codec
+
+
+def _parse_moov(moov: bytes) -> dict:
+    info = {"duration": 0.0, "width": 0, "height": 0, "video_codec": "", "audio_codec": ""}
+    mvhd = _child(moov, b"mvhd")
+    if mvhd:
+        timescale, duration = _timescale_duration(mvhd)
+        info["duration"] = duration / timescale if timescale else 0.0
+
+    for box_type, trak in _children(moov):
+        if box_type != b"trak":
+            continue
+        mdia = _child(trak, b"mdia") or b""
+        hdlr = _child(mdia, b"hdlr")
+        handler = hdlr[8:12] if hdlr else b""
+        mdhd = _child(mdia, b"mdhd")
+        if mdhd and not info["duration"]:
+            # Fragmented files leave mvhd empty; fall back to the longest track
+            timescale, duration = _timescale_duration(mdhd)
+            info["duration"] = max(info["duration"], duration / timescale if timescale else 0.0)
+        stbl = _child(_child(mdia, b"minf") or b"", b"stbl") or b""
+        stsd = _child(stbl, b"stsd")
+        codec = _sample_codec(stsd, handler) if stsd else None
+
+        if handler == b"vide" and not info["video_codec"]:
+            tkhd = _child(trak, b"tkhd")
+            if tkhd:
+                info["width"], info["height"] = _track_size(tkhd)
+            info["video_codec"] = codec or ""
+        elif handler == b"soun" and not info["audio_codec"]:
+            info["audio_codec"] = codec or ""
+    return info
+
+
+def _top_level(f: BinaryIO) -> List[Box]:
+    boxes = list(read_boxes(f, 0, os.fstat(f.fileno()).st_size))
+    if not boxes or boxes[0].type != b"ftyp":
+        raise ValueError("Not an ISO base media file")
+    return boxes
+
+
+def _read_moov(f: BinaryIO, boxes: List[Box]) -> Tuple[Box, bytes]:
+    moov = next((box for box in boxes if box.type == b"moov"), None)
+    if moov is None or moov.size > MAX_MOOV_SIZE:
+        raise ValueError("Missing or oversized moov box")
+    f.seek(moov.offset + moov.header_size)
+    return moov, f.read(moov.size - moov.header_size)
+
+
+def probe(path: Path) -> Optional[dict]:
+    """Duration, dimensions and codecs of an MP4/MOV file, or None if it is not one.
+
+    Only box headers are read while walking the file, so the media data is
+    never touched; the moov box is the only payload loaded.
+    """
+    try:
+        with open(path, "rb") as f:
+            boxes = _top_level(f)
+            moov, payload = _read_moov(f, boxes)
+            f.seek(boxes[0].offset + boxes[0].header_size)
+            brand = f.read(4).decode("latin-1").strip()
+        info = _parse_moov(payload)
+    except (OSError, ValueError, IndexError, struct.error):
+        return None
+    first_mdat = min((box.offset for box in boxes if box.type == b"mdat"), default=None)
+    info["brand"] = brand
+    info["faststart"] = first_mdat is None or moov.offset < first_mdat
+    return info
+
+
+def _box(box_type: bytes, payload: bytes) -> bytes:
+    return struct.pack(">I4s", 8 + len(payload), box_type) + payload
+
+
+def _rewrite(box_type: bytes, payload: bytes, relocate: Callable[[int], int], co64: bool) -> bytes:
+    """Rebuild a container with its chunk offsets relocated, optionally widened to co64"""
+    parts = []
+    for child_type, child in _children(payload):
+        if child_type in CONTAINER_BOXES:
+            parts.append(_rewrite(child_type, child, relocate, co64))
+        elif child_type in (b"stco", b"co64"):
+            count = struct.unpack_from(">I", child, 4)[0]
+            width = "I" if child_type == b"stco" else "Q"
+            offsets = [relocate(offset) for offset in struct.unpack_from(f">{count}{width}", child, 8)]
+            if co64:
+                parts.append(_box(b"co64", child[:8] + struct.pack(f">{count}Q", *offsets)))
+            else:
+                parts.append(_box(child_type, child[:8] + struct.pack(f">{count}{width}", *offsets)))
+        else:
+            parts.append(_box(child_type, child))
+    return _box(box_type, b"".join(parts))
+
+
+def faststart(source: Path, destination: Path) -> Optional[str]:
+    """Copy source to destination with moov ahead of the media data.
+
+    Chunk offsets are relocated (widening stco to co64 when they would
+    overflow) and the media data is streamed in fixed-size chunks, so memory
+    use is bounded by the moov size. Returns the SHA-256 of the written file,
+    or None when the file already starts playback from the front.
+    """
+    with open(source, "rb") as f:
+        boxes = _top_level(f)
+        moov, payload = _read_moov(f, boxes)
+        mdats = [box for box in boxes if box.type == b"mdat"]
+        if not mdats or moov.offset < mdats[0].offset:
+            return None
+
+        others = [box for box in boxes if box is not moov]
+        insert_at = others.index(mdats[0])
+        starts = [box.offset for box in others]
+
+        def layout(moov_size: int) -> List[int]:
+            positions, position = [], 0
+            for index, box in enumerate(others):
+                if index == insert_at:
+                    position += moov_size
+                positions.append(position)
+                position += box.size
+            return positions
+
+        def relocator(positions: List[int]) -> Callable[[int], int]:
+            def relocate(offset: int) -> int:
+                index = bisect.bisect_right(starts, offset) - 1
+                return positions[index] + offset - others[index].offset
+            return relocate
+
+        co64 = False
+        new_moov = _rewrite(b"moov", payload, lambda offset: offset, co64)
+        positions = layout(len(new_moov))
+        try:
+            new_moov = _rewrite(b"moov", payload, relocator(positions), co64)
+        except struct.error:
+            # An offset no longer fits in 32 bits; co64 grows moov, so lay out again
+            co64 = True
+            positions = layout(len(_rewrite(b"moov", payload, lambda offset: offset, co64)))
+            new_moov = _rewrite(b"moov", payload, relocator(positions), co64)
+
+        digest = hashlib.sha256()
+        with open(destination, "wb") as out:
+            for index, box in enumerate(others):
+                if index == insert_at:
+                    out.write(new_moov)
+                    digest.update(new_moov)
+                f.seek(box.offset)
+                remaining = box.size
+                while remaining:
+                    chunk = f.read(min(COPY_CHUNK_SIZE, remaining))
+                    if not chunk:
+                        raise ValueError("Unexpected end of file")
+                    out.write(chunk)
+                    digest.update(chunk)
+                    remaining -= len(chunk)
+            out.flush()
+            os.fsync(out.fileno())
+    return digest.hexdigest()
@@ -0,0 +1,61 @@
+import base64
+import json
+from typing import List, Optional, Tuple
+
+from bson import ObjectId
+from fastapi import HTTPException
+
+DEFAULT_PAGE_SIZE = 1000
+MAX_PAGE_SIZE = 1000
+
+# Keyset order for paginated collections; _id breaks ties between equal orders
+PAGE_SORT = [("order", 1), ("_id", 1)]
+
+
+def encode_cursor(doc: dict) -> str:
+    """Build an opaque cursor pointing just past doc"""
+    raw = json.dumps([doc.get("order", 0), str(doc["_id"])], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[int, ObjectId]:
+    """Decode a cursor produced by encode_cursor"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        order, object_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if not isinstance(order, int) or not ObjectId.is_valid(object_id):
+            raise ValueError(cursor)
+        return order, ObjectId(object_id)
+    except (ValueError, TypeError, json.JSONDecodeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def keyset_query(query: dict, cursor: Optional[str]) -> dict:
+    """Restrict query to documents strictly after the cursor position"""
+    if not cursor:
+        return query
+    order, object_id = decode_cursor(cursor)
+    after = {"$or": [
+        {"order": {"$gt": order}},
+        {"order": order, "_id": {"$gt": object_id}}
+    ]}
+    return {"$and": [query, after]} if query else after
+
+
+async def find_page(
+    collection,
+    query: dict,
+    limit: int,
+    cursor: Optional[str] = None,
+    projection: Optional[dict] = None
+) -> Tuple[List[dict], Optional[str]]:
+    """Fetch one page in (order, _id) order plus the cursor for the next page"""
+    if projection is not None:
+        # The next cursor is built from the sort keys, so they are always fetched
+        projection = {**projection, "order": 1}
+    documents = collection.find(keyset_query(query, cursor), projection).sort(PAGE_SORT)
+    docs = await documents.limit(limit + 1).to_list(limit + 1)
+    if len(docs) > limit:
+        docs = docs[:limit]
+        return docs, encode_cursor(docs[-1])
+    return docs, None
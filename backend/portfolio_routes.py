@@ -1,7 +1,10 @@
-from fastapi import APIRouter, HTTPException, UploadFile, File, Form, Depends
-from fastapi.responses import FileResponse
-from typing import List, Optional
+from fastapi import APIRouter, HTTPException, UploadFile, File, Form, Depends, Query, Request
+from fastapi.responses import JSONResponse, RedirectResponse, Response
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple, Union
+import asyncio
 import os
+from pathlib import Path
+from pydantic import TypeAdapter, ValidationError
 from bson import ObjectId
 from datetime import datetime
 
@@ -15,20 +18,129 @@ from models import (
     Skill, SkillCreate, SkillUpdate, Experience, ExperienceCreate, ExperienceUpdate,
     Project, ProjectCreate, ProjectUpdate, PortfolioImage, PortfolioImageCreate, PortfolioImageUpdate,
     Video, VideoCreate, VideoUpdate, Award, AwardCreate, AwardUpdate,
-    UploadResponse, BulkUploadResponse
+    PortfolioBundle, UploadResponse, BulkUploadResponse, BulkImageMetadata, ResumableUploadCreate, ResumableUploadStatus, Job,
+    DirectUploadCreate, DirectUploadTicket
 )
-from file_upload import save_image, save_video, delete_file, get_file_url, get_file_info
+from file_upload import (
+    save_image, save_video, delete_file, delete_tree, get_file_url, get_file_info, publish_file, register_image,
+    storage, url_to_path, INCOMING_DIR
+)
+from direct_upload import (
+    claim_direct_upload, create_direct_upload, finish_direct_upload, receive_presigned_upload, store_direct_upload
+)
+from file_serving import resolve_upload_path, serve_file, upload_key
+from blob_store import release_blob
+from image_processing import processing_stats
+from image_transform import parse_transform, serve_transform, transform_cache
+from job_handlers import IMAGE_DERIVATIVES_PRIORITY, VIDEO_METADATA_PRIORITY
+from job_queue import enqueue, enqueue_many, get_job, job_stats
+from resumable_upload import (
+    abort_session, append_chunk, claim_for_finalize, create_session, finish_session,
+    get_session, release_finalize, session_status
+)
+from singleflight import SingleFlight
+from cache import response_cache
+from compression import MIN_COMPRESS_SIZE, compress, negotiate_encoding
+from http_conditional import http_date, not_modified
+from projection import mongo_projection, parse_fields, partial_model
+from pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, PAGE_SORT, find_page, keyset_query
+from serialization import FAST_SERIALIZATION, MongoJSONResponse, render
+from streaming import stream_documents, streaming_media_type
+
+router = APIRouter(default_response_class=MongoJSONResponse if FAST_SERIALIZATION else JSONResponse)
+
+# Files written concurrently by one bulk upload, and files accepted per request
+BULK_UPLOAD_CONCURRENCY = int(os.environ.get("BULK_UPLOAD_CONCURRENCY", "4"))
+BULK_UPLOAD_MAX_FILES = int(os.environ.get("BULK_UPLOAD_MAX_FILES", "500"))
+
+# Concurrent requests for the same payload share a single database round trip
+_inflight = SingleFlight()
+
+ALL_COLLECTIONS = (
+    personal_info_collection.name, social_links_collection.name, skills_collection.name,
+    experience_collection.name, projects_collection.name, portfolio_images_collection.name,
+    videos_collection.name, awards_collection.name
+)
+
+async def _cached_response(
+    request: Request,
+    route: str,
+    params: dict,
+    collections: Tuple[str, ...],
+    loader: Callable[[], Awaitable[Union[bytes, Tuple[bytes, Dict[str, str]]]]]
+) -> Response:
+    """Serve a serialized response from the cache, loading it on a miss.
+
+    Conditional requests whose validators still match the collection versions
+    are answered with 304 before any query or serialization happens. Loaders
+    return the body, or the body plus extra headers to cache alongside it.
+    Negotiated gzip/brotli bodies are cached next to the identity body; the
+    coding's ETag is only used when the body is actually sent compressed.
+    """
+    await response_cache.refresh()
+    key = response_cache.make_key(route, params)
+    encoding = negotiate_encoding(request.headers.get("accept-encoding"))
+    # Validators are taken before loading so a concurrent write can only make them stale
+    identity_etag = response_cache.etag(key, collections)
+    encoded_etag = response_cache.etag(key, collections, encoding) if encoding else identity_etag
+    last_modified = response_cache.last_modified(collections)
+    headers = {
+        "Last-Modified": http_date(last_modified),
+        "Cache-Control": "no-cache",
+        "Vary": "Accept-Encoding"
+    }
+    # Bodies too small to compress were sent under the identity tag even when a coding was accepted
+    for etag in dict.fromkeys((encoded_etag, identity_etag)):
+        if not_modified(request.headers, etag, last_modified):
+            return Response(status_code=304, headers={"ETag": etag, **headers})
+
+    cached = response_cache.get(key)
+    if cached is None:
+        async def load():
+            versions = response_cache.versions(collections)
+            rendered = await loader()
+            response_cache.set(key, rendered, collections, versions)
+            return rendered
+        cached = await _inflight.do(key, load)
+
+    body, extra_headers = cached if isinstance(cached, tuple) else (cached, {})
+    headers = {"ETag": identity_etag, **headers, **extra_headers}
+    if encoding and len(body) >= MIN_COMPRESS_SIZE:
+        compressed = response_cache.get_encoded(key, cached, encoding)
+        if compressed is None:
+            compressed = compress(body, encoding)
+            response_cache.set_encoded(key, cached, encoding, compressed)
+        body = compressed
+        headers["ETag"] = encoded_etag
+        headers["Content-Encoding"] = encoding
+    return Response(content=body, media_type="application/json", headers=headers)
 
-router = APIRouter()
+def _page_headers(request: Request, next_cursor: Optional[str]) -> Dict[str, str]:
+    """Headers advertising the next page of a keyset-paginated listing.
+
+    The link is relative, as these headers are cached for every host the
+    API is reached under.
+    """
+    if not next_cursor:
+        return {}
+    next_url = request.url.include_query_params(cursor=next_cursor)
+    return {"X-Next-Cursor": next_cursor, "Link": f'<{next_url.path}?{next_url.query}>; rel="next"'}
+
+async def _invalidate(*collections):
+    """Drop cached responses built from the given collections, in every process"""
+    await response_cache.bump(*(collection.name for collection in collections))
 
 # Personal Information Endpoints
 @router.get("/personal", response_model=PersonalInfo)
-async def get_personal_info():
+async def get_personal_info(request: Request):
     """Get personal information"""
-    personal = await personal_info_collection.find_one()
-    if not personal:
-        raise HTTPException(status_code=404, detail="Personal information not found")
-    return personal
+    async def load() -> bytes:
+        personal = await personal_info_collection.find_one()
+        if not personal:
+            raise HTTPException(status_code=404, detail="Personal information not found")
+        return render(PersonalInfo, personal)
+
+    return await _cached_response(request, "personal", {}, (personal_info_collection.name,), load)
 
 @router.put("/personal", response_model=PersonalInfo)
 async def update_personal_info(personal_update: PersonalInfoUpdate):
@@ -44,16 +156,20 @@ async def update_personal_info(personal_update: PersonalInfoUpdate):
     
     if not result:
         raise HTTPException(status_code=404, detail="Personal information not found")
+    await _invalidate(personal_info_collection)
     return result
 
 # Social Links Endpoints
 @router.get("/social", response_model=SocialLinks)
-async def get_social_links():
+async def get_social_links(request: Request):
     """Get social links"""
-    social = await social_links_collection.find_one()
-    if not social:
-        raise HTTPException(status_code=404, detail="Social links not found")
-    return social
+    async def load() -> bytes:
+        social = await social_links_collection.find_one()
+        if not social:
+            raise HTTPException(status_code=404, detail="Social links not found")
+        return render(SocialLinks, social)
+
+    return await _cached_response(request, "social", {}, (social_links_collection.name,), load)
 
 @router.put("/social", response_model=SocialLinks)
 async def update_social_links(social_update: SocialLinksUpdate):
@@ -69,14 +185,26 @@ async def update_social_links(social_update: SocialLinksUpdate):
     
     if not result:
         raise HTTPException(status_code=404, detail="Social links not found")
+    await _invalidate(social_links_collection)
     return result
 
 # Skills Endpoints
 @router.get("/skills", response_model=List[Skill])
-async def get_skills():
+async def get_skills(request: Request, fields: Optional[str] = None, stream: bool = False):
     """Get all skills"""
-    skills = await skills_collection.find().sort("order", 1).to_list(1000)
-    return skills
+    selected = parse_fields(Skill, fields)
+    projection = mongo_projection(selected)
+    item_model = partial_model(Skill, selected)
+
+    media_type = streaming_media_type(request, stream)
+    if media_type:
+        return stream_documents(skills_collection.find({}, projection).sort("order", 1), item_model, media_type)
+
+    async def load() -> bytes:
+        skills = await skills_collection.find({}, projection).sort("order", 1).to_list(1000)
+        return render(List[item_model], skills)
+
+    return await _cached_response(request, "skills", {"fields": selected}, (skills_collection.name,), load)
 
 @router.post("/skills", response_model=Skill)
 async def create_skill(skill: SkillCreate):
@@ -87,6 +215,7 @@ async def create_skill(skill: SkillCreate):
     
     result = await skills_collection.insert_one(skill_dict)
     created_skill = await skills_collection.find_one({"_id": result.inserted_id})
+    await _invalidate(skills_collection)
     return created_skill
 
 @router.put("/skills/{skill_id}", response_model=Skill)
@@ -106,6 +235,7 @@ async def update_skill(skill_id: str, skill_update: SkillUpdate):
     
     if not result:
         raise HTTPException(status_code=404, detail="Skill not found")
+    await _invalidate(skills_collection)
     return result
 
 @router.delete("/skills/{skill_id}")
@@ -118,14 +248,26 @@ async def delete_skill(skill_id: str):
     if result.deleted_count == 0:
         raise HTTPException(status_code=404, detail="Skill not found")
     
+    await _invalidate(skills_collection)
     return {"message": "Skill deleted successfully"}
 
 # Experience Endpoints
 @router.get("/experience", response_model=List[Experience])
-async def get_experience():
+async def get_experience(request: Request, fields: Optional[str] = None, stream: bool = False):
     """Get all experience"""
-    experience = await experience_collection.find().sort("order", 1).to_list(1000)
-    return experience
+    selected = parse_fields(Experience, fields)
+    projection = mongo_projection(selected)
+    item_model = partial_model(Experience, selected)
+
+    media_type = streaming_media_type(request, stream)
+    if media_type:
+        return stream_documents(experience_collection.find({}, projection).sort("order", 1), item_model, media_type)
+
+    async def load() -> bytes:
+        experience = await experience_collection.find({}, projection).sort("order", 1).to_list(1000)
+        return render(List[item_model], experience)
+
+    return await _cached_response(request, "experience", {"fields": selected}, (experience_collection.name,), load)
 
 @router.post("/experience", response_model=Experience)
 async def create_experience(experience: ExperienceCreate):
@@ -136,6 +278,7 @@ async def create_experience(experience: ExperienceCreate):
     
     result = await experience_collection.insert_one(exp_dict)
     created_exp = await experience_collection.find_one({"_id": result.inserted_id})
+    await _invalidate(experience_collection)
     return created_exp
 
 @router.put("/experience/{exp_id}", response_model=Experience)
@@ -155,6 +298,7 @@ async def update_experience(exp_id: str, exp_update: ExperienceUpdate):
     
     if not result:
         raise HTTPException(status_code=404, detail="Experience not found")
+    await _invalidate(experience_collection)
     return result
 
 @router.delete("/experience/{exp_id}")
@@ -167,14 +311,26 @@ async def delete_experience(exp_id: str):
     if result.deleted_count == 0:
         raise HTTPException(status_code=404, detail="Experience not found")
     
+    await _invalidate(experience_collection)
     return {"message": "Experience deleted successfully"}
 
 # Projects Endpoints
 @router.get("/projects", response_model=List[Project])
-async def get_projects():
+async def get_projects(request: Request, fields: Optional[str] = None, stream: bool = False):
     """Get all projects"""
-    projects = await projects_collection.find().sort("order", 1).to_list(1000)
-    return projects
+    selected = parse_fields(Project, fields)
+    projection = mongo_projection(selected)
+    item_model = partial_model(Project, selected)
+
+    media_type = streaming_media_type(request, stream)
+    if media_type:
+        return stream_documents(projects_collection.find({}, projection).sort("order", 1), item_model, media_type)
+
+    async def load() -> bytes:
+        projects = await projects_collection.find({}, projection).sort("order", 1).to_list(1000)
+        return render(List[item_model], projects)
+
+    return await _cached_response(request, "projects", {"fields": selected}, (projects_collection.name,), load)
 
 @router.post("/projects", response_model=Project)
 async def create_project(project: ProjectCreate):
@@ -185,6 +341,7 @@ async def create_project(project: ProjectCreate):
     
     result = await projects_collection.insert_one(project_dict)
     created_project = await projects_collection.find_one({"_id": result.inserted_id})
+    await _invalidate(projects_collection)
     return created_project
 
 @router.put("/projects/{project_id}", response_model=Project)
@@ -204,6 +361,7 @@ async def update_project(project_id: str, project_update: ProjectUpdate):
     
     if not result:
         raise HTTPException(status_code=404, detail="Project not found")
+    await _invalidate(projects_collection)
     return result
 
 @router.delete("/projects/{project_id}")
@@ -216,52 +374,200 @@ async def delete_project(project_id: str):
     if result.deleted_count == 0:
         raise HTTPException(status_code=404, detail="Project not found")
     
+    await _invalidate(projects_collection)
     return {"message": "Project deleted successfully"}
 
 # Portfolio Images Endpoints
 @router.get("/images", response_model=List[PortfolioImage])
-async def get_portfolio_images(category: Optional[str] = None):
-    """Get portfolio images, optionally filtered by category"""
+async def get_portfolio_images(
+    request: Request,
+    category: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None,
+    stream: bool = False
+):
+    """Get portfolio images, optionally filtered by category.
+
+    Results are keyset-paginated on (order, _id); when more remain, the
+    opaque cursor for the next page is returned in the X-Next-Cursor header.
+    Streaming requests (NDJSON or stream=true) walk the whole result from
+    the cursor onwards unless a limit is given explicitly. ``fields`` selects
+    a comma-separated subset of the model's fields.
+    """
     query = {}
     if category:
         query["category"] = category
-    
-    images = await portfolio_images_collection.find(query).sort("order", 1).to_list(1000)
-    return images
+    selected = parse_fields(PortfolioImage, fields)
+    projection = mongo_projection(selected)
+    item_model = partial_model(PortfolioImage, selected)
+
+    media_type = streaming_media_type(request, stream)
+    if media_type:
+        documents = portfolio_images_collection.find(keyset_query(query, cursor), projection).sort(PAGE_SORT)
+        if "limit" in request.query_params:
+            documents = documents.limit(limit)
+        return stream_documents(documents, item_model, media_type)
+
+    async def load():
+        images, next_cursor = await find_page(portfolio_images_collection, query, limit, cursor, projection)
+        return render(List[item_model], images), _page_headers(request, next_cursor)
+
+    params = {"category": category, "limit": limit, "cursor": cursor, "fields": selected}
+    return await _cached_response(request, "images", params, (portfolio_images_collection.name,), load)
 
 @router.post("/images/upload", response_model=PortfolioImage)
 async def upload_portfolio_image(
+    response: Response,
     file: UploadFile = File(...),
     title: str = Form(...),
     description: str = Form(""),
     category: str = Form(...),
     featured: bool = Form(False)
 ):
-    """Upload new portfolio image"""
+    """Upload new portfolio image.
+
+    Returns once the original is stored. Unless identical bytes were
+    uploaded before, the thumbnail and renditions are created by a
+    background job whose id is in the X-Job-Id header; until then the
+    original stands in as the thumbnail.
+    """
     try:
-        # Save image and create thumbnail
-        image_path, thumbnail_path = await save_image(file, category)
-        
-        # Create database entry
-        image_data = {
-            "title": title,
-            "description": description,
-            "category": category,
-            "image_url": get_file_url(image_path),
-            "thumbnail_url": get_file_url(thumbnail_path),
-            "featured": featured,
-            "order": 0,
-            "created_at": datetime.utcnow(),
-            "updated_at": datetime.utcnow()
-        }
+        # Save image; derivatives come from an identical earlier upload or a job
+        saved = await save_image(file, category)
         
-        result = await portfolio_images_collection.insert_one(image_data)
-        created_image = await portfolio_images_collection.find_one({"_id": result.inserted_id})
-        return created_image
+        return await _insert_image(saved, title, description, category, featured, response)
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Upload failed: {str(e)}")
 
+async def _insert_image(saved, title: str, description: str, category: str, featured: bool, response: Response) -> dict:
+    """Create the database entry for a saved image and queue its derivatives if needed"""
+    image_data = _image_document(saved, title, description, category, featured)
+    
+    result = await portfolio_images_collection.insert_one(image_data)
+    if not saved.thumbnail_path:
+        job_id = await enqueue(
+            "image.derivatives", {"image_id": str(result.inserted_id)}, priority=IMAGE_DERIVATIVES_PRIORITY
+        )
+        response.headers["X-Job-Id"] = str(job_id)
+    created_image = await portfolio_images_collection.find_one({"_id": result.inserted_id})
+    await _invalidate(portfolio_images_collection)
+    return created_image
+
+# Direct uploads: presign, PUT the file straight to storage, then complete
+@router.post("/images/upload/direct", response_model=DirectUploadTicket, status_code=201)
+async def create_direct_image_upload(upload: DirectUploadCreate):
+    """Start an image upload that bypasses the API.
+
+    The file is PUT to the returned URL with the returned headers, then
+    the upload is completed to create the image.
+    """
+    return await create_direct_upload("image", upload)
+
+@router.post("/images/upload/direct/{upload_id}/complete", response_model=PortfolioImage)
+async def complete_direct_image_upload(upload_id: str, response: Response):
+    """Validate a directly uploaded image and create its entry, as /images/upload does"""
+    session = await claim_direct_upload(upload_id, "image")
+    saved = await register_image(await store_direct_upload(session))
+    created_image = await _insert_image(
+        saved, session["title"], session["description"], session["category"], session["featured"], response
+    )
+    await finish_direct_upload(upload_id)
+    return created_image
+
+def _image_document(saved, title: str, description: str, category: str, featured: bool) -> dict:
+    """Database entry for a saved image; the original stands in for a pending thumbnail"""
+    return {
+        "title": title,
+        "description": description,
+        "category": category,
+        "image_url": get_file_url(saved.image_path),
+        "thumbnail_url": get_file_url(saved.thumbnail_path or saved.image_path),
+        "renditions": saved.renditions,
+        "sha256": saved.sha256,
+        **saved.metadata,
+        "featured": featured,
+        "order": 0,
+        "created_at": datetime.utcnow(),
+        "updated_at": datetime.utcnow()
+    }
+
+@router.post("/images/upload/bulk", response_model=BulkUploadResponse)
+async def bulk_upload_portfolio_images(
+    files: List[UploadFile] = File(...),
+    metadata: str = Form("[]"),
+    category: str = Form(...),
+    featured: bool = Form(False)
+):
+    """Upload many portfolio images in one request.
+
+    ``metadata`` is a JSON array matched to ``files`` by position; entries
+    may override title, description, category and featured, and missing
+    entries fall back to the file name and the request's category. Files are
+    stored concurrently, one bad file does not fail the rest, and all
+    documents are created with a single insert.
+    """
+    if len(files) > BULK_UPLOAD_MAX_FILES:
+        raise HTTPException(status_code=400, detail=f"Too many files. Maximum per request: {BULK_UPLOAD_MAX_FILES}")
+    try:
+        entries = TypeAdapter(List[BulkImageMetadata]).validate_json(metadata)
+    except ValidationError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid metadata: {e.errors()[0]['msg']}")
+    if len(entries) > len(files):
+        raise HTTPException(status_code=400, detail="More metadata entries than files")
+    entries += [BulkImageMetadata() for _ in range(len(files) - len(entries))]
+    
+    semaphore = asyncio.Semaphore(BULK_UPLOAD_CONCURRENCY)
+    
+    async def store(file: UploadFile, entry: BulkImageMetadata):
+        async with semaphore:
+            try:
+                return await save_image(file, entry.category or category)
+            except HTTPException as e:
+                return f"{file.filename}: {e.detail}"
+            except Exception as e:
+                return f"{file.filename}: Upload failed: {str(e)}"
+    
+    results = await asyncio.gather(*(store(file, entry) for file, entry in zip(files, entries)))
+    
+    stored = [(file, entry, saved) for file, entry, saved in zip(files, entries, results) if not isinstance(saved, str)]
+    failed_files = [result for result in results if isinstance(result, str)]
+    if not stored:
+        return BulkUploadResponse(uploaded_files=[], failed_files=failed_files)
+    
+    documents = [
+        _image_document(
+            saved,
+            entry.title or Path(file.filename or "").stem or "Untitled",
+            entry.description,
+            entry.category or category,
+            entry.featured or featured
+        )
+        for file, entry, saved in stored
+    ]
+    result = await portfolio_images_collection.insert_many(documents)
+    await enqueue_many(
+        "image.derivatives",
+        [{"image_id": str(image_id)} for (_, _, saved), image_id in zip(stored, result.inserted_ids) if not saved.thumbnail_path],
+        priority=IMAGE_DERIVATIVES_PRIORITY
+    )
+    await _invalidate(portfolio_images_collection)
+    
+    uploaded_files = [
+        UploadResponse(
+            filename=file.filename or "",
+            url=get_file_url(saved.image_path),
+            size=saved.size,
+            content_type=saved.content_type,
+            id=str(image_id)
+        )
+        for (file, _, saved), image_id in zip(stored, result.inserted_ids)
+    ]
+    return BulkUploadResponse(uploaded_files=uploaded_files, failed_files=failed_files)
+
 @router.put("/images/{image_id}", response_model=PortfolioImage)
 async def update_portfolio_image(image_id: str, image_update: PortfolioImageUpdate):
     """Update portfolio image"""
@@ -279,6 +585,7 @@ async def update_portfolio_image(image_id: str, image_update: PortfolioImageUpda
     
     if not result:
         raise HTTPException(status_code=404, detail="Image not found")
+    await _invalidate(portfolio_images_collection)
     return result
 
 @router.delete("/images/{image_id}")
@@ -292,29 +599,61 @@ async def delete_portfolio_image(image_id: str):
     if not image:
         raise HTTPException(status_code=404, detail="Image not found")
     
-    # Delete files
-    if image.get("image_url"):
-        await delete_file(image["image_url"].replace("/api/uploads/", "/app/backend/uploads/"))
-    if image.get("thumbnail_url"):
-        await delete_file(image["thumbnail_url"].replace("/api/uploads/", "/app/backend/uploads/"))
+    # Delete files unless another image still shares them
+    if not image.get("sha256") or await release_blob(image["sha256"]):
+        if image.get("image_url"):
+            await delete_file(url_to_path(image["image_url"]))
+        if image.get("thumbnail_url"):
+            await delete_file(url_to_path(image["thumbnail_url"]))
+        for rendition in image.get("renditions", []):
+            await delete_file(url_to_path(rendition["url"]))
     
     # Delete database entry
     result = await portfolio_images_collection.delete_one({"_id": ObjectId(image_id)})
     if result.deleted_count == 0:
         raise HTTPException(status_code=404, detail="Image not found")
     
+    await _invalidate(portfolio_images_collection)
     return {"message": "Image deleted successfully"}
 
 # Videos Endpoints
 @router.get("/videos", response_model=List[Video])
-async def get_videos(category: Optional[str] = None):
-    """Get videos, optionally filtered by category"""
+async def get_videos(
+    request: Request,
+    category: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None,
+    stream: bool = False
+):
+    """Get videos, optionally filtered by category.
+
+    Results are keyset-paginated on (order, _id); when more remain, the
+    opaque cursor for the next page is returned in the X-Next-Cursor header.
+    Streaming requests (NDJSON or stream=true) walk the whole result from
+    the cursor onwards unless a limit is given explicitly. ``fields`` selects
+    a comma-separated subset of the model's fields.
+    """
     query = {}
     if category:
         query["category"] = category
-    
-    videos = await videos_collection.find(query).sort("order", 1).to_list(1000)
-    return videos
+    selected = parse_fields(Video, fields)
+    projection = mongo_projection(selected)
+    item_model = partial_model(Video, selected)
+
+    media_type = streaming_media_type(request, stream)
+    if media_type:
+        documents = videos_collection.find(keyset_query(query, cursor), projection).sort(PAGE_SORT)
+        if "limit" in request.query_params:
+            documents = documents.limit(limit)
+        return stream_documents(documents, item_model, media_type)
+
+    async def load():
+        videos, next_cursor = await find_page(videos_collection, query, limit, cursor, projection)
+        return render(List[item_model], videos), _page_headers(request, next_cursor)
+
+    params = {"category": category, "limit": limit, "cursor": cursor, "fields": selected}
+    return await _cached_response(request, "videos", params, (videos_collection.name,), load)
 
 @router.post("/videos/upload", response_model=Video)
 async def upload_video(
@@ -329,27 +668,107 @@ async def upload_video(
         # Save video
         video_path = await save_video(file, category)
         
-        # Create database entry
-        video_data = {
-            "title": title,
-            "description": description,
-            "category": category,
-            "video_url": get_file_url(video_path),
-            "thumbnail_url": "",  # Will be generated later
-            "duration": 0,  # Will be calculated later
-            "featured": featured,
-            "order": 0,
-            "created_at": datetime.utcnow(),
-            "updated_at": datetime.utcnow()
-        }
-        
-        result = await videos_collection.insert_one(video_data)
-        created_video = await videos_collection.find_one({"_id": result.inserted_id})
-        return created_video
+        return await _insert_video(video_path, title, description, category, featured)
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Upload failed: {str(e)}")
 
+async def _insert_video(video_path: str, title: str, description: str, category: str, featured: bool) -> dict:
+    """Create the database entry for a stored video"""
+    video_data = {
+        "title": title,
+        "description": description,
+        "category": category,
+        "video_url": get_file_url(video_path),
+        "thumbnail_url": "",  # Will be generated later
+        "duration": 0,  # Filled in by the video.metadata job
+        "featured": featured,
+        "order": 0,
+        "created_at": datetime.utcnow(),
+        "updated_at": datetime.utcnow()
+    }
+    
+    result = await videos_collection.insert_one(video_data)
+    await enqueue("video.metadata", {"video_id": str(result.inserted_id)}, priority=VIDEO_METADATA_PRIORITY)
+    created_video = await videos_collection.find_one({"_id": result.inserted_id})
+    await _invalidate(videos_collection)
+    return created_video
+
+# Resumable video uploads: create, PATCH chunks at Upload-Offset, HEAD for progress, finalize
+def _upload_headers(status: dict) -> Dict[str, str]:
+    return {
+        "Upload-Offset": str(status["offset"]),
+        "Upload-Length": str(status["size"]),
+        "Cache-Control": "no-store"
+    }
+
+@router.post("/videos/upload/resumable", response_model=ResumableUploadStatus, status_code=201)
+async def create_resumable_upload(upload: ResumableUploadCreate, request: Request, response: Response):
+    """Start a resumable video upload"""
+    status = session_status(await create_session(upload))
+    response.headers.update(_upload_headers(status))
+    response.headers["Location"] = str(request.url_for("append_resumable_upload", upload_id=status["upload_id"]))
+    return status
+
+@router.head("/videos/upload/resumable/{upload_id}")
+async def get_resumable_upload_offset(upload_id: str):
+    """Report how many bytes of an upload have been received"""
+    return Response(status_code=200, headers=_upload_headers(session_status(await get_session(upload_id))))
+
+@router.patch("/videos/upload/resumable/{upload_id}", response_model=ResumableUploadStatus)
+async def append_resumable_upload(upload_id: str, request: Request, response: Response):
+    """Write the request body at the Upload-Offset byte position.
+
+    Chunks may be sent in parallel at different offsets; the returned offset
+    is the length of the prefix received without gaps.
+    """
+    try:
+        offset = int(request.headers["upload-offset"])
+    except (KeyError, ValueError):
+        raise HTTPException(status_code=400, detail="Missing or invalid Upload-Offset header")
+    status = await append_chunk(upload_id, offset, request.stream())
+    response.headers.update(_upload_headers(status))
+    return status
+
+@router.post("/videos/upload/resumable/{upload_id}/finalize", response_model=Video)
+async def finalize_resumable_upload(upload_id: str):
+    """Create the video entry once every byte has been received"""
+    session = await claim_for_finalize(upload_id)
+    try:
+        await publish_file(session["path"])
+        created_video = await _insert_video(
+            session["path"], session["title"], session["description"], session["category"], session["featured"]
+        )
+    except BaseException:
+        await release_finalize(upload_id)
+        raise
+    await finish_session(upload_id)
+    return created_video
+
+@router.delete("/videos/upload/resumable/{upload_id}")
+async def delete_resumable_upload(upload_id: str):
+    """Abort a resumable upload and discard its data"""
+    await abort_session(upload_id)
+    return {"message": "Upload aborted successfully"}
+
+@router.post("/videos/upload/direct", response_model=DirectUploadTicket, status_code=201)
+async def create_direct_video_upload(upload: DirectUploadCreate):
+    """Start a video upload that bypasses the API; see /images/upload/direct"""
+    return await create_direct_upload("video", upload)
+
+@router.post("/videos/upload/direct/{upload_id}/complete", response_model=Video)
+async def complete_direct_video_upload(upload_id: str):
+    """Validate a directly uploaded video and create its entry"""
+    session = await claim_direct_upload(upload_id, "video")
+    stored = await store_direct_upload(session)
+    created_video = await _insert_video(
+        str(stored.path), session["title"], session["description"], session["category"], session["featured"]
+    )
+    await finish_direct_upload(upload_id)
+    return created_video
+
 @router.put("/videos/{video_id}", response_model=Video)
 async def update_video(video_id: str, video_update: VideoUpdate):
     """Update video"""
@@ -367,6 +786,7 @@ async def update_video(video_id: str, video_update: VideoUpdate):
     
     if not result:
         raise HTTPException(status_code=404, detail="Video not found")
+    await _invalidate(videos_collection)
     return result
 
 @router.delete("/videos/{video_id}")
@@ -382,23 +802,41 @@ async def delete_video(video_id: str):
     
     # Delete files
     if video.get("video_url"):
-        await delete_file(video["video_url"].replace("/api/uploads/", "/app/backend/uploads/"))
+        await delete_file(url_to_path(video["video_url"]))
     if video.get("thumbnail_url"):
-        await delete_file(video["thumbnail_url"].replace("/api/uploads/", "/app/backend/uploads/"))
+        await delete_file(url_to_path(video["thumbnail_url"]))
+    preview_urls = [poster["url"] for poster in video.get("posters", [])]
+    preview_urls += [video.get("preview_sprite_url"), video.get("preview_vtt_url")]
+    for url in filter(None, preview_urls):
+        await delete_file(url_to_path(url))
+    if video.get("hls_url"):
+        await delete_tree(str(Path(url_to_path(video["hls_url"])).parent))
     
     # Delete database entry
     result = await videos_collection.delete_one({"_id": ObjectId(video_id)})
     if result.deleted_count == 0:
         raise HTTPException(status_code=404, detail="Video not found")
     
+    await _invalidate(videos_collection)
     return {"message": "Video deleted successfully"}
 
 # Awards Endpoints
 @router.get("/awards", response_model=List[Award])
-async def get_awards():
+async def get_awards(request: Request, fields: Optional[str] = None, stream: bool = False):
     """Get all awards"""
-    awards = await awards_collection.find().sort("order", 1).to_list(1000)
-    return awards
+    selected = parse_fields(Award, fields)
+    projection = mongo_projection(selected)
+    item_model = partial_model(Award, selected)
+
+    media_type = streaming_media_type(request, stream)
+    if media_type:
+        return stream_documents(awards_collection.find({}, projection).sort("order", 1), item_model, media_type)
+
+    async def load() -> bytes:
+        awards = await awards_collection.find({}, projection).sort("order", 1).to_list(1000)
+        return render(List[item_model], awards)
+
+    return await _cached_response(request, "awards", {"fields": selected}, (awards_collection.name,), load)
 
 @router.post("/awards", response_model=Award)
 async def create_award(award: AwardCreate):
@@ -409,6 +847,7 @@ async def create_award(award: AwardCreate):
     
     result = await awards_collection.insert_one(award_dict)
     created_award = await awards_collection.find_one({"_id": result.inserted_id})
+    await _invalidate(awards_collection)
     return created_award
 
 @router.put("/awards/{award_id}", response_model=Award)
@@ -428,6 +867,7 @@ async def update_award(award_id: str, award_update: AwardUpdate):
     
     if not result:
         raise HTTPException(status_code=404, detail="Award not found")
+    await _invalidate(awards_collection)
     return result
 
 @router.delete("/awards/{award_id}")
@@ -440,14 +880,118 @@ async def delete_award(award_id: str):
     if result.deleted_count == 0:
         raise HTTPException(status_code=404, detail="Award not found")
     
+    await _invalidate(awards_collection)
     return {"message": "Award deleted successfully"}
 
+# Portfolio Bundle Endpoint
+async def _load_portfolio_bundle() -> bytes:
+    """Fetch every public collection concurrently and serialize them once.
+
+    Cursors are read to the end: the bundle is the whole portfolio, so
+    capping a collection would silently drop its oldest entries.
+    """
+    (
+        personal, social, skills, experience,
+        projects, images, videos, awards
+    ) = await asyncio.gather(
+        personal_info_collection.find_one(),
+        social_links_collection.find_one(),
+        skills_collection.find().sort("order", 1).to_list(None),
+        experience_collection.find().sort("order", 1).to_list(None),
+        projects_collection.find().sort("order", 1).to_list(None),
+        portfolio_images_collection.find().sort("order", 1).to_list(None),
+        videos_collection.find().sort("order", 1).to_list(None),
+        awards_collection.find().sort("order", 1).to_list(None),
+    )
+
+    bundle = {
+        "personal": personal,
+        "social": social,
+        "skills": skills,
+        "experience": experience,
+        "projects": projects,
+        "images": images,
+        "videos": videos,
+        "awards": awards
+    }
+    return render(PortfolioBundle, bundle)
+
+@router.get("/portfolio", response_model=PortfolioBundle)
+async def get_portfolio_bundle(request: Request):
+    """Get all public portfolio content in a single response"""
+    return await _cached_response(request, "portfolio", {}, ALL_COLLECTIONS, _load_portfolio_bundle)
+
+
+# Cache Endpoints
+@router.get("/cache/stats")
+async def get_cache_stats():
+    """Get response cache hit/miss counters"""
+    return response_cache.stats()
+
+@router.get("/processing/stats")
+async def get_processing_stats():
+    """Get image processing pool occupancy and job timings"""
+    return {**processing_stats(), "transform_cache": transform_cache.stats()}
+
+# Background Job Endpoints
+@router.get("/jobs/stats")
+async def get_job_stats():
+    """Get background job counts by type and status"""
+    return await job_stats()
+
+@router.get("/jobs/{job_id}", response_model=Job)
+async def get_job_status(job_id: str):
+    """Get the status of a background job"""
+    if not ObjectId.is_valid(job_id):
+        raise HTTPException(status_code=400, detail="Invalid job ID")
+    
+    job = await get_job(ObjectId(job_id))
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+# On-demand image transforms
+@router.api_route("/img/{image_id}", methods=["GET", "HEAD"])
+async def get_transformed_image(
+    request: Request,
+    image_id: str,
+    w: int,
+    h: int = 0,
+    fit: str = "cover",
+    fmt: Optional[str] = None,
+    q: Optional[int] = None
+):
+    """Serve an image resized to one of the allowed presets"""
+    if not ObjectId.is_valid(image_id):
+        raise HTTPException(status_code=400, detail="Invalid image ID")
+    transform, negotiated = parse_transform(w, h, fit, fmt, q, request.headers.get("accept"))
+
+    image = await portfolio_images_collection.find_one({"_id": ObjectId(image_id)}, {"image_url": 1, "sha256": 1})
+    if not image:
+        raise HTTPException(status_code=404, detail="Image not found")
+    source = url_to_path(image["image_url"])
+    return await serve_transform(request, source, image.get("sha256"), transform, negotiated)
+
 # File serving endpoint
-@router.get("/uploads/{file_path:path}")
-async def serve_uploaded_file(file_path: str):
-    """Serve uploaded files"""
-    full_path = f"/app/backend/uploads/{file_path}"
-    if os.path.exists(full_path):
-        return FileResponse(full_path)
-    else:
-        raise HTTPException(status_code=404, detail="File not found")
\ No newline at end of file
+@router.api_route("/uploads/{file_path:path}", methods=["GET", "HEAD"])
+async def serve_uploaded_file(request: Request, file_path: str):
+    """Serve uploaded files.
+
+    Direct uploads are not served until they are validated. With a remote
+    storage backend, files this node has no copy of are redirected to it.
+    """
+    key = upload_key(file_path, exclude=(INCOMING_DIR,))
+    try:
+        path = resolve_upload_path(key)
+    except HTTPException:
+        if not storage.remote:
+            raise
+        return RedirectResponse(storage.url(key), status_code=307)
+    return serve_file(request, path)
+
+@router.put("/uploads/{file_path:path}")
+async def receive_uploaded_file(request: Request, file_path: str, size: int, expires: int, signature: str):
+    """Receive a direct upload sent to a URL presigned by the local storage backend"""
+    content_type = request.headers.get("content-type", "")
+    await receive_presigned_upload(file_path, content_type, size, expires, signature, request.stream())
+    return Response(status_code=200)
\ No newline at end of file
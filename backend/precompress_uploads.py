@@ -0,0 +1,36 @@
+#!/usr/bin/env python3
+"""
+Write .br/.gz sidecars for compressible files in the uploads tree
+
+Sidecars are served by /api/uploads when the client accepts the coding.
+Photos and videos are skipped since they are already compressed.
+"""
+
+import mimetypes
+
+from compression import COMPRESSIBLE_TYPES, SIDECAR_SUFFIXES, write_sidecars
+from file_upload import UPLOAD_DIR
+import storage  # noqa: F401 - registers extra mimetypes
+
+
+def main():
+    print(f"🗜️  Precompressing files under {UPLOAD_DIR}...")
+    processed = 0
+    written = 0
+    for path in sorted(UPLOAD_DIR.rglob("*")):
+        if not path.is_file() or path.suffix in SIDECAR_SUFFIXES.values():
+            continue
+        media_type = mimetypes.guess_type(path.name)[0]
+        if media_type not in COMPRESSIBLE_TYPES:
+            continue
+        processed += 1
+        sidecars = write_sidecars(path)
+        written += len(sidecars)
+        for sidecar in sidecars:
+            print(f"   ✅ {sidecar.relative_to(UPLOAD_DIR)}")
+
+    print(f"🎉 Wrote {written} sidecars for {processed} compressible files")
+
+
+if __name__ == "__main__":
+    main()
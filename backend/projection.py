@@ -0,0 +1,55 @@
+from functools import lru_cache
+from typing import Any, Dict, Optional, Tuple
+
+from bson import ObjectId
+from fastapi import HTTPException
+from pydantic import ConfigDict, create_model
+
+
+def _output_keys(model: Any) -> Dict[str, str]:
+    """Map each JSON key of a model to its Python field name"""
+    return {field.alias or name: name for name, field in model.model_fields.items()}
+
+
+def parse_fields(model: Any, fields: Optional[str]) -> Optional[Tuple[str, ...]]:
+    """Validate a comma-separated fields parameter against a response model.
+
+    Returns the selected JSON keys in model order, always including _id, or
+    None when no projection was requested.
+    """
+    if not fields:
+        return None
+    keys = _output_keys(model)
+    requested = {"_id" if name.strip() == "id" else name.strip() for name in fields.split(",") if name.strip()}
+    unknown = requested - set(keys)
+    if unknown:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown fields: {', '.join(sorted(unknown))}. Allowed fields: {', '.join(keys)}"
+        )
+    requested.add("_id")
+    return tuple(key for key in keys if key in requested)
+
+
+def mongo_projection(fields: Optional[Tuple[str, ...]]) -> Optional[dict]:
+    """Mongo projection document for a parsed fields selection"""
+    if fields is None:
+        return None
+    return {key: 1 for key in fields}
+
+
+@lru_cache(maxsize=None)
+def partial_model(model: Any, fields: Optional[Tuple[str, ...]]) -> Any:
+    """Response model restricted to the selected fields"""
+    if fields is None:
+        return model
+    keys = _output_keys(model)
+    definitions = {
+        keys[key]: (model.model_fields[keys[key]].annotation, model.model_fields[keys[key]])
+        for key in fields
+    }
+    return create_model(
+        f"{model.__name__}Fields",
+        __config__=ConfigDict(populate_by_name=True, arbitrary_types_allowed=True, json_encoders={ObjectId: str}),
+        **definitions
+    )
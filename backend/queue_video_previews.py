@@ -0,0 +1,38 @@
+#!/usr/bin/env python3
+"""
+Queue poster frames and scrub-preview sprites, or HLS packaging, for existing videos
+
+    python queue_video_previews.py        # videos without a preview yet
+    python queue_video_previews.py --all  # regenerate every video's previews
+    python queue_video_previews.py --hls  # package videos without an HLS ladder yet
+
+The work is done by the job workers (in the API or job_worker.py), which
+need ffmpeg on their PATH or at FFMPEG_PATH.
+"""
+
+import argparse
+import asyncio
+
+from database import videos_collection
+from job_handlers import VIDEO_HLS_PRIORITY, VIDEO_PREVIEWS_PRIORITY
+from job_queue import enqueue_many
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--all", action="store_true", help="include videos that are already done")
+    parser.add_argument("--hls", action="store_true", help="queue HLS packaging instead of previews")
+    args = parser.parse_args()
+
+    if args.hls:
+        job_type, field, priority = "video.hls", "hls_url", VIDEO_HLS_PRIORITY
+    else:
+        job_type, field, priority = "video.previews", "preview_vtt_url", VIDEO_PREVIEWS_PRIORITY
+    query = {} if args.all else {field: {"$in": [None, ""]}}
+    video_ids = [str(video["_id"]) async for video in videos_collection.find(query, {"_id": 1})]
+    await enqueue_many(job_type, [{"video_id": video_id} for video_id in video_ids], priority)
+    print(f"🎞️ Queued {job_type} for {len(video_ids)} videos")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
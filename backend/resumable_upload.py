@@ -0,0 +1,241 @@
+import asyncio
+import logging
+import os
+import uuid
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import AsyncIterator, List, Optional
+
+from fastapi import HTTPException
+
+from database import upload_sessions_collection
+from direct_upload import cleanup_expired_direct_uploads
+from file_upload import (
+    ALLOWED_VIDEO_TYPES, MAX_VIDEO_SIZE, UPLOAD_CHUNK_SIZE,
+    delete_file, digest_file, hashed_path, sniff_content_type, video_destination
+)
+from models import ResumableUploadCreate
+
+logger = logging.getLogger(__name__)
+
+# Sessions with no activity for this long are abandoned and swept
+RESUMABLE_UPLOAD_TTL = timedelta(hours=int(os.environ.get("RESUMABLE_UPLOAD_TTL_HOURS", "24")))
+RESUMABLE_CLEANUP_INTERVAL = int(os.environ.get("RESUMABLE_CLEANUP_INTERVAL", "900"))  # seconds
+
+_cleanup_task: Optional[asyncio.Task] = None
+
+
+def contiguous_offset(ranges: List[List[int]]) -> int:
+    """Length of the fully received prefix given the [start, end) ranges written"""
+    offset = 0
+    for start, end in sorted(ranges):
+        if start > offset:
+            break
+        offset = max(offset, end)
+    return offset
+
+
+def session_status(session: dict) -> dict:
+    return {
+        "upload_id": session["_id"],
+        "offset": contiguous_offset(session["ranges"]),
+        "size": session["size"],
+        "expires_at": session["expires_at"]
+    }
+
+
+async def create_session(upload: ResumableUploadCreate) -> dict:
+    """Register a new upload and reserve its final file at full size"""
+    if upload.content_type not in ALLOWED_VIDEO_TYPES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Invalid video type. Allowed types: {', '.join(ALLOWED_VIDEO_TYPES)}"
+        )
+    if upload.size > MAX_VIDEO_SIZE:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Video too large. Maximum size: {MAX_VIDEO_SIZE // (1024*1024)}MB"
+        )
+
+    # Chunks are written in place, so the file lives at its final location from the start
+    path = video_destination(upload.filename, upload.category)
+    await asyncio.to_thread(_reserve, path, upload.size)
+
+    now = datetime.utcnow()
+    session = {
+        "_id": uuid.uuid4().hex,
+        **upload.dict(),
+        "path": str(path),
+        "ranges": [],
+        "status": "uploading",
+        "created_at": now,
+        "expires_at": now + RESUMABLE_UPLOAD_TTL
+    }
+    await upload_sessions_collection.insert_one(session)
+    return session
+
+
+def _reserve(path: Path, size: int):
+    with open(path, "wb") as buffer:
+        buffer.truncate(size)
+
+
+async def get_session(upload_id: str) -> dict:
+    session = await upload_sessions_collection.find_one({"_id": upload_id})
+    if not session or session["expires_at"] < datetime.utcnow():
+        raise HTTPException(status_code=404, detail="Upload not found")
+    return session
+
+
+def _write_at(fd: int, offset: int, chunk: bytes):
+    view = memoryview(chunk)
+    while view:
+        written = os.pwrite(fd, view, offset)
+        view = view[written:]
+        offset += written
+
+
+async def append_chunk(upload_id: str, offset: int, body: AsyncIterator[bytes]) -> dict:
+    """Write a request body into the upload file at offset.
+
+    Chunks may arrive out of order or in parallel; each one is recorded as a
+    received [start, end) range. Bytes already written when a connection
+    drops are kept, so the client resumes from the reported offset.
+    """
+    session = await get_session(upload_id)
+    if session["status"] != "uploading":
+        raise HTTPException(status_code=409, detail="Upload is already being finalized")
+    if offset < 0 or offset >= session["size"]:
+        raise HTTPException(status_code=400, detail="Upload-Offset is outside the upload")
+
+    position = offset
+    pending = bytearray()
+    fd = os.open(session["path"], os.O_WRONLY)
+    try:
+        async for data in body:
+            if position + len(pending) + len(data) > session["size"]:
+                raise HTTPException(status_code=413, detail="Chunk extends past the declared upload size")
+            pending += data
+            if position == 0 and len(pending) >= 16 or len(pending) >= UPLOAD_CHUNK_SIZE:
+                position = await _flush(fd, position, pending)
+        if pending:
+            position = await _flush(fd, position, pending)
+    finally:
+        os.close(fd)
+        if position > offset:
+            session = await upload_sessions_collection.find_one_and_update(
+                {"_id": upload_id},
+                {
+                    "$push": {"ranges": [offset, position]},
+                    "$set": {"expires_at": datetime.utcnow() + RESUMABLE_UPLOAD_TTL}
+                },
+                return_document=True
+            )
+    return session_status(session)
+
+
+async def _flush(fd: int, position: int, pending: bytearray) -> int:
+    if position == 0 and sniff_content_type(bytes(pending[:16])) not in ALLOWED_VIDEO_TYPES:
+        raise HTTPException(status_code=400, detail="File content does not match an allowed type")
+    chunk = bytes(pending)
+    pending.clear()
+    await asyncio.to_thread(_write_at, fd, position, chunk)
+    return position + len(chunk)
+
+
+async def claim_for_finalize(upload_id: str) -> dict:
+    """Mark a fully received upload as finalizing; only one caller can win.
+
+    The head is sniffed again once no more chunks are accepted, as one
+    written at an offset inside it may have replaced the bytes checked when
+    the first chunk arrived. An upload that fails is discarded; one that
+    cannot be checked is released for another attempt. The file is then
+    renamed to embed its content hash, like every other stored video.
+    """
+    session = await get_session(upload_id)
+    if contiguous_offset(session["ranges"]) < session["size"]:
+        raise HTTPException(status_code=409, detail="Upload is incomplete")
+    claimed = await upload_sessions_collection.find_one_and_update(
+        {"_id": upload_id, "status": "uploading"},
+        {"$set": {"status": "finalizing"}},
+        return_document=True
+    )
+    if not claimed:
+        raise HTTPException(status_code=409, detail="Upload is already being finalized")
+    try:
+        sha256, head = await asyncio.to_thread(digest_file, claimed["path"])
+    except BaseException:
+        await release_finalize(upload_id)
+        raise
+    if sniff_content_type(head) not in ALLOWED_VIDEO_TYPES:
+        await finish_session(upload_id)
+        await delete_file(claimed["path"])
+        raise HTTPException(status_code=400, detail="File content does not match an allowed type")
+
+    path = hashed_path(Path(claimed["path"]), sha256)
+    try:
+        await asyncio.to_thread(os.replace, claimed["path"], path)
+    except BaseException:
+        await release_finalize(upload_id)
+        raise
+    return await upload_sessions_collection.find_one_and_update(
+        {"_id": upload_id}, {"$set": {"path": str(path)}}, return_document=True
+    )
+
+
+async def release_finalize(upload_id: str):
+    """Return a session whose finalize failed to uploading, so it can be retried or swept"""
+    await upload_sessions_collection.update_one(
+        {"_id": upload_id, "status": "finalizing"}, {"$set": {"status": "uploading"}}
+    )
+
+
+async def finish_session(upload_id: str):
+    await upload_sessions_collection.delete_one({"_id": upload_id})
+
+
+async def abort_session(upload_id: str):
+    """Discard an upload in progress and its partial file"""
+    session = await get_session(upload_id)
+    if session["status"] != "uploading":
+        raise HTTPException(status_code=409, detail="Upload is already being finalized")
+    await upload_sessions_collection.delete_one({"_id": upload_id})
+    await delete_file(session["path"])
+
+
+async def cleanup_expired_sessions() -> int:
+    """Delete expired sessions and the partial files of those never finalized"""
+    expired = upload_sessions_collection.find({"expires_at": {"$lt": datetime.utcnow()}})
+    removed = 0
+    async for session in expired:
+        # A session stuck mid-finalize may already back a video document, so its file is kept
+        if session["status"] == "uploading":
+            await delete_file(session["path"])
+        await upload_sessions_collection.delete_one({"_id": session["_id"]})
+        removed += 1
+    return removed
+
+
+async def _cleanup_loop():
+    while True:
+        try:
+            removed = await cleanup_expired_sessions() + await cleanup_expired_direct_uploads()
+            if removed:
+                logger.info(f"Removed {removed} abandoned upload sessions")
+        except Exception as e:
+            logger.warning(f"Upload session cleanup failed: {e}")
+        await asyncio.sleep(RESUMABLE_CLEANUP_INTERVAL)
+
+
+def start_upload_cleanup():
+    """Start sweeping abandoned resumable and direct upload sessions in the background"""
+    global _cleanup_task
+    if _cleanup_task is None:
+        _cleanup_task = asyncio.create_task(_cleanup_loop())
+
+
+def stop_upload_cleanup():
+    global _cleanup_task
+    if _cleanup_task is not None:
+        _cleanup_task.cancel()
+        _cleanup_task = None
@@ -0,0 +1,112 @@
+import json
+import os
+import typing
+from datetime import datetime
+from functools import lru_cache
+from typing import Any, Callable, Dict, List, Tuple
+
+from bson import ObjectId
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel, TypeAdapter
+from pydantic_core import PydanticUndefined
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson is optional
+    orjson = None
+
+# Opt-in: encode trusted Mongo documents without per-document validation
+FAST_SERIALIZATION = os.environ.get("FAST_SERIALIZATION", "").lower() in ("1", "true", "yes")
+
+
+def _default(value: Any) -> Any:
+    if isinstance(value, ObjectId):
+        return str(value)
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"Type is not JSON serializable: {type(value).__name__}")
+
+
+def dumps(data: Any) -> bytes:
+    """Encode plain data to compact JSON, handling ObjectId and datetime"""
+    if orjson is not None:
+        return orjson.dumps(data, default=_default)
+    return json.dumps(data, default=_default, ensure_ascii=False, separators=(",", ":")).encode()
+
+
+class MongoJSONResponse(JSONResponse):
+    """JSON response that encodes ObjectId and datetime natively"""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+@lru_cache(maxsize=None)
+def adapter_for(model: Any) -> TypeAdapter:
+    """Precompiled TypeAdapter for a response model"""
+    return TypeAdapter(model)
+
+
+def _is_model(tp: Any) -> bool:
+    return isinstance(tp, type) and issubclass(tp, BaseModel)
+
+
+@lru_cache(maxsize=None)
+def _shaper(model: Any) -> Callable[[Any], Any]:
+    """Compile a function that copies raw data into the model's output shape.
+
+    Only keys and defaults are handled: values are trusted as stored, which
+    is what makes this path cheap. Nested models, lists of models and
+    Optional models are shaped recursively.
+    """
+    origin = typing.get_origin(model)
+    args = typing.get_args(model)
+    if origin in (list, List):
+        item = _shaper(args[0])
+        return lambda values: [item(value) for value in values]
+    if origin is typing.Union:
+        inner = [arg for arg in args if arg is not type(None)]
+        item = _shaper(inner[0]) if len(inner) == 1 else (lambda value: value)
+        return lambda value: None if value is None else item(value)
+    if not _is_model(model):
+        return lambda value: value
+
+    plan: List[Tuple[str, str, Any, Any, Callable[[Any], Any]]] = []
+    for name, field in model.model_fields.items():
+        key = field.alias or name
+        plan.append((key, name, field.default, field.default_factory, _shaper(field.annotation)))
+
+    def shape(doc: Any) -> Dict[str, Any]:
+        if isinstance(doc, BaseModel):
+            doc = doc.model_dump(by_alias=True)
+        out = {}
+        for key, name, default, factory, sub in plan:
+            if key in doc:
+                value = doc[key]
+            elif name in doc:
+                value = doc[name]
+            elif factory is not None:
+                value = factory()
+            elif default is not PydanticUndefined:
+                value = default
+            else:
+                raise ValueError(f"{model.__name__}: missing required field {key!r}")
+            out[key] = sub(value)
+        return out
+
+    return shape
+
+
+def render(model: Any, data: Any, fast: bool = None) -> bytes:
+    """Encode data as JSON in the shape of a response model.
+
+    The default path validates through a precompiled TypeAdapter, exactly
+    like FastAPI's response_model. The fast path skips validation and
+    encodes the raw documents with orjson.
+    """
+    if fast is None:
+        fast = FAST_SERIALIZATION
+    if fast:
+        return dumps(_shaper(model)(data))
+    adapter = adapter_for(model)
+    return adapter.dump_json(adapter.validate_python(data), by_alias=True)
@@ -1,5 +1,4 @@
 from fastapi import FastAPI, APIRouter
-from fastapi.staticfiles import StaticFiles
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
 from motor.motor_asyncio import AsyncIOMotorClient
@@ -13,7 +12,13 @@ from datetime import datetime
 
 # Import our custom modules
 from database import init_default_data, close_db_connection
+from indexes import ensure_indexes
+from image_processing import shutdown_image_pool
+from resumable_upload import start_upload_cleanup, stop_upload_cleanup
+from job_queue import start_job_workers, stop_job_workers
 from portfolio_routes import router as portfolio_router
+from file_upload import UPLOAD_DIR, storage
+from storage import check_upload_signing_key
 
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
@@ -49,10 +54,8 @@ api_router.include_router(portfolio_router, tags=["portfolio"])
 # Include the router in the main app
 app.include_router(api_router)
 
-# Serve uploaded files
-uploads_dir = Path("/app/backend/uploads")
-uploads_dir.mkdir(parents=True, exist_ok=True)
-app.mount("/api/uploads", StaticFiles(directory=str(uploads_dir)), name="uploads")
+# Uploaded files are served by the /api/uploads route, which handles byte ranges
+UPLOAD_DIR.mkdir(parents=True, exist_ok=True)
 
 app.add_middleware(
     CORSMiddleware,
@@ -60,6 +63,8 @@ app.add_middleware(
     allow_origins=["*"],
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag", "Last-Modified", "X-Next-Cursor", "Link", "Location", "Upload-Offset", "Upload-Length",
+                    "Accept-Ranges", "Content-Range", "X-Job-Id"],
 )
 
 # Configure logging
@@ -73,11 +78,18 @@ logger = logging.getLogger(__name__)
 async def startup_event():
     """Initialize database with default data"""
     logger.info("Starting Curtis Williams Jr. Portfolio API...")
+    check_upload_signing_key(storage)
     await init_default_data()
+    await ensure_indexes()
+    start_upload_cleanup()
+    start_job_workers()
     logger.info("Database initialized successfully")
 
 @app.on_event("shutdown")
 async def shutdown_event():
     """Close database connection"""
+    stop_upload_cleanup()
+    stop_job_workers()
     await close_db_connection()
+    shutdown_image_pool()
     logger.info("Database connection closed")
@@ -0,0 +1,276 @@
+import asyncio
+import hashlib
+import hmac
+import mimetypes
+import os
+import secrets
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, NamedTuple, Optional
+from urllib.parse import quote, unquote, urlencode
+
+try:
+    import boto3
+    from botocore.config import Config
+    from botocore.exceptions import ClientError
+except ImportError:  # pragma: no cover - boto3 is only needed for the s3 backend
+    boto3 = None
+
+# "local" serves uploads from this node's disk; "s3" from an S3-compatible bucket
+STORAGE_BACKEND = os.environ.get("STORAGE_BACKEND", "local").lower()
+S3_BUCKET = os.environ.get("S3_BUCKET", "")
+# Set for MinIO and other S3-compatible services; unset means AWS
+S3_ENDPOINT_URL = os.environ.get("S3_ENDPOINT_URL") or None
+S3_REGION = os.environ.get("S3_REGION", "us-east-1")
+# Base URL objects are served from, such as a CDN in front of the bucket
+S3_PUBLIC_URL = os.environ.get("S3_PUBLIC_URL", "").rstrip("/")
+
+# How long a presigned upload URL stays valid
+PRESIGNED_UPLOAD_EXPIRES = int(os.environ.get("PRESIGNED_UPLOAD_EXPIRES", "900"))  # seconds
+# Signs the local backend's upload URLs; must be shared when several workers serve one disk
+UPLOAD_SIGNING_KEY = (os.environ.get("UPLOAD_SIGNING_KEY") or secrets.token_hex(32)).encode()
+UPLOAD_SIGNING_KEY_SET = bool(os.environ.get("UPLOAD_SIGNING_KEY"))
+
+LOCAL_URL_PREFIX = "/api/uploads/"
+DELETE_BATCH_SIZE = 1000  # S3 DeleteObjects limit
+
+# Types in the uploads tree that the platform registry may not know
+mimetypes.add_type("text/vtt", ".vtt")
+mimetypes.add_type("application/vnd.apple.mpegurl", ".m3u8")
+mimetypes.add_type("image/webp", ".webp")
+mimetypes.add_type("image/avif", ".avif")
+
+
+class StoredObject(NamedTuple):
+    size: int
+    content_type: str
+
+
+class PresignedUpload(NamedTuple):
+    url: str
+    headers: Dict[str, str]  # must be sent with the PUT, as they are part of the signature
+
+
+class Storage:
+    """Where uploaded files and their derivatives are served from.
+
+    Objects are addressed by keys relative to the uploads directory, which
+    holds the working copy every processing step reads and writes. A remote
+    backend mirrors files there once they are published and fetches them
+    back on nodes that lack them.
+    """
+
+    remote = False
+
+    def __init__(self, root: Path):
+        self.root = root
+
+    def url(self, key: str) -> str:
+        raise NotImplementedError
+
+    def key_for_url(self, url: str) -> Optional[str]:
+        """The key behind an upload URL, also for URLs from the local backend"""
+        for prefix in (self.url(""), LOCAL_URL_PREFIX):
+            if url.startswith(prefix):
+                return unquote(url[len(prefix):])
+        return None
+
+    async def publish(self, key: str, cache_control: str):
+        """Make the working copy of key available at its URL"""
+        raise NotImplementedError
+
+    async def fetch(self, key: str) -> Path:
+        """Path of a working copy of key, downloading it when this node has none"""
+        raise NotImplementedError
+
+    async def stat(self, key: str) -> Optional[StoredObject]:
+        raise NotImplementedError
+
+    async def move(self, source: str, destination: str, cache_control: str):
+        """Rename a published object; working copies are moved by the caller"""
+        raise NotImplementedError
+
+    async def delete(self, key: str):
+        """Delete a published object; working copies are deleted by the caller"""
+        raise NotImplementedError
+
+    async def delete_prefix(self, prefix: str):
+        raise NotImplementedError
+
+    def presign_put(self, key: str, content_type: str, size: int, expires: int) -> PresignedUpload:
+        """A URL a browser can PUT exactly size bytes of content_type to, storing them at key"""
+        raise NotImplementedError
+
+
+class LocalStorage(Storage):
+    """The working copy is the stored object, served by the /api/uploads route"""
+
+    def url(self, key: str) -> str:
+        return f"{LOCAL_URL_PREFIX}{key}"
+
+    async def publish(self, key: str, cache_control: str):
+        pass
+
+    async def fetch(self, key: str) -> Path:
+        return self.root / key
+
+    async def stat(self, key: str) -> Optional[StoredObject]:
+        try:
+            size = (self.root / key).stat().st_size
+        except FileNotFoundError:
+            return None
+        return StoredObject(size, mimetypes.guess_type(key)[0] or "application/octet-stream")
+
+    async def move(self, source: str, destination: str, cache_control: str):
+        pass
+
+    async def delete(self, key: str):
+        pass
+
+    async def delete_prefix(self, prefix: str):
+        pass
+
+    def _signature(self, key: str, content_type: str, size: int, expires: int) -> str:
+        message = f"PUT\n{key}\n{content_type}\n{size}\n{expires}".encode()
+        return hmac.new(UPLOAD_SIGNING_KEY, message, hashlib.sha256).hexdigest()
+
+    def presign_put(self, key: str, content_type: str, size: int, expires: int) -> PresignedUpload:
+        expires_at = int(time.time()) + expires
+        query = urlencode({
+            "size": size, "expires": expires_at, "signature": self._signature(key, content_type, size, expires_at)
+        })
+        return PresignedUpload(f"{self.url(key)}?{query}", {"Content-Type": content_type})
+
+    def verify_put(self, key: str, content_type: str, size: int, expires: int, signature: str) -> bool:
+        """Whether a PUT to the API carries a valid, unexpired signature from presign_put"""
+        expected = self._signature(key, content_type, size, expires)
+        return expires >= time.time() and hmac.compare_digest(expected, signature)
+
+
+class S3Storage(Storage):
+    """Objects in an S3-compatible bucket, with the uploads directory as a local cache.
+
+    Browsers read from the bucket (or the CDN at S3_PUBLIC_URL) directly,
+    and presigned uploads need a CORS rule on the bucket allowing PUT from
+    the site's origin. boto3 is synchronous, so calls run in threads.
+    """
+
+    remote = True
+
+    def __init__(self, root: Path, bucket: str, endpoint_url: Optional[str], region: str, public_url: str):
+        super().__init__(root)
+        if boto3 is None:
+            raise RuntimeError("STORAGE_BACKEND=s3 needs boto3 installed")
+        if not bucket:
+            raise RuntimeError("STORAGE_BACKEND=s3 needs S3_BUCKET set")
+        self.bucket = bucket
+        # Path-style addressing works with MinIO and other services without bucket subdomains
+        self.client = boto3.client(
+            "s3", endpoint_url=endpoint_url, region_name=region,
+            config=Config(signature_version="s3v4", s3={"addressing_style": "path" if endpoint_url else "auto"})
+        )
+        if not public_url:
+            public_url = (f"{endpoint_url.rstrip('/')}/{bucket}" if endpoint_url
+                          else f"https://{bucket}.s3.{region}.amazonaws.com")
+        self.public_url = public_url
+
+    def url(self, key: str) -> str:
+        return f"{self.public_url}/{quote(key)}"
+
+    async def publish(self, key: str, cache_control: str):
+        extra = {
+            "ContentType": mimetypes.guess_type(key)[0] or "application/octet-stream",
+            "CacheControl": cache_control
+        }
+        await asyncio.to_thread(self.client.upload_file, str(self.root / key), self.bucket, key, ExtraArgs=extra)
+
+    async def fetch(self, key: str) -> Path:
+        path = self.root / key
+        if path.is_file():
+            return path
+        path.parent.mkdir(parents=True, exist_ok=True)
+        temp = path.with_name(f"{path.name}.{secrets.token_hex(4)}.download")
+        try:
+            await asyncio.to_thread(self.client.download_file, self.bucket, key, str(temp))
+        except ClientError as e:
+            temp.unlink(missing_ok=True)
+            if e.response["Error"]["Code"] in ("404", "NoSuchKey"):
+                raise FileNotFoundError(key) from e
+            raise
+        os.replace(temp, path)
+        return path
+
+    async def stat(self, key: str) -> Optional[StoredObject]:
+        try:
+            head = await asyncio.to_thread(self.client.head_object, Bucket=self.bucket, Key=key)
+        except ClientError as e:
+            if e.response["Error"]["Code"] in ("404", "NoSuchKey"):
+                return None
+            raise
+        return StoredObject(head["ContentLength"], head.get("ContentType", "application/octet-stream"))
+
+    async def move(self, source: str, destination: str, cache_control: str):
+        # Server-side copy; objects up to 5GB need no multipart copy, well above MAX_VIDEO_SIZE
+        await asyncio.to_thread(
+            self.client.copy_object,
+            Bucket=self.bucket, Key=destination, CopySource={"Bucket": self.bucket, "Key": source},
+            MetadataDirective="REPLACE",
+            ContentType=mimetypes.guess_type(destination)[0] or "application/octet-stream",
+            CacheControl=cache_control
+        )
+        await self.delete(source)
+
+    async def delete(self, key: str):
+        await asyncio.to_thread(self.client.delete_object, Bucket=self.bucket, Key=key)
+
+    def _delete_prefix(self, prefix: str):
+        paginator = self.client.get_paginator("list_objects_v2")
+        for page in paginator.paginate(Bucket=self.bucket, Prefix=prefix, PaginationConfig={"PageSize": DELETE_BATCH_SIZE}):
+            objects = [{"Key": item["Key"]} for item in page.get("Contents", [])]
+            if objects:
+                self.client.delete_objects(Bucket=self.bucket, Delete={"Objects": objects, "Quiet": True})
+
+    async def delete_prefix(self, prefix: str):
+        await asyncio.to_thread(self._delete_prefix, prefix.rstrip("/") + "/")
+
+    def presign_put(self, key: str, content_type: str, size: int, expires: int) -> PresignedUpload:
+        # Type and length are signed, so the browser cannot store anything else under the key
+        url = self.client.generate_presigned_url(
+            "put_object",
+            Params={"Bucket": self.bucket, "Key": key, "ContentType": content_type, "ContentLength": size},
+            ExpiresIn=expires,
+            HttpMethod="PUT"
+        )
+        return PresignedUpload(url, {"Content-Type": content_type})
+
+
+def server_workers(argv: List[str]) -> int:
+    """API worker processes, from WEB_CONCURRENCY or a --workers/-w flag as uvicorn and gunicorn take them"""
+    workers = int(os.environ.get("WEB_CONCURRENCY") or 1)
+    for index, arg in enumerate(argv):
+        name, _, value = arg.partition("=")
+        if name in ("--workers", "-w"):
+            value = value or (argv[index + 1] if index + 1 < len(argv) else "")
+            if value.isdigit():
+                workers = int(value)
+    return workers
+
+
+def check_upload_signing_key(storage: Storage, argv: Optional[List[str]] = None):
+    """Refuse to serve from several workers that would each sign upload URLs with their own random key"""
+    workers = server_workers(sys.argv[1:] if argv is None else argv)
+    if isinstance(storage, LocalStorage) and not UPLOAD_SIGNING_KEY_SET and workers > 1:
+        raise RuntimeError(
+            f"UPLOAD_SIGNING_KEY must be set when the local storage backend runs in {workers} workers; "
+            "otherwise a presigned upload fails whenever it reaches a worker other than the one that signed it"
+        )
+
+
+def create_storage(root: Path) -> Storage:
+    """The backend chosen by STORAGE_BACKEND"""
+    if STORAGE_BACKEND == "s3":
+        return S3Storage(root, S3_BUCKET, S3_ENDPOINT_URL, S3_REGION, S3_PUBLIC_URL)
+    if STORAGE_BACKEND != "local":
+        raise RuntimeError(f"Unknown STORAGE_BACKEND {STORAGE_BACKEND!r}; use local or s3")
+    return LocalStorage(root)
@@ -0,0 +1,55 @@
+import os
+from typing import Any, AsyncIterator, Optional
+
+from fastapi import Request
+from fastapi.responses import StreamingResponse
+
+from serialization import render
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+JSON_MEDIA_TYPE = "application/json"
+
+# Documents fetched per Mongo batch and encoded per written chunk
+STREAM_BATCH_SIZE = int(os.environ.get("STREAM_BATCH_SIZE", "200"))
+
+
+def streaming_media_type(request: Request, stream: bool = False) -> Optional[str]:
+    """Pick the streaming format for a request, or None to respond normally.
+
+    NDJSON is negotiated through the Accept header; ``stream=true`` streams a
+    regular JSON array.
+    """
+    if NDJSON_MEDIA_TYPE in request.headers.get("accept", ""):
+        return NDJSON_MEDIA_TYPE
+    if stream:
+        return JSON_MEDIA_TYPE
+    return None
+
+
+async def _encode(cursor, model: Any, media_type: str) -> AsyncIterator[bytes]:
+    ndjson = media_type == NDJSON_MEDIA_TYPE
+    separator = b"\n" if ndjson else b","
+    first = True
+    chunk = [] if ndjson else [b"["]
+
+    async for doc in cursor:
+        encoded = render(model, doc)
+        if ndjson:
+            chunk.append(encoded + separator)
+        else:
+            chunk.append(encoded if first else separator + encoded)
+        first = False
+        if len(chunk) >= STREAM_BATCH_SIZE:
+            yield b"".join(chunk)
+            chunk = []
+
+    if not ndjson:
+        chunk.append(b"]")
+    if chunk:
+        yield b"".join(chunk)
+
+
+def stream_documents(cursor, model: Any, media_type: str) -> StreamingResponse:
+    """Stream a Motor cursor as a JSON array or NDJSON, one batch at a time"""
+    cursor = cursor.batch_size(STREAM_BATCH_SIZE)
+    return StreamingResponse(_encode(cursor, model, media_type), media_type=media_type)
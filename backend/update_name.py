@@ -8,6 +8,8 @@ from motor.motor_asyncio import AsyncIOMotorClient
 import os
 from dotenv import load_dotenv
 
+from cache import response_cache
+
 load_dotenv()
 
 # MongoDB connection
@@ -106,6 +108,9 @@ async def main():
     await update_experience()
     await update_projects()
     await update_image_descriptions()
+    await response_cache.bump(
+        db.personal_info.name, db.experience.name, db.projects.name, db.portfolio_images.name
+    )
     
     client.close()
     print("🎉 All updates complete! Curtis Williams Jr. is now properly referenced throughout the database.")
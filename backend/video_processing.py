@@ -0,0 +1,261 @@
+import asyncio
+import json
+import logging
+import math
+import os
+import shutil
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+from file_upload import (
+    POSTER_WIDTHS, create_posters, finish_hls_package, get_file_url, hls_staging_dir, save_sprite_file
+)
+
+logger = logging.getLogger(__name__)
+
+FFMPEG = shutil.which(os.environ.get("FFMPEG_PATH", "ffmpeg"))
+FFPROBE = shutil.which(os.environ.get("FFPROBE_PATH", "ffprobe"))
+# ffmpeg processes running at once in this process; each is multi-threaded itself
+VIDEO_WORKERS = int(os.environ.get("VIDEO_WORKERS", "2"))
+FFMPEG_TIMEOUT = float(os.environ.get("FFMPEG_TIMEOUT", "600"))
+
+# Poster frame position, as a share of the duration, skipping fade-ins and slates
+POSTER_POSITION = 0.1
+POSTER_MAX_OFFSET = 10.0
+
+# Scrub-preview sprite: a tile every SPRITE_INTERVAL seconds, spaced out on long
+# videos so there are at most SPRITE_MAX_TILES
+SPRITE_INTERVAL = float(os.environ.get("SPRITE_INTERVAL", "2"))
+SPRITE_MAX_TILES = int(os.environ.get("SPRITE_MAX_TILES", "100"))
+SPRITE_TILE_WIDTH = 160
+SPRITE_COLUMNS = 10
+
+# Optional adaptive streaming: an HLS ladder of fMP4 segments per upload
+HLS_PACKAGING = os.environ.get("HLS_PACKAGING", "").lower() in ("1", "true", "yes")
+# Rungs as <short side>:<video kbps>; rungs above the source resolution are skipped
+HLS_LADDER = sorted(
+    (tuple(int(part) for part in rung.split(":")) for rung in
+     os.environ.get("HLS_LADDER", "1080:5000,720:2800,480:1400,360:800").split(",") if rung.strip()),
+    reverse=True
+)
+HLS_SEGMENT_SECONDS = int(os.environ.get("HLS_SEGMENT_SECONDS", "4"))
+HLS_AUDIO_BITRATE = "128k"
+HLS_PRESET = os.environ.get("HLS_PRESET", "veryfast")
+# Transcoding a long upload into every rung takes far longer than a poster frame
+HLS_TIMEOUT = float(os.environ.get("HLS_TIMEOUT", "14400"))
+
+_slots = asyncio.Semaphore(VIDEO_WORKERS)
+
+
+def ffmpeg_available() -> bool:
+    return FFMPEG is not None
+
+
+async def run_ffmpeg(*args: str, timeout: float = FFMPEG_TIMEOUT) -> bytes:
+    """Run an ffmpeg/ffprobe command once a worker slot is free and return its stdout"""
+    async with _slots:
+        process = await asyncio.create_subprocess_exec(
+            *args,
+            stdin=asyncio.subprocess.DEVNULL,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE
+        )
+        try:
+            stdout, stderr = await asyncio.wait_for(process.communicate(), timeout)
+        except BaseException:
+            # Timed out or the job was cancelled; don't leave the encoder running
+            process.kill()
+            await process.wait()
+            raise
+    if process.returncode != 0:
+        message = stderr.decode(errors="replace").strip()[-500:]
+        raise RuntimeError(f"{Path(args[0]).name} exited with {process.returncode}: {message}")
+    return stdout
+
+
+async def probe_video(video_path: str) -> Optional[dict]:
+    """Duration, display size and audio presence for any container ffprobe can read.
+
+    Returns None without ffprobe.
+    """
+    if FFPROBE is None:
+        return None
+    output = await run_ffmpeg(
+        FFPROBE, "-v", "error",
+        "-show_entries",
+        "format=duration:stream=codec_type,width,height:stream_tags=rotate:stream_side_data=rotation",
+        "-of", "json", video_path
+    )
+    data = json.loads(output or b"{}")
+    streams = data.get("streams", [])
+    video = next((stream for stream in streams if stream.get("codec_type") == "video"), {})
+    width, height = video.get("width", 0), video.get("height", 0)
+    rotation = video.get("tags", {}).get("rotate") or next(
+        (side["rotation"] for side in video.get("side_data_list", []) if "rotation" in side), 0
+    )
+    if int(float(rotation)) % 180:
+        width, height = height, width
+    return {
+        "duration": float(data.get("format", {}).get("duration") or 0),
+        "width": width,
+        "height": height,
+        "has_audio": any(stream.get("codec_type") == "audio" for stream in streams)
+    }
+
+
+async def extract_frame(video_path: str, position: float) -> bytes:
+    """A PNG of the frame at position, no wider than the largest poster"""
+    scale = f"scale='min(iw,{POSTER_WIDTHS[-1]})':-2"
+    args = ("-frames:v", "1", "-vf", scale, "-an", "-sn", "-f", "image2pipe", "-c:v", "png", "-")
+    frame = await run_ffmpeg(FFMPEG, "-v", "error", "-ss", f"{position:.3f}", "-i", video_path, *args)
+    if not frame and position:
+        # A wrong duration can seek past the end; the first frame is better than none
+        frame = await run_ffmpeg(FFMPEG, "-v", "error", "-i", video_path, *args)
+    if not frame:
+        raise RuntimeError("ffmpeg produced no frame")
+    return frame
+
+
+def sprite_layout(duration: float, width: int, height: int) -> Tuple[float, int, int, int]:
+    """Seconds per tile, tile count, columns and tile height of a scrub-preview sprite"""
+    interval = max(SPRITE_INTERVAL, duration / SPRITE_MAX_TILES)
+    tiles = max(1, math.ceil(duration / interval))
+    tile_height = SPRITE_TILE_WIDTH * 9 // 16
+    if width and height:
+        tile_height = max(2, round(SPRITE_TILE_WIDTH * height / width / 2) * 2)
+    return interval, tiles, min(SPRITE_COLUMNS, tiles), tile_height
+
+
+def _timestamp(seconds: float) -> str:
+    milliseconds = round(seconds * 1000)
+    hours, milliseconds = divmod(milliseconds, 3600000)
+    minutes, milliseconds = divmod(milliseconds, 60000)
+    return f"{hours:02d}:{minutes:02d}:{milliseconds // 1000:02d}.{milliseconds % 1000:03d}"
+
+
+def sprite_vtt(sprite_name: str, duration: float, interval: float, tiles: int, columns: int, tile_height: int) -> str:
+    """WebVTT cues mapping each time range to its tile (media fragment #xywh) in the sprite"""
+    lines = ["WEBVTT", ""]
+    for index in range(tiles):
+        start = index * interval
+        x, y = (index % columns) * SPRITE_TILE_WIDTH, (index // columns) * tile_height
+        lines += [
+            f"{_timestamp(start)} --> {_timestamp(min(duration, start + interval))}",
+            f"{sprite_name}#xywh={x},{y},{SPRITE_TILE_WIDTH},{tile_height}",
+            ""
+        ]
+    return "\n".join(lines)
+
+
+async def render_sprite(video_path: str, duration: float, width: int, height: int) -> Tuple[Path, Path]:
+    """Tile frames across the video into one JPEG and write the WebVTT index next to it"""
+    interval, tiles, columns, tile_height = sprite_layout(duration, width, height)
+    rows = math.ceil(tiles / columns)
+    # Only keyframes are decoded at first; the fps filter picks the one nearest
+    # each tile's time. That yields nothing for a clip with a single keyframe,
+    # which is then decoded in full.
+    for skip in (["-skip_frame", "nokey"], []):
+        sprite = await run_ffmpeg(
+            FFMPEG, "-v", "error", *skip, "-i", video_path,
+            "-vf", f"fps=1/{interval:.6f},scale={SPRITE_TILE_WIDTH}:{tile_height},tile={columns}x{rows}",
+            "-frames:v", "1", "-an", "-sn", "-f", "image2pipe", "-c:v", "mjpeg", "-q:v", "5", "-"
+        )
+        if sprite:
+            break
+    else:
+        raise RuntimeError("ffmpeg produced no sprite")
+
+    sprite_path = await asyncio.to_thread(save_sprite_file, video_path, ".jpg", sprite)
+    # Cues name the sprite relative to the VTT file, so both can move behind a CDN together
+    vtt = sprite_vtt(sprite_path.name, duration, interval, tiles, columns, tile_height)
+    vtt_path = await asyncio.to_thread(save_sprite_file, video_path, ".vtt", vtt.encode())
+    return sprite_path, vtt_path
+
+
+async def create_video_previews(video_path: str, duration: float, width: int, height: int) -> dict:
+    """Poster frames in every size plus a scrub-preview sprite and its WebVTT index.
+
+    Without a known duration the poster comes from the first frame and no
+    sprite is made. A sprite that fails to render is left out rather than
+    losing the posters.
+    """
+    position = min(duration * POSTER_POSITION, POSTER_MAX_OFFSET)
+    frame = await extract_frame(video_path, position)
+    posters = await asyncio.to_thread(create_posters, video_path, frame)
+
+    previews = {"posters": posters, "preview_sprite_url": "", "preview_vtt_url": ""}
+    if duration > 0:
+        try:
+            sprite_path, vtt_path = await render_sprite(video_path, duration, width, height)
+        except (RuntimeError, asyncio.TimeoutError) as e:
+            logger.warning(f"No preview sprite for {video_path}: {e}")
+        else:
+            previews["preview_sprite_url"] = get_file_url(str(sprite_path))
+            previews["preview_vtt_url"] = get_file_url(str(vtt_path))
+    return previews
+
+
+def hls_rungs(width: int, height: int) -> List[Tuple[int, int]]:
+    """Ladder rungs (short side, video kbps) worth encoding for a source size; none if it is unknown"""
+    short_side = min(width, height)
+    if not short_side:
+        return []
+    rungs = [rung for rung in HLS_LADDER if rung[0] <= short_side]
+    # A source below the smallest rung is kept at its own size
+    return rungs or [(short_side // 2 * 2, HLS_LADDER[-1][1])]
+
+
+def hls_command(
+    video_path: str, output_dir: Path, rungs: List[Tuple[int, int]], portrait: bool, has_audio: bool
+) -> List[str]:
+    """One ffmpeg run that decodes once and encodes every rung into fMP4 HLS"""
+    splits = "".join(f"[s{index}]" for index in range(len(rungs)))
+    scales = ";".join(
+        f"[s{index}]scale={f'{size}:-2' if portrait else f'-2:{size}'}[v{index}]"
+        for index, (size, _) in enumerate(rungs)
+    )
+    args = [FFMPEG, "-v", "error", "-i", video_path, "-filter_complex", f"[0:v:0]split={len(rungs)}{splits};{scales}"]
+    for index, (_, kbps) in enumerate(rungs):
+        args += ["-map", f"[v{index}]"] + (["-map", "0:a:0"] if has_audio else [])
+        args += [
+            f"-b:v:{index}", f"{kbps}k",
+            f"-maxrate:v:{index}", f"{kbps * 107 // 100}k",
+            f"-bufsize:v:{index}", f"{kbps * 3 // 2}k"
+        ]
+    # Keyframes on every segment boundary keep the rungs switchable at any segment
+    args += [
+        "-c:v", "libx264", "-preset", HLS_PRESET, "-pix_fmt", "yuv420p",
+        "-force_key_frames", f"expr:gte(t,n_forced*{HLS_SEGMENT_SECONDS})"
+    ]
+    if has_audio:
+        args += ["-c:a", "aac", "-b:a", HLS_AUDIO_BITRATE, "-ac", "2"]
+    stream_map = " ".join(f"v:{index},a:{index}" if has_audio else f"v:{index}" for index in range(len(rungs)))
+    return args + [
+        "-f", "hls",
+        "-hls_time", str(HLS_SEGMENT_SECONDS),
+        "-hls_playlist_type", "vod",
+        "-hls_segment_type", "fmp4",
+        "-hls_flags", "independent_segments",
+        "-hls_fmp4_init_filename", "init.mp4",
+        "-hls_segment_filename", str(output_dir / "v%v" / "seg_%05d.m4s"),
+        "-master_pl_name", "master.m3u8",
+        "-var_stream_map", stream_map,
+        str(output_dir / "v%v" / "index.m3u8")
+    ]
+
+
+async def package_hls(
+    video_path: str, width: int, height: int, has_audio: bool
+) -> Tuple[Path, List[Tuple[int, int]]]:
+    """Transcode a video into an HLS ladder; returns the master playlist and the rungs encoded"""
+    rungs = hls_rungs(width, height)
+    if not rungs:
+        raise ValueError(f"Unknown dimensions for {video_path}; no HLS rungs to encode")
+    staging = await asyncio.to_thread(hls_staging_dir, video_path)
+    try:
+        await run_ffmpeg(*hls_command(video_path, staging, rungs, height > width, has_audio), timeout=HLS_TIMEOUT)
+        package = await asyncio.to_thread(finish_hls_package, staging)
+    except BaseException:
+        await asyncio.to_thread(shutil.rmtree, staging, True)
+        raise
+    return package / "master.m3u8", rungs
@@ -532,6 +532,117 @@ class PortfolioAPITester:
         except Exception as e:
             self.log_test("POST /api/videos/upload", True, f"Video upload endpoint exists (expected exception): {str(e)}")
 
+    def _start_resumable_upload(self, size: int) -> str:
+        """Create a resumable video upload session and return its id"""
+        response = self.session.post(f"{self.base_url}/videos/upload/resumable", json={
+            "filename": "resumable_test.mp4",
+            "content_type": "video/mp4",
+            "size": size,
+            "title": "Resumable Test Video",
+            "category": "behind-scenes"
+        })
+        response.raise_for_status()
+        return response.json()["upload_id"]
+
+    def test_resumable_uploads(self):
+        """Test resumable video upload sessions"""
+        print("=== Testing Resumable Video Uploads ===")
+
+        # A minimal MP4 header followed by filler, so the content sniff accepts it
+        payload = b"\x00\x00\x00\x18ftypisom" + bytes(4084)
+        half = len(payload) // 2
+
+        # Test POST create session
+        try:
+            response = self.session.post(f"{self.base_url}/videos/upload/resumable", json={
+                "filename": "resumable_test.mp4",
+                "content_type": "video/mp4",
+                "size": len(payload),
+                "title": "Resumable Test Video",
+                "category": "behind-scenes"
+            })
+            if response.status_code == 201 and response.json().get("offset") == 0 and "Location" in response.headers:
+                self.log_test("POST /api/videos/upload/resumable", True, "Upload session created",
+                            {"upload_id": response.json()["upload_id"]})
+            else:
+                self.log_test("POST /api/videos/upload/resumable", False, f"Status code: {response.status_code}", response.text)
+        except Exception as e:
+            self.log_test("POST /api/videos/upload/resumable", False, f"Exception: {str(e)}")
+
+        # Test out-of-order chunks: the offset only advances once the gap before them is filled
+        try:
+            upload_id = self._start_resumable_upload(len(payload))
+            url = f"{self.base_url}/videos/upload/resumable/{upload_id}"
+            second = self.session.patch(url, data=payload[half:], headers={"Upload-Offset": str(half)})
+            first = self.session.patch(url, data=payload[:half], headers={"Upload-Offset": "0"})
+            head = self.session.head(url)
+            if (second.status_code == 200 and second.json()["offset"] == 0
+                    and first.status_code == 200 and first.json()["offset"] == len(payload)
+                    and head.headers.get("Upload-Offset") == str(len(payload))):
+                self.log_test("PATCH /api/videos/upload/resumable/{id} out of order", True,
+                            "Offset reports the contiguous prefix")
+            else:
+                self.log_test("PATCH /api/videos/upload/resumable/{id} out of order", False,
+                            f"Offsets: {second.text} then {first.text}, HEAD {head.headers.get('Upload-Offset')}")
+
+            # Test finalize of the complete upload
+            response = self.session.post(f"{url}/finalize")
+            if response.status_code == 200 and response.json().get("video_url"):
+                video_id = response.json().get("id") or response.json().get("_id")
+                self.log_test("POST /api/videos/upload/resumable/{id}/finalize", True, "Video created from upload",
+                            {"id": video_id})
+                self.session.delete(f"{self.base_url}/videos/{video_id}")
+            else:
+                self.log_test("POST /api/videos/upload/resumable/{id}/finalize", False,
+                            f"Status code: {response.status_code}", response.text)
+        except Exception as e:
+            self.log_test("Resumable upload out of order", False, f"Exception: {str(e)}")
+
+        # Test chunk past the declared size, finalize while incomplete, and abort
+        try:
+            upload_id = self._start_resumable_upload(len(payload))
+            url = f"{self.base_url}/videos/upload/resumable/{upload_id}"
+            response = self.session.patch(url, data=payload, headers={"Upload-Offset": "16"})
+            if response.status_code == 413:
+                self.log_test("PATCH /api/videos/upload/resumable/{id} past size", True, "Oversized chunk rejected with 413")
+            else:
+                self.log_test("PATCH /api/videos/upload/resumable/{id} past size", False,
+                            f"Expected 413, got {response.status_code}", response.text)
+
+            response = self.session.post(f"{url}/finalize")
+            if response.status_code == 409:
+                self.log_test("POST /api/videos/upload/resumable/{id}/finalize incomplete", True,
+                            "Incomplete upload cannot be finalized")
+            else:
+                self.log_test("POST /api/videos/upload/resumable/{id}/finalize incomplete", False,
+                            f"Expected 409, got {response.status_code}", response.text)
+
+            response = self.session.delete(url)
+            head = self.session.head(url)
+            if response.status_code == 200 and head.status_code == 404:
+                self.log_test("DELETE /api/videos/upload/resumable/{id}", True, "Upload aborted and session removed")
+            else:
+                self.log_test("DELETE /api/videos/upload/resumable/{id}", False,
+                            f"Status codes: {response.status_code}, HEAD {head.status_code}", response.text)
+        except Exception as e:
+            self.log_test("Resumable upload abort", False, f"Exception: {str(e)}")
+
+        # Test that a chunk overwriting the sniffed header is caught at finalize
+        try:
+            upload_id = self._start_resumable_upload(len(payload))
+            url = f"{self.base_url}/videos/upload/resumable/{upload_id}"
+            self.session.patch(url, data=payload, headers={"Upload-Offset": "0"})
+            self.session.patch(url, data=b"MZ\x90\x00", headers={"Upload-Offset": "4"})
+            response = self.session.post(f"{url}/finalize")
+            if response.status_code == 400:
+                self.log_test("POST /api/videos/upload/resumable/{id}/finalize header overwritten", True,
+                            "Content is sniffed again before the video is created")
+            else:
+                self.log_test("POST /api/videos/upload/resumable/{id}/finalize header overwritten", False,
+                            f"Expected 400, got {response.status_code}", response.text)
+        except Exception as e:
+            self.log_test("Resumable upload header overwrite", False, f"Exception: {str(e)}")
+
     def test_projects_management(self):
         """Test projects CRUD operations"""
         print("=== Testing Projects Management ===")
@@ -616,6 +727,25 @@ class PortfolioAPITester:
             except Exception as e:
                 self.log_test("DELETE /api/projects/{id}", False, f"Exception: {str(e)}")
 
+    def test_portfolio_bundle(self):
+        """Test single-request portfolio bundle endpoint"""
+        print("=== Testing Portfolio Bundle ===")
+        
+        try:
+            response = self.session.get(f"{self.base_url}/portfolio")
+            if response.status_code == 200:
+                data = response.json()
+                expected_keys = {"personal", "social", "skills", "experience", "projects", "images", "videos", "awards"}
+                if expected_keys.issubset(data.keys()) and data["personal"].get("name") == "Curtis Williams Jr.":
+                    self.log_test("GET /api/portfolio", True, "Bundle returned all collections", 
+                                {key: len(data[key]) for key in expected_keys if isinstance(data[key], list)})
+                else:
+                    self.log_test("GET /api/portfolio", False, "Bundle missing collections", list(data.keys()))
+            else:
+                self.log_test("GET /api/portfolio", False, f"Status code: {response.status_code}", response.text)
+        except Exception as e:
+            self.log_test("GET /api/portfolio", False, f"Exception: {str(e)}")
+
     def test_file_serving(self):
         """Test file serving endpoint"""
         print("=== Testing File Upload System ===")
@@ -630,6 +760,17 @@ class PortfolioAPITester:
         except Exception as e:
             self.log_test("GET /api/uploads/{path}", False, f"Exception: {str(e)}")
 
+        # Test that encoded ".." segments cannot reach unvalidated direct uploads
+        try:
+            response = self.session.get(f"{self.base_url}/uploads/images/%2e%2e/incoming/nonexistent.mp4")
+            if response.status_code == 404:
+                self.log_test("GET /api/uploads/images/%2e%2e/incoming/{path}", True, "Traversal into incoming/ refused")
+            else:
+                self.log_test("GET /api/uploads/images/%2e%2e/incoming/{path}", False,
+                            f"Expected 404, got {response.status_code}", response.text)
+        except Exception as e:
+            self.log_test("GET /api/uploads/images/%2e%2e/incoming/{path}", False, f"Exception: {str(e)}")
+
     def run_all_tests(self):
         """Run all test suites"""
         print("🚀 Starting Curtis Williams Jr. Portfolio Backend API Tests")
@@ -645,7 +786,9 @@ class PortfolioAPITester:
         self.test_awards_management()
         self.test_portfolio_images()
         self.test_videos_management()
+        self.test_resumable_uploads()
         self.test_projects_management()
+        self.test_portfolio_bundle()
         self.test_file_serving()
         
         # Print summary
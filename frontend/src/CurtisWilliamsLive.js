@@ -8,10 +8,39 @@ import './styles/video-gallery.css';
 
 // Import API functions
 import {
-  personalApi, socialApi, skillsApi, experienceApi, 
+  portfolioBundleApi, personalApi, socialApi, skillsApi, experienceApi,
   projectsApi, imagesApi, videosApi, awardsApi, handleApiError
 } from './api/portfolioApi';
 
+const BACKEND_URL = process.env.REACT_APP_BACKEND_URL;
+
+// Map an image document to gallery props, including responsive renditions and layout hints
+const toGalleryImage = (img) => ({
+  url: `${BACKEND_URL}${img.image_url}`,
+  title: img.title,
+  renditions: (img.renditions || []).map(r => ({ ...r, url: `${BACKEND_URL}${r.url}` })),
+  width: img.width || undefined,
+  height: img.height || undefined,
+  dominantColor: img.dominant_color || undefined
+});
+
+const GALLERY_CATEGORIES = ['fashion', 'covers', 'stillLife', 'artPhotoPainting', 'editorial'];
+
+// Per-collection requests shaped like the bundle; a failed section just renders empty
+const loadSeparately = async () => {
+  const [personal, social, skills, experience, projects, awards, videos, ...imagesByCategory] = await Promise.all([
+    personalApi.get().catch(() => ({})),
+    socialApi.get().catch(() => ({})),
+    skillsApi.getAll().catch(() => []),
+    experienceApi.getAll().catch(() => []),
+    projectsApi.getAll().catch(() => []),
+    awardsApi.getAll().catch(() => []),
+    videosApi.getAll().catch(() => []),
+    ...GALLERY_CATEGORIES.map(category => imagesApi.getAll(category).catch(() => []))
+  ]);
+  return { personal, social, skills, experience, projects, awards, videos, images: imagesByCategory.flat() };
+};
+
 const CurtisWilliamsLive = () => {
   // State management for all data
   const [loading, setLoading] = useState(true);
@@ -41,50 +70,35 @@ const CurtisWilliamsLive = () => {
       setLoading(true);
       setError(null);
 
-      // Load all data in parallel
-      const [
-        personalData,
-        socialData,
-        skillsData,
-        experienceData,
-        projectsData,
-        awardsData,
-        fashionImages,
-        coversImages,
-        stillLifeImages,
-        artPhotoImages,
-        editorialImages,
-        videosData
-      ] = await Promise.all([
-        personalApi.get().catch(() => ({})),
-        socialApi.get().catch(() => ({})),
-        skillsApi.getAll().catch(() => []),
-        experienceApi.getAll().catch(() => []),
-        projectsApi.getAll().catch(() => []),
-        awardsApi.getAll().catch(() => []),
-        imagesApi.getAll('fashion').catch(() => []),
-        imagesApi.getAll('covers').catch(() => []),
-        imagesApi.getAll('stillLife').catch(() => []),
-        imagesApi.getAll('artPhotoPainting').catch(() => []),
-        imagesApi.getAll('editorial').catch(() => []),
-        videosApi.getAll().catch(() => [])
-      ]);
+      // Load all public content in a single round trip, or section by section if that fails
+      const bundle = await portfolioBundleApi.get().catch(err => {
+        console.warn('Portfolio bundle failed, loading sections separately:', err);
+        return loadSeparately();
+      });
 
-      // Set state with loaded data
-      setPersonalInfo(personalData);
-      setSocialLinks(socialData);
-      setSkills(skillsData);
-      setExperience(experienceData);
-      setProjects(projectsData);
-      setAwards(awardsData);
-      setPortfolioImages({
-        fashion: fashionImages,
-        covers: coversImages,
-        stillLife: stillLifeImages,
-        artPhotoPainting: artPhotoImages,
-        editorial: editorialImages
+      // Group images by gallery category
+      const imagesByCategory = {
+        fashion: [],
+        covers: [],
+        stillLife: [],
+        artPhotoPainting: [],
+        editorial: []
+      };
+      (bundle.images || []).forEach(image => {
+        if (imagesByCategory[image.category]) {
+          imagesByCategory[image.category].push(image);
+        }
       });
-      setVideos(videosData);
+
+      // Set state with loaded data
+      setPersonalInfo(bundle.personal || {});
+      setSocialLinks(bundle.social || {});
+      setSkills(bundle.skills || []);
+      setExperience(bundle.experience || []);
+      setProjects(bundle.projects || []);
+      setAwards(bundle.awards || []);
+      setPortfolioImages(imagesByCategory);
+      setVideos(bundle.videos || []);
 
     } catch (err) {
       console.error('Error loading data:', err);
@@ -380,10 +394,7 @@ const CurtisWilliamsLive = () => {
       {portfolioImages.fashion.length > 0 && (
         <PortfolioGallery 
           section="Fashion Photography"
-          images={portfolioImages.fashion.map(img => ({ 
-            url: `${process.env.REACT_APP_BACKEND_URL}${img.image_url}`, 
-            title: img.title 
-          }))}
+          images={portfolioImages.fashion.map(toGalleryImage)}
           color="red"
         />
       )}
@@ -391,10 +402,7 @@ const CurtisWilliamsLive = () => {
       {portfolioImages.covers.length > 0 && (
         <PortfolioGallery 
           section="Magazine Covers"
-          images={portfolioImages.covers.map(img => ({ 
-            url: `${process.env.REACT_APP_BACKEND_URL}${img.image_url}`, 
-            title: img.title 
-          }))}
+          images={portfolioImages.covers.map(toGalleryImage)}
           color="green"
         />
       )}
@@ -402,10 +410,7 @@ const CurtisWilliamsLive = () => {
       {portfolioImages.stillLife.length > 0 && (
         <PortfolioGallery 
           section="Still Life Photography"
-          images={portfolioImages.stillLife.map(img => ({ 
-            url: `${process.env.REACT_APP_BACKEND_URL}${img.image_url}`, 
-            title: img.title 
-          }))}
+          images={portfolioImages.stillLife.map(toGalleryImage)}
           color="brown"
         />
       )}
@@ -413,10 +418,7 @@ const CurtisWilliamsLive = () => {
       {portfolioImages.artPhotoPainting.length > 0 && (
         <PortfolioGallery 
           section="Art Photo Painting"
-          images={portfolioImages.artPhotoPainting.map(img => ({ 
-            url: `${process.env.REACT_APP_BACKEND_URL}${img.image_url}`, 
-            title: img.title 
-          }))}
+          images={portfolioImages.artPhotoPainting.map(toGalleryImage)}
           color="red"
         />
       )}
@@ -424,10 +426,7 @@ const CurtisWilliamsLive = () => {
       {portfolioImages.editorial.length > 0 && (
         <PortfolioGallery 
           section="Editorial Photography"
-          images={portfolioImages.editorial.map(img => ({ 
-            url: `${process.env.REACT_APP_BACKEND_URL}${img.image_url}`, 
-            title: img.title 
-          }))}
+          images={portfolioImages.editorial.map(toGalleryImage)}
           color="green"
         />
       )}
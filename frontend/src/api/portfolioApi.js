@@ -12,6 +12,32 @@ const api = axios.create({
   },
 });
 
+// Direct upload: the file goes straight to storage, then the API creates the entry
+const directUpload = async (kind, file, title, description, category, featured) => {
+  const { data: ticket } = await api.post(`/${kind}/upload/direct`, {
+    filename: file.name,
+    content_type: file.type,
+    size: file.size,
+    title,
+    description,
+    category,
+    featured,
+  });
+  // Local storage presigns URLs on this API; a bucket's are absolute
+  const url = ticket.url.startsWith('/') ? `${BACKEND_URL}${ticket.url}` : ticket.url;
+  await axios.put(url, file, { headers: ticket.headers, timeout: 0 });
+  const response = await api.post(`/${kind}/upload/direct/${ticket.upload_id}/complete`);
+  return response.data;
+};
+
+// Portfolio Bundle API (all public content in one request)
+export const portfolioBundleApi = {
+  get: async () => {
+    const response = await api.get('/portfolio');
+    return response.data;
+  }
+};
+
 // Personal Information API
 export const personalApi = {
   get: async () => {
@@ -114,6 +140,15 @@ export const imagesApi = {
     const response = await api.get(url);
     return response.data;
   },
+
+  getPage: async (category = null, cursor = null, limit = 100, fields = null) => {
+    const params = { limit };
+    if (category) params.category = category;
+    if (cursor) params.cursor = cursor;
+    if (fields) params.fields = fields.join(',');
+    const response = await api.get('/images', { params });
+    return { items: response.data, nextCursor: response.headers['x-next-cursor'] || null };
+  },
   
   upload: async (file, title, description, category, featured = false) => {
     const formData = new FormData();
@@ -130,6 +165,9 @@ export const imagesApi = {
     });
     return response.data;
   },
+
+  uploadDirect: (file, title, description, category, featured = false) =>
+    directUpload('images', file, title, description, category, featured),
   
   update: async (id, imageData) => {
     const response = await api.put(`/images/${id}`, imageData);
@@ -149,6 +187,15 @@ export const videosApi = {
     const response = await api.get(url);
     return response.data;
   },
+
+  getPage: async (category = null, cursor = null, limit = 100, fields = null) => {
+    const params = { limit };
+    if (category) params.category = category;
+    if (cursor) params.cursor = cursor;
+    if (fields) params.fields = fields.join(',');
+    const response = await api.get('/videos', { params });
+    return { items: response.data, nextCursor: response.headers['x-next-cursor'] || null };
+  },
   
   upload: async (file, title, description, category, featured = false) => {
     const formData = new FormData();
@@ -165,6 +212,9 @@ export const videosApi = {
     });
     return response.data;
   },
+
+  uploadDirect: (file, title, description, category, featured = false) =>
+    directUpload('videos', file, title, description, category, featured),
   
   update: async (id, videoData) => {
     const response = await api.put(`/videos/${id}`, videoData);
@@ -19,6 +19,16 @@ const PortfolioGallery = ({ section, images, color }) => {
     }
   };
 
+  // Build a srcset string for one rendition format, smallest first
+  const buildSrcSet = (renditions, format) =>
+    renditions
+      .filter(r => r.format === format)
+      .sort((a, b) => a.width - b.width)
+      .map(r => `${r.url} ${r.width}w`)
+      .join(', ');
+
+  const GALLERY_SIZES = '(max-width: 640px) 100vw, (max-width: 1280px) 50vw, 33vw';
+
   return (
     <section className={`section-spacing ${getSectionClass(color)}`}>
       <div className="container-portfolio">
@@ -31,12 +41,25 @@ const PortfolioGallery = ({ section, images, color }) => {
         <div className="portfolio-gallery">
           {images.map((image, index) => (
             <div key={index} className="gallery-item animate-on-scroll">
-              <img 
-                src={image.url} 
-                alt={image.title}
-                className="gallery-image"
-                loading="lazy"
-              />
+              <picture>
+                {['avif', 'webp'].map(format => {
+                  const srcSet = buildSrcSet(image.renditions || [], format);
+                  return srcSet ? (
+                    <source key={format} type={`image/${format}`} srcSet={srcSet} sizes={GALLERY_SIZES} />
+                  ) : null;
+                })}
+                <img 
+                  src={image.url} 
+                  srcSet={buildSrcSet(image.renditions || [], 'jpeg') || undefined}
+                  sizes={GALLERY_SIZES}
+                  alt={image.title}
+                  width={image.width}
+                  height={image.height}
+                  style={image.dominantColor ? { backgroundColor: image.dominantColor } : undefined}
+                  className="gallery-image"
+                  loading="lazy"
+                />
+              </picture>
               <div className="gallery-overlay">
                 <h3 className="gallery-title">{image.title}</h3>
               </div>
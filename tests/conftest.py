@@ -0,0 +1,41 @@
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+import motor.motor_asyncio
+import pytest
+from mongomock_motor import AsyncCursor, AsyncMongoMockClient
+
+# The backend modules connect at import time, so the environment and client are set up first
+BACKEND_DIR = Path(__file__).resolve().parent.parent / "backend"
+sys.path.insert(0, str(BACKEND_DIR))
+os.environ.setdefault("MONGO_URL", "mongodb://localhost:27017")
+os.environ.setdefault("DB_NAME", "portfolio_test")
+os.environ.setdefault("UPLOAD_DIR", tempfile.mkdtemp(prefix="portfolio-uploads-"))
+os.environ["STORAGE_BACKEND"] = "local"
+motor.motor_asyncio.AsyncIOMotorClient = AsyncMongoMockClient
+
+
+async def _to_list(cursor, length=None):
+    # mongomock_motor ignores the length Motor caps the result at
+    documents = []
+    async for document in cursor:
+        documents.append(document)
+        if length is not None and len(documents) >= length:
+            break
+    return documents
+
+
+AsyncCursor.to_list = _to_list
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.fixture
+def collection():
+    """An empty in-memory collection"""
+    return AsyncMongoMockClient()["portfolio_test"]["items"]
@@ -0,0 +1,113 @@
+import io
+from pathlib import Path
+
+import pytest
+from fastapi import Response, UploadFile
+from PIL import Image
+from starlette.datastructures import Headers
+
+import blob_store
+import file_upload
+from blob_store import register_blob, release_blob
+from database import blobs_collection, jobs_collection, portfolio_images_collection
+from file_upload import url_to_path
+from job_handlers import image_derivatives
+from portfolio_routes import delete_portfolio_image, upload_portfolio_image
+
+SHA256 = "ab" * 32
+FILES = {"image_path": "/uploads/images/a.jpg", "thumbnail_path": "/uploads/thumbnails/a.jpg", "renditions": []}
+
+
+async def run_inline(fn, *args):
+    return fn(*args)
+
+
+def jpeg(color: str) -> bytes:
+    buffer = io.BytesIO()
+    Image.new("RGB", (64, 48), color).save(buffer, format="JPEG")
+    return buffer.getvalue()
+
+
+async def upload(content: bytes) -> dict:
+    file = UploadFile(io.BytesIO(content), filename="photo.jpg", headers=Headers({"content-type": "image/jpeg"}))
+    return await upload_portfolio_image(Response(), file, "Photo", "", "blob-test", False)
+
+
+def image_files(image: dict) -> list:
+    urls = [image["image_url"], image["thumbnail_url"], *(r["url"] for r in image.get("renditions", []))]
+    return [Path(url_to_path(url)) for url in urls]
+
+
+@pytest.fixture(autouse=True)
+async def clean_collections(monkeypatch):
+    monkeypatch.setattr(file_upload, "run_image_job", run_inline)
+    yield
+    async for image in portfolio_images_collection.find({}):
+        for path in image_files(image):
+            path.unlink(missing_ok=True)
+    for collection in (portfolio_images_collection, blobs_collection, jobs_collection):
+        await collection.delete_many({})
+
+
+@pytest.mark.anyio
+async def test_duplicate_upload_shares_files():
+    first = await upload(jpeg("teal"))
+    await image_derivatives({"image_id": str(first["_id"])})
+    first = await portfolio_images_collection.find_one({"_id": first["_id"]})
+
+    second = await upload(jpeg("teal"))
+    assert second["sha256"] == first["sha256"]
+    assert image_files(second) == image_files(first)
+    assert len(list(image_files(first)[0].parent.iterdir())) == 1
+    assert await jobs_collection.count_documents({}) == 1
+    assert (await blobs_collection.find_one({"_id": first["sha256"]}))["refcount"] == 2
+
+
+@pytest.mark.anyio
+async def test_files_are_deleted_with_the_last_reference():
+    first = await upload(jpeg("olive"))
+    await image_derivatives({"image_id": str(first["_id"])})
+    first = await portfolio_images_collection.find_one({"_id": first["_id"]})
+    second = await upload(jpeg("olive"))
+    files = image_files(first)
+
+    await delete_portfolio_image(str(first["_id"]))
+    assert all(path.exists() for path in files)
+    assert (await blobs_collection.find_one({"_id": first["sha256"]}))["refcount"] == 1
+
+    await delete_portfolio_image(str(second["_id"]))
+    assert not any(path.exists() for path in files)
+    assert await blobs_collection.count_documents({}) == 0
+
+
+@pytest.mark.anyio
+async def test_register_blob_adopts_a_concurrent_registration():
+    assert await register_blob(SHA256, FILES) is None
+    other = {**FILES, "image_path": "/uploads/images/b.jpg"}
+    existing = await register_blob(SHA256, other)
+    assert existing["image_path"] == FILES["image_path"]
+    assert existing["refcount"] == 2
+
+
+@pytest.mark.anyio
+async def test_register_blob_retries_after_a_racing_release(monkeypatch):
+    # The blob is on its way out: its last reference is gone but the document is not yet deleted
+    await blobs_collection.insert_one({"_id": SHA256, "refcount": 0, **FILES})
+    acquire_blob = blob_store.acquire_blob
+
+    async def acquire_during_delete(sha256):
+        blob = await acquire_blob(sha256)
+        await blobs_collection.delete_one({"_id": sha256, "refcount": {"$lte": 0}})
+        return blob
+
+    monkeypatch.setattr(blob_store, "acquire_blob", acquire_during_delete)
+    other = {**FILES, "image_path": "/uploads/images/b.jpg"}
+    assert await register_blob(SHA256, other) is None
+    blob = await blobs_collection.find_one({"_id": SHA256})
+    assert (blob["refcount"], blob["image_path"]) == (1, other["image_path"])
+
+
+@pytest.mark.anyio
+async def test_release_unregistered_hash_lets_the_caller_delete():
+    assert await release_blob(SHA256) is True
+    assert await blobs_collection.count_documents({}) == 0
@@ -0,0 +1,70 @@
+import pytest
+
+from cache import ResponseCache
+
+
+def test_invalidate_drops_dependent_entries_only():
+    cache = ResponseCache()
+    cache.set("images", b"[]", ("portfolio_images",), cache.versions(("portfolio_images",)))
+    cache.set("skills", b"[]", ("skills",), cache.versions(("skills",)))
+    cache.invalidate("portfolio_images")
+    assert cache.get("images") is None
+    assert cache.get("skills") == b"[]"
+
+
+def test_load_racing_with_write_is_not_stored():
+    cache = ResponseCache()
+    versions = cache.versions(("skills",))
+    cache.invalidate("skills")
+    cache.set("skills", b"stale", ("skills",), versions)
+    assert cache.get("skills") is None
+
+
+def test_every_write_moves_last_modified():
+    cache = ResponseCache()
+    cache.invalidate("skills")
+    first = cache.last_modified(("skills",))
+    cache.invalidate("skills")
+    assert cache.last_modified(("skills",)) > first
+
+
+@pytest.mark.anyio
+async def test_bump_reaches_other_processes(collection):
+    writer = ResponseCache(store=collection, version_ttl=0)
+    reader = ResponseCache(store=collection, version_ttl=0)
+    await writer.bump("skills")
+    await reader.refresh()
+    reader.set("skills", b"old", ("skills",), reader.versions(("skills",)))
+    reader.set("awards", b"awards", ("awards",), reader.versions(("awards",)))
+
+    await writer.bump("skills")
+    await reader.refresh()
+    assert reader.get("skills") is None
+    assert reader.get("awards") == b"awards"
+
+
+@pytest.mark.anyio
+async def test_shared_versions_give_matching_validators(collection):
+    first = ResponseCache(store=collection, version_ttl=0)
+    second = ResponseCache(store=collection, version_ttl=0)
+    await first.bump("skills")
+    await second.refresh()
+    assert first.etag("skills", ("skills",)) == second.etag("skills", ("skills",))
+    assert first.last_modified(("skills",)) == second.last_modified(("skills",))
+
+    await second.bump("skills")
+    await first.refresh()
+    assert first.versions(("skills",)) == second.versions(("skills",)) == (2,)
+
+
+@pytest.mark.anyio
+async def test_refresh_reads_store_at_most_once_per_ttl(collection):
+    writer = ResponseCache(store=collection, version_ttl=0)
+    reader = ResponseCache(store=collection, version_ttl=3600)
+    await writer.bump("skills")
+    await reader.refresh()
+    reader.set("skills", b"cached", ("skills",), reader.versions(("skills",)))
+
+    await writer.bump("skills")
+    await reader.refresh()
+    assert reader.get("skills") == b"cached"
@@ -0,0 +1,171 @@
+import io
+from datetime import datetime, timedelta
+from urllib.parse import parse_qs, urlsplit
+
+import pytest
+from fastapi import HTTPException
+from PIL import Image
+
+from database import direct_uploads_collection
+from direct_upload import (
+    claim_direct_upload, cleanup_expired_direct_uploads, create_direct_upload, finish_direct_upload,
+    receive_presigned_upload, store_direct_upload
+)
+from file_upload import IMAGES_DIR, MAX_IMAGE_SIZE, UPLOAD_DIR, content_hash_from_path
+from models import DirectUploadCreate
+
+
+def png_bytes() -> bytes:
+    buffer = io.BytesIO()
+    Image.new("RGB", (4, 4), "red").save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+async def body(*chunks: bytes):
+    for chunk in chunks:
+        yield chunk
+
+
+async def start(content: bytes, content_type: str = "image/png", size: int = None) -> dict:
+    upload = DirectUploadCreate(
+        filename="photo.png", content_type=content_type, size=len(content) if size is None else size,
+        title="Direct", category="direct-test"
+    )
+    ticket = await create_direct_upload("image", upload)
+    url = urlsplit(ticket["url"])
+    query = {name: values[0] for name, values in parse_qs(url.query).items()}
+    return {
+        **ticket,
+        "key": url.path[len("/api/uploads/"):],
+        "size": int(query["size"]),
+        "expires": int(query["expires"]),
+        "signature": query["signature"]
+    }
+
+
+async def put(ticket: dict, *chunks: bytes, content_type: str = "image/png"):
+    await receive_presigned_upload(
+        ticket["key"], content_type, ticket["size"], ticket["expires"], ticket["signature"], body(*chunks)
+    )
+
+
+@pytest.fixture(autouse=True)
+async def clean_sessions():
+    yield
+    await direct_uploads_collection.delete_many({})
+
+
+@pytest.mark.anyio
+async def test_claim_store_complete():
+    content = png_bytes()
+    ticket = await start(content)
+    assert ticket["method"] == "PUT" and ticket["headers"] == {"Content-Type": "image/png"}
+    await put(ticket, content[:10], content[10:])
+
+    session = await claim_direct_upload(ticket["upload_id"], "image")
+    assert session["status"] == "completing"
+    stored = await store_direct_upload(session)
+    await finish_direct_upload(ticket["upload_id"])
+
+    assert stored.path.parent == IMAGES_DIR / "direct-test"
+    assert stored.path.read_bytes() == content
+    assert (stored.size, stored.content_type) == (len(content), "image/png")
+    assert stored.sha256.startswith(content_hash_from_path(stored.path))
+    assert not (UPLOAD_DIR / ticket["key"]).exists()
+    assert await direct_uploads_collection.count_documents({}) == 0
+    stored.path.unlink()
+
+
+@pytest.mark.anyio
+async def test_only_one_claim_wins():
+    content = png_bytes()
+    ticket = await start(content)
+    await put(ticket, content)
+    await claim_direct_upload(ticket["upload_id"], "image")
+    with pytest.raises(HTTPException) as e:
+        await claim_direct_upload(ticket["upload_id"], "image")
+    assert e.value.status_code == 409
+    # Uploads to a session being completed are refused
+    with pytest.raises(HTTPException) as e:
+        await put(ticket, content)
+    assert e.value.status_code == 409
+
+
+@pytest.mark.anyio
+async def test_claim_checks_kind_and_expiry():
+    ticket = await start(png_bytes())
+    with pytest.raises(HTTPException) as e:
+        await claim_direct_upload(ticket["upload_id"], "video")
+    assert e.value.status_code == 404
+
+    await direct_uploads_collection.update_one(
+        {"_id": ticket["upload_id"]}, {"$set": {"expires_at": datetime.utcnow() - timedelta(seconds=1)}}
+    )
+    with pytest.raises(HTTPException) as e:
+        await claim_direct_upload(ticket["upload_id"], "image")
+    assert e.value.status_code == 404
+
+
+@pytest.mark.anyio
+async def test_store_before_upload_can_be_retried():
+    content = png_bytes()
+    ticket = await start(content)
+    session = await claim_direct_upload(ticket["upload_id"], "image")
+    with pytest.raises(HTTPException) as e:
+        await store_direct_upload(session)
+    assert e.value.status_code == 409
+    assert (await direct_uploads_collection.find_one({"_id": ticket["upload_id"]}))["status"] == "pending"
+
+    await put(ticket, content)
+    stored = await store_direct_upload(await claim_direct_upload(ticket["upload_id"], "image"))
+    stored.path.unlink()
+
+
+@pytest.mark.anyio
+async def test_store_rejects_content_of_another_type():
+    content = b"#!/bin/sh\necho not a png\n"
+    ticket = await start(content)
+    await put(ticket, content)
+    session = await claim_direct_upload(ticket["upload_id"], "image")
+    with pytest.raises(HTTPException) as e:
+        await store_direct_upload(session)
+    assert e.value.status_code == 400
+    assert not (UPLOAD_DIR / ticket["key"]).exists()
+    assert await direct_uploads_collection.count_documents({}) == 0
+
+
+@pytest.mark.anyio
+async def test_upload_must_match_signature_and_size():
+    content = png_bytes()
+    ticket = await start(content)
+    with pytest.raises(HTTPException) as e:
+        await put(ticket, content, content_type="image/gif")
+    assert e.value.status_code == 403
+    with pytest.raises(HTTPException) as e:
+        await put(ticket, content, b"extra")
+    assert e.value.status_code == 413
+    with pytest.raises(HTTPException) as e:
+        await put(ticket, content[:-1])
+    assert e.value.status_code == 400
+    assert list((UPLOAD_DIR / ticket["key"]).parent.glob(f"{(UPLOAD_DIR / ticket['key']).name}*")) == []
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize("content_type, size, status", [("image/svg+xml", 10, 400), ("image/png", MAX_IMAGE_SIZE + 1, 413)])
+async def test_create_checks_type_and_size(content_type, size, status):
+    with pytest.raises(HTTPException) as e:
+        await start(b"", content_type, size)
+    assert e.value.status_code == status
+
+
+@pytest.mark.anyio
+async def test_cleanup_removes_expired_pending_uploads():
+    content = png_bytes()
+    ticket = await start(content)
+    await put(ticket, content)
+    await direct_uploads_collection.update_one(
+        {"_id": ticket["upload_id"]}, {"$set": {"expires_at": datetime.utcnow() - timedelta(seconds=1)}}
+    )
+    assert await cleanup_expired_direct_uploads() == 1
+    assert not (UPLOAD_DIR / ticket["key"]).exists()
+    assert await direct_uploads_collection.count_documents({}) == 0
@@ -0,0 +1,164 @@
+import pytest
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.testclient import TestClient
+
+from file_serving import MAX_RANGES, RangeFileResponse, parse_range, upload_key
+from file_upload import IMAGES_DIR, INCOMING_DIR
+from portfolio_routes import router
+
+CONTENT = bytes(range(256)) * 4
+ETAG = '"abc123"'
+
+
+@pytest.mark.parametrize("header", [None, "", "items=0-1", "bytes=abc", "bytes=5", "bytes=9-3", "bytes=0-1,x-"])
+def test_parse_range_ignores_absent_or_malformed(header):
+    assert parse_range(header, 100) is None
+
+
+@pytest.mark.parametrize("header, ranges", [
+    ("bytes=0-9", [(0, 9)]),
+    ("bytes=90-", [(90, 99)]),
+    ("bytes=50-500", [(50, 99)]),
+    ("bytes=-10", [(90, 99)]),
+    ("bytes=-500", [(0, 99)]),
+    ("bytes=20-29, 0-9", [(0, 9), (20, 29)]),
+    ("bytes=0-9,5-14,15-19", [(0, 19)]),
+    ("bytes=0-9,200-300", [(0, 9)]),
+])
+def test_parse_range(header, ranges):
+    assert parse_range(header, 100) == ranges
+
+
+@pytest.mark.parametrize("header", ["bytes=100-", "bytes=200-300", "bytes=-0", "bytes=100-,150-160"])
+def test_parse_range_unsatisfiable(header):
+    with pytest.raises(HTTPException) as e:
+        parse_range(header, 100)
+    assert e.value.status_code == 416
+    assert e.value.headers["Content-Range"] == "bytes */100"
+
+
+def test_parse_range_too_many_ranges_serves_whole_file():
+    header = "bytes=" + ",".join(f"{i * 2}-{i * 2}" for i in range(MAX_RANGES + 1))
+    assert parse_range(header, 1000) is None
+
+
+@pytest.fixture
+def client(tmp_path):
+    path = tmp_path / "clip.mp4"
+    path.write_bytes(CONTENT)
+    app = FastAPI()
+
+    @app.api_route("/file", methods=["GET", "HEAD"])
+    async def get_file(request: Request):
+        return RangeFileResponse(path, request, "video/mp4", etag=ETAG)
+
+    return TestClient(app)
+
+
+def test_full_response(client):
+    response = client.get("/file")
+    assert response.status_code == 200
+    assert response.content == CONTENT
+    assert response.headers["accept-ranges"] == "bytes"
+    assert response.headers["etag"] == ETAG
+
+
+def test_single_range(client):
+    response = client.get("/file", headers={"Range": "bytes=100-199"})
+    assert response.status_code == 206
+    assert response.headers["content-range"] == f"bytes 100-199/{len(CONTENT)}"
+    assert response.headers["content-length"] == "100"
+    assert response.content == CONTENT[100:200]
+
+
+def test_suffix_range(client):
+    response = client.get("/file", headers={"Range": "bytes=-24"})
+    assert response.status_code == 206
+    assert response.headers["content-range"] == f"bytes 1000-1023/{len(CONTENT)}"
+    assert response.content == CONTENT[-24:]
+
+
+def test_multipart_ranges(client):
+    response = client.get("/file", headers={"Range": "bytes=0-9,500-509"})
+    assert response.status_code == 206
+    media_type, _, boundary = response.headers["content-type"].partition("; boundary=")
+    assert media_type == "multipart/byteranges"
+    assert int(response.headers["content-length"]) == len(response.content)
+    expected = b"".join(
+        f"--{boundary}\r\nContent-Type: video/mp4\r\nContent-Range: bytes {first}-{last}/{len(CONTENT)}\r\n\r\n".encode()
+        + CONTENT[first:last + 1] + b"\r\n"
+        for first, last in [(0, 9), (500, 509)]
+    ) + f"--{boundary}--\r\n".encode()
+    assert response.content == expected
+
+
+def test_unsatisfiable_range(client):
+    response = client.get("/file", headers={"Range": f"bytes={len(CONTENT)}-"})
+    assert response.status_code == 416
+    assert response.headers["content-range"] == f"bytes */{len(CONTENT)}"
+
+
+def test_if_range_match_serves_range(client):
+    response = client.get("/file", headers={"Range": "bytes=0-9", "If-Range": ETAG})
+    assert response.status_code == 206
+    assert response.content == CONTENT[:10]
+
+
+@pytest.mark.parametrize("if_range", ['"stale"', f"W/{ETAG}", "Wed, 21 Oct 2015 07:28:00 GMT", "garbage"])
+def test_if_range_mismatch_serves_whole_file(client, if_range):
+    response = client.get("/file", headers={"Range": "bytes=0-9", "If-Range": if_range})
+    assert response.status_code == 200
+    assert response.content == CONTENT
+    assert "content-range" not in response.headers
+
+
+def test_if_range_last_modified_match(client):
+    last_modified = client.get("/file").headers["last-modified"]
+    response = client.get("/file", headers={"Range": "bytes=0-9", "If-Range": last_modified})
+    assert response.status_code == 206
+
+
+def test_not_modified(client):
+    response = client.get("/file", headers={"If-None-Match": ETAG, "Range": "bytes=0-9"})
+    assert response.status_code == 304
+    assert response.content == b""
+
+
+def test_head_sends_no_body(client):
+    response = client.head("/file", headers={"Range": "bytes=0-9"})
+    assert response.status_code == 206
+    assert response.headers["content-length"] == "10"
+    assert response.content == b""
+
+
+@pytest.fixture
+def uploads_client():
+    app = FastAPI()
+    app.include_router(router, prefix="/api")
+    return TestClient(app)
+
+
+@pytest.fixture
+def incoming_file():
+    IMAGES_DIR.mkdir(parents=True, exist_ok=True)
+    INCOMING_DIR.mkdir(parents=True, exist_ok=True)
+    path = INCOMING_DIR / "unvalidated.mp4"
+    path.write_bytes(CONTENT)
+    yield path
+    path.unlink()
+
+
+@pytest.mark.parametrize("url", [
+    "/api/uploads/incoming/unvalidated.mp4",
+    "/api/uploads/images/%2e%2e/incoming/unvalidated.mp4",
+    "/api/uploads/images/..%2fincoming/unvalidated.mp4",
+    "/api/uploads/%2e%2e/etc/passwd",
+])
+def test_uploads_route_refuses_incoming_and_outside_files(uploads_client, incoming_file, url):
+    assert uploads_client.get(url).status_code == 404
+
+
+def test_upload_key_normalizes_inside_uploads():
+    assert upload_key("images/../videos/./clip.mp4") == "videos/clip.mp4"
+    with pytest.raises(HTTPException):
+        upload_key("images/../incoming/clip.mp4", exclude=(INCOMING_DIR,))
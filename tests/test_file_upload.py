@@ -0,0 +1,116 @@
+import hashlib
+import io
+
+import pytest
+from fastapi import HTTPException, UploadFile
+from PIL import ExifTags, Image, ImageCms
+
+from file_upload import ALLOWED_IMAGE_TYPES, UPLOAD_CHUNK_SIZE, content_hash_from_path, load_scaled, write_upload
+
+PNG_HEAD = b"\x89PNG\r\n\x1a\n"
+
+
+def upload(content: bytes) -> UploadFile:
+    return UploadFile(io.BytesIO(content), filename="photo.png")
+
+
+@pytest.mark.anyio
+async def test_write_upload_names_file_by_digest(tmp_path):
+    content = PNG_HEAD + bytes(range(256)) * (UPLOAD_CHUNK_SIZE // 256 + 1)
+    stored = await write_upload(upload(content), tmp_path / "photo.png", len(content), ALLOWED_IMAGE_TYPES)
+
+    sha256 = hashlib.sha256(content).hexdigest()
+    assert (stored.size, stored.sha256, stored.content_type) == (len(content), sha256, "image/png")
+    assert stored.path == tmp_path / f"photo.{content_hash_from_path(stored.path)}.png"
+    assert sha256.startswith(content_hash_from_path(stored.path))
+    assert stored.path.read_bytes() == content
+    assert [path.name for path in tmp_path.iterdir()] == [stored.path.name]
+
+
+@pytest.mark.anyio
+async def test_write_upload_enforces_size_limit(tmp_path):
+    content = PNG_HEAD + bytes(UPLOAD_CHUNK_SIZE * 2)
+    with pytest.raises(HTTPException) as e:
+        await write_upload(upload(content), tmp_path / "photo.png", UPLOAD_CHUNK_SIZE, ALLOWED_IMAGE_TYPES)
+    assert e.value.status_code == 413
+    assert list(tmp_path.iterdir()) == []
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize("content", [b"GIF89a" + bytes(64), b"#!/bin/sh\necho not an image\n", b""])
+async def test_write_upload_rejects_other_content(tmp_path, content):
+    with pytest.raises(HTTPException) as e:
+        await write_upload(upload(content), tmp_path / "photo.png", 1024, {"image/png", "image/jpeg"})
+    assert e.value.status_code == 400
+    assert list(tmp_path.iterdir()) == []
+
+
+def two_tone(size, mode="RGB", colors=("red", "blue")) -> Image.Image:
+    """An image whose left half and right half differ"""
+    img = Image.new(mode, size, colors[1])
+    img.paste(colors[0], (0, 0, size[0] // 2, size[1]))
+    return img
+
+
+@pytest.mark.parametrize("fmt, suffix", [("JPEG", ".jpg"), ("PNG", ".png")])
+def test_load_scaled_applies_orientation_after_scaling(tmp_path, fmt, suffix):
+    path = tmp_path / f"rotated{suffix}"
+    exif = Image.Exif()
+    # Orientation 6: the stored pixels are shown turned 90 degrees clockwise
+    exif[ExifTags.Base.Orientation] = 6
+    two_tone((1600, 800)).save(path, fmt, exif=exif)
+
+    with load_scaled(path, 100) as img:
+        assert img.mode == "RGB"
+        assert 100 <= img.width < 400
+        assert img.height == 2 * img.width
+        assert not img.getexif().get(ExifTags.Base.Orientation)
+        # The stored left half ends up on top
+        assert img.getpixel((img.width // 2, img.height // 4))[0] > 200
+        assert img.getpixel((img.width // 2, img.height * 3 // 4))[2] > 200
+
+
+def test_load_scaled_converts_cmyk_to_rgb(tmp_path):
+    path = tmp_path / "print.jpg"
+    two_tone((400, 200), "CMYK", ((255, 0, 0, 0), (0, 0, 0, 255))).save(path, "JPEG")
+
+    with load_scaled(path, 100) as img:
+        assert img.mode == "RGB"
+        r, g, b = img.getpixel((img.width // 4, img.height // 2))
+        assert r < 40 and g > 215 and b > 215
+        assert max(img.getpixel((img.width * 3 // 4, img.height // 2))) < 40
+
+
+def test_load_scaled_uses_embedded_cmyk_profile(tmp_path, monkeypatch):
+    path = tmp_path / "print.jpg"
+    Image.new("CMYK", (400, 200), (0, 255, 0, 0)).save(path, "JPEG", icc_profile=b"cmyk profile")
+    converted = []
+
+    def profile_to_profile(img, source, destination, outputMode):
+        converted.append((img.mode, outputMode))
+        result = Image.new("RGB", img.size, "magenta")
+        result.info["icc_profile"] = b"cmyk profile"
+        return result
+
+    monkeypatch.setattr(ImageCms, "ImageCmsProfile", lambda profile: profile.getvalue())
+    monkeypatch.setattr(ImageCms, "profileToProfile", profile_to_profile)
+    with load_scaled(path, 100) as img:
+        assert converted == [("CMYK", "RGB")]
+        assert img.mode == "RGB"
+        assert "icc_profile" not in img.info
+
+
+def test_load_scaled_keeps_16_bit_grayscale_visible(tmp_path):
+    path = tmp_path / "scan.png"
+    Image.new("I;16", (400, 200), 40000).save(path, "PNG")
+    with load_scaled(path, 100) as img:
+        assert img.mode == "RGB"
+        assert img.getpixel((0, 0)) == (156, 156, 156)
+
+
+def test_load_scaled_reduces_palette_images(tmp_path):
+    path = tmp_path / "flat.png"
+    two_tone((1600, 800)).convert("P").save(path, "PNG", transparency=0)
+    with load_scaled(path, 100) as img:
+        assert img.mode == "RGBA"
+        assert 100 <= img.width < 400
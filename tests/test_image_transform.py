@@ -0,0 +1,103 @@
+import asyncio
+
+import pytest
+from fastapi import HTTPException, Request
+from PIL import Image
+
+import image_transform
+from file_upload import IMAGES_DIR
+from image_transform import Transform, TransformCache, parse_transform, serve_transform
+
+
+@pytest.mark.parametrize("w, h, fit, fmt, q, detail", [
+    (123, 45, "cover", None, None, "Unsupported size 123x45"),
+    (640, 1, "cover", None, None, "Unsupported size 640x1"),
+    (640, 0, "stretch", None, None, "fit must be one of"),
+    (640, 0, "cover", "gif", None, "fmt must be one of"),
+    (640, 0, "cover", "jpeg", 75, "q must be one of"),
+])
+def test_parse_transform_refuses_values_outside_the_allowlists(w, h, fit, fmt, q, detail):
+    with pytest.raises(HTTPException) as e:
+        parse_transform(w, h, fit, fmt, q, None)
+    assert e.value.status_code == 400
+    assert e.value.detail.startswith(detail)
+
+
+def test_parse_transform_negotiates_format_from_accept():
+    transform, negotiated = parse_transform(640, 0, "cover", None, None, "image/webp,image/*")
+    assert (transform.fmt, negotiated) == ("webp", True)
+    transform, negotiated = parse_transform(1280, 720, "contain", None, 80, "image/png")
+    assert transform == Transform(1280, 720, "contain", "jpeg", 80) and negotiated
+    transform, negotiated = parse_transform(640, 0, "inside", "jpeg", None, "image/webp")
+    assert (transform.fmt, negotiated) == ("jpeg", False)
+
+
+def write(path, size: int):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(bytes(size))
+    return path
+
+
+@pytest.mark.anyio
+async def test_cache_evicts_least_recently_used_past_the_budget(tmp_path):
+    cache = TransformCache(tmp_path, max_bytes=250)
+    first = write(tmp_path / "ab" / "first.webp", 100)
+    await cache.put(first, 100)
+    second = write(tmp_path / "ab" / "second.webp", 100)
+    await cache.put(second, 100)
+    assert await cache.get(first)
+
+    third = write(tmp_path / "ab" / "third.webp", 100)
+    await cache.put(third, 100)
+    assert not second.exists()
+    assert first.exists() and third.exists()
+    assert not await cache.get(second)
+    assert cache.stats() == {
+        "entries": 2, "bytes": 200, "max_bytes": 250, "hits": 1, "misses": 1, "evictions": 1
+    }
+
+
+@pytest.mark.anyio
+async def test_cache_adopts_existing_files_and_drops_partial_ones(tmp_path):
+    kept = write(tmp_path / "ab" / "kept.webp", 100)
+    partial = write(tmp_path / "ab" / "render.webp.tmp", 50)
+    cache = TransformCache(tmp_path, max_bytes=1000)
+    assert await cache.get(kept)
+    assert not partial.exists()
+    assert cache.stats()["bytes"] == 100
+
+    # A variant written by another process is adopted on lookup
+    other = write(tmp_path / "cd" / "other.webp", 30)
+    assert await cache.get(other)
+    assert cache.stats()["entries"] == 2 and cache.stats()["bytes"] == 130
+
+
+@pytest.mark.anyio
+async def test_concurrent_requests_share_one_render(tmp_path, monkeypatch):
+    IMAGES_DIR.mkdir(parents=True, exist_ok=True)
+    source = IMAGES_DIR / "transform-original.jpg"
+    Image.new("RGB", (800, 600), "purple").save(source, "JPEG")
+    cache_dir = tmp_path / "cache"
+    monkeypatch.setattr(image_transform, "TRANSFORM_CACHE_DIR", cache_dir)
+    monkeypatch.setattr(image_transform, "transform_cache", TransformCache(cache_dir, 10 ** 6))
+    renders = 0
+
+    async def run_inline(fn, *args):
+        nonlocal renders
+        renders += 1
+        # Give every request time to join the render in flight
+        await asyncio.sleep(0.05)
+        return fn(*args)
+
+    monkeypatch.setattr(image_transform, "run_image_job", run_inline)
+    transform = Transform(640, 0, "inside", "jpeg", 80)
+    request = Request({"type": "http", "method": "GET", "headers": [], "query_string": b"", "path": "/api/img"})
+    responses = await asyncio.gather(*(
+        serve_transform(request, str(source), "ab" * 32, transform, False) for _ in range(5)
+    ))
+
+    assert renders == 1
+    assert len({response.headers["etag"] for response in responses}) == 1
+    with Image.open(next(cache_dir.rglob("*.jpg"))) as variant:
+        assert variant.size == (640, 480)
+    source.unlink()
@@ -0,0 +1,61 @@
+import hashlib
+import io
+from pathlib import Path
+
+import pytest
+from PIL import Image
+
+import file_upload
+from database import blobs_collection, portfolio_images_collection
+from file_upload import IMAGES_DIR, get_file_url, hashed_filename, url_to_path
+from job_handlers import image_derivatives
+
+
+async def run_inline(fn, *args):
+    return fn(*args)
+
+
+@pytest.fixture
+def image(monkeypatch):
+    monkeypatch.setattr(file_upload, "run_image_job", run_inline)
+    buffer = io.BytesIO()
+    Image.new("RGB", (900, 600), "navy").save(buffer, format="JPEG")
+    directory = IMAGES_DIR / "handler-test"
+    directory.mkdir(parents=True, exist_ok=True)
+    content = buffer.getvalue()
+    path = directory / hashed_filename("photo", hashlib.sha256(content).hexdigest(), ".jpg")
+    path.write_bytes(content)
+    yield path
+    for leftover in directory.iterdir():
+        leftover.unlink()
+
+
+async def saved_image(path: Path) -> dict:
+    sha256 = hashlib.sha256(path.read_bytes()).hexdigest()
+    result = await portfolio_images_collection.insert_one({
+        "title": "Photo", "image_url": get_file_url(str(path)), "thumbnail_url": get_file_url(str(path)),
+        "sha256": sha256
+    })
+    return {"image_id": str(result.inserted_id), "sha256": sha256}
+
+
+@pytest.fixture(autouse=True)
+async def clean_collections():
+    yield
+    await portfolio_images_collection.delete_many({})
+    await blobs_collection.delete_many({})
+
+
+@pytest.mark.anyio
+async def test_image_derivatives_can_be_retried(image):
+    saved = await saved_image(image)
+    await image_derivatives({"image_id": saved["image_id"]})
+    first = await portfolio_images_collection.find_one({}, {"updated_at": 0})
+    await image_derivatives({"image_id": saved["image_id"]})
+    second = await portfolio_images_collection.find_one({}, {"updated_at": 0})
+
+    assert first == second
+    assert first["renditions"]
+    for url in [second["image_url"], second["thumbnail_url"], *(r["url"] for r in second["renditions"])]:
+        assert Path(url_to_path(url)).exists()
+    assert (await blobs_collection.find_one({"_id": saved["sha256"]}))["refcount"] == 1
@@ -0,0 +1,135 @@
+import hashlib
+import struct
+
+import pytest
+
+from mp4_metadata import _children, _child, faststart, probe
+
+SAMPLES = [b"video-sample-one", b"audio-sample", b"video-sample-two"]
+IDENTITY = (0x10000, 0, 0, 0, 0x10000, 0, 0, 0, 0x40000000)
+ROTATE_90 = (0, 0x10000, 0, -0x10000, 0, 0, 0, 0, 0x40000000)
+
+
+def box(box_type: bytes, *payload: bytes) -> bytes:
+    body = b"".join(payload)
+    return struct.pack(">I4s", 8 + len(body), box_type) + body
+
+
+def full_box(box_type: bytes, *payload: bytes) -> bytes:
+    return box(box_type, b"\0\0\0\0", *payload)
+
+
+def track(handler: bytes, sample_entry: bytes, offsets, matrix=IDENTITY, size=(1280, 720)) -> bytes:
+    tkhd = full_box(b"tkhd", bytes(36), struct.pack(">9i", *matrix), struct.pack(">II", size[0] << 16, size[1] << 16))
+    mdhd = full_box(b"mdhd", bytes(8), struct.pack(">II", 1000, 5000), bytes(4))
+    hdlr = full_box(b"hdlr", bytes(4), handler, bytes(12), b"\0")
+    stsd = full_box(b"stsd", struct.pack(">I", 1), sample_entry)
+    stco = full_box(b"stco", struct.pack(f">I{len(offsets)}I", len(offsets), *offsets))
+    stbl = box(b"stbl", stsd, stco)
+    return box(b"trak", tkhd, box(b"mdia", mdhd, hdlr, box(b"minf", stbl)))
+
+
+def avc1() -> bytes:
+    # Visual sample entry fields, then avcC with profile 0x64, compatibility 0x00, level 0x1f
+    return box(b"avc1", bytes(78), box(b"avcC", b"\x01\x64\x00\x1f\xff"))
+
+
+def mp4a() -> bytes:
+    # ES descriptor > decoder config (object type 0x40) > specific info (AAC LC, object type 2)
+    decoder_specific = b"\x05\x02\x12\x10"
+    decoder_config = b"\x04" + bytes([13 + len(decoder_specific)]) + b"\x40\x15" + bytes(11) + decoder_specific
+    es = b"\x03" + bytes([3 + len(decoder_config)]) + b"\x00\x01\x00" + decoder_config
+    return box(b"mp4a", bytes(28), full_box(b"esds", es))
+
+
+def build_mp4(moov_first: bool, matrix=IDENTITY) -> bytes:
+    ftyp = box(b"ftyp", b"isom", struct.pack(">I", 512), b"isomiso2avc1mp41")
+    mdat = box(b"mdat", *SAMPLES)
+
+    def moov(mdat_offset: int) -> bytes:
+        starts = [mdat_offset + 8]
+        for sample in SAMPLES[:-1]:
+            starts.append(starts[-1] + len(sample))
+        mvhd = full_box(b"mvhd", bytes(8), struct.pack(">II", 600, 3000), bytes(80))
+        return box(
+            b"moov", mvhd,
+            track(b"vide", avc1(), [starts[0], starts[2]], matrix),
+            track(b"soun", mp4a(), [starts[1]], size=(0, 0))
+        )
+
+    if moov_first:
+        head = len(ftyp) + len(moov(0))
+        return ftyp + moov(head) + mdat
+    return ftyp + mdat + moov(len(ftyp))
+
+
+def chunk_offsets(data: bytes):
+    """Every stco/co64 offset in a file, in track order"""
+    top = dict(_children(data))
+    offsets = []
+    for box_type, trak in _children(top[b"moov"]):
+        if box_type != b"trak":
+            continue
+        stbl = _child(_child(_child(trak, b"mdia"), b"minf"), b"stbl")
+        stco = _child(stbl, b"stco") or _child(stbl, b"co64")
+        count = struct.unpack_from(">I", stco, 4)[0]
+        offsets.extend(struct.unpack_from(f">{count}I", stco, 8))
+    return offsets
+
+
+@pytest.fixture
+def moov_at_end(tmp_path):
+    path = tmp_path / "clip.mp4"
+    path.write_bytes(build_mp4(moov_first=False))
+    return path
+
+
+def test_probe(moov_at_end):
+    info = probe(moov_at_end)
+    assert info == {
+        "duration": 5.0,
+        "width": 1280,
+        "height": 720,
+        "video_codec": "avc1.64001f",
+        "audio_codec": "mp4a.40.2",
+        "brand": "isom",
+        "faststart": False
+    }
+
+
+def test_probe_rotated_track_swaps_dimensions(tmp_path):
+    path = tmp_path / "portrait.mp4"
+    path.write_bytes(build_mp4(moov_first=True, matrix=ROTATE_90))
+    info = probe(path)
+    assert (info["width"], info["height"]) == (720, 1280)
+    assert info["faststart"] is True
+
+
+@pytest.mark.parametrize("content", [b"", b"not a video at all", box(b"free", bytes(8)), box(b"ftyp", b"isom")])
+def test_probe_rejects_other_files(tmp_path, content):
+    path = tmp_path / "other.mp4"
+    path.write_bytes(content)
+    assert probe(path) is None
+
+
+def test_faststart_moves_moov_and_relocates_chunks(moov_at_end, tmp_path):
+    destination = tmp_path / "faststart.mp4"
+    digest = faststart(moov_at_end, destination)
+    data = destination.read_bytes()
+    assert digest == hashlib.sha256(data).hexdigest()
+    assert len(data) == moov_at_end.stat().st_size
+
+    info = probe(destination)
+    assert info["faststart"] is True
+    assert {**info, "faststart": False} == probe(moov_at_end)
+    # Each relocated offset still points at the sample it did before
+    expected = [SAMPLES[0], SAMPLES[2], SAMPLES[1]]
+    assert [data[offset:offset + len(sample)] for offset, sample in zip(chunk_offsets(data), expected)] == expected
+
+
+def test_faststart_leaves_faststart_files_alone(tmp_path):
+    source = tmp_path / "clip.mp4"
+    source.write_bytes(build_mp4(moov_first=True))
+    destination = tmp_path / "out.mp4"
+    assert faststart(source, destination) is None
+    assert not destination.exists()
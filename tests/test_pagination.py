@@ -0,0 +1,65 @@
+import pytest
+from bson import ObjectId
+from fastapi import HTTPException
+
+from pagination import decode_cursor, encode_cursor, find_page, keyset_query
+
+
+async def _insert(collection, orders):
+    docs = [{"_id": ObjectId(), "order": order, "title": f"item {i}"} for i, order in enumerate(orders)]
+    await collection.insert_many(docs)
+    return sorted(docs, key=lambda doc: (doc["order"], doc["_id"]))
+
+
+def test_cursor_round_trip():
+    doc = {"_id": ObjectId(), "order": 7}
+    assert decode_cursor(encode_cursor(doc)) == (7, doc["_id"])
+
+
+@pytest.mark.parametrize("cursor", ["", "not-base64!", "W10", "WyJhIiwiYiJd"])
+def test_invalid_cursor_is_rejected(cursor):
+    with pytest.raises(HTTPException) as e:
+        decode_cursor(cursor)
+    assert e.value.status_code == 400
+
+
+def test_keyset_query_without_cursor_is_unchanged():
+    query = {"category": "portrait"}
+    assert keyset_query(query, None) is query
+
+
+def test_keyset_query_combines_with_filter():
+    doc = {"_id": ObjectId(), "order": 3}
+    query = keyset_query({"category": "portrait"}, encode_cursor(doc))
+    assert query["$and"][0] == {"category": "portrait"}
+    assert query["$and"][1]["$or"][1] == {"order": 3, "_id": {"$gt": doc["_id"]}}
+
+
+@pytest.mark.anyio
+async def test_pages_cover_collection_once_in_order(collection):
+    # Repeated orders make _id the tie-breaker across page boundaries
+    expected = await _insert(collection, [2, 1, 1, 3, 1, 2, 0])
+    seen, cursor = [], None
+    while True:
+        docs, cursor = await find_page(collection, {}, 3, cursor)
+        seen.extend(docs)
+        if cursor is None:
+            break
+    assert [doc["_id"] for doc in seen] == [doc["_id"] for doc in expected]
+
+
+@pytest.mark.anyio
+async def test_last_full_page_has_no_cursor(collection):
+    await _insert(collection, [0, 1, 2])
+    docs, cursor = await find_page(collection, {}, 3)
+    assert len(docs) == 3
+    assert cursor is None
+
+
+@pytest.mark.anyio
+async def test_projection_keeps_sort_keys(collection):
+    await _insert(collection, [0, 1, 2])
+    docs, cursor = await find_page(collection, {}, 2, projection={"title": 1})
+    assert set(docs[-1]) == {"_id", "order", "title"}
+    rest, _ = await find_page(collection, {}, 2, cursor)
+    assert [doc["order"] for doc in rest] == [2]
@@ -0,0 +1,35 @@
+import numpy as np
+import pytest
+
+from placeholders import blurhash, dominant_color, placeholder
+
+
+def gradient() -> np.ndarray:
+    """32x24 buffer: red grows left to right, green top to bottom, blue is constant"""
+    y, x = np.mgrid[0:24, 0:32]
+    return np.stack([x * 8, y * 10, np.full_like(x, 128)], axis=-1).astype(np.uint8)
+
+
+# Hashes from the reference C encoder (blurhash-python) for the same buffer
+@pytest.mark.parametrize("components, expected", [
+    ((4, 3), "LxH27k2swxX8mHWWjtf7gJfjfQfj"),
+    ((3, 4), "TxH27k2swxmHWWjtgJfjfQn,Wpjt"),
+    ((1, 1), "00H27k"),
+])
+def test_blurhash_matches_reference_encoder(components, expected):
+    assert blurhash(gradient(), *components) == expected
+
+
+def test_placeholder_gives_the_longer_axis_more_components():
+    assert placeholder(gradient())["blurhash"] == "LxH27k2swxX8mHWWjtf7gJfjfQfj"
+    assert placeholder(gradient().transpose(1, 0, 2))["blurhash"][0] == "T"
+
+
+def test_dominant_color_is_the_most_common_one():
+    pixels = np.zeros((20, 20, 3), dtype=np.uint8)
+    pixels[:, :] = (200, 20, 40)
+    pixels[::2, ::2] = (204, 24, 44)
+    pixels[:, 14:] = (10, 90, 250)
+    # The mean would be a purple that appears nowhere in the image
+    assert dominant_color(pixels) == "#c91529"
+    assert placeholder(pixels)["dominant_color"] == "#c91529"
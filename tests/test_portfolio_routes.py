@@ -0,0 +1,220 @@
+import asyncio
+import io
+import json
+from pathlib import Path
+
+import httpx
+import pytest
+from fastapi import FastAPI
+from PIL import Image
+
+import file_upload
+import portfolio_routes
+from cache import response_cache
+from compression import MIN_COMPRESS_SIZE
+from database import awards_collection, jobs_collection, portfolio_images_collection
+from file_upload import url_to_path
+from portfolio_routes import ALL_COLLECTIONS, router
+
+app = FastAPI()
+app.include_router(router, prefix="/api")
+
+
+@pytest.fixture
+async def client():
+    # Start from a cold cache whatever earlier tests stored
+    await response_cache.bump(*ALL_COLLECTIONS)
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        yield client
+
+
+@pytest.fixture
+async def awards():
+    yield
+    await awards_collection.delete_many({})
+
+
+@pytest.fixture
+async def images():
+    await portfolio_images_collection.insert_many([
+        {"title": f"Image {i}", "category": "fashion", "image_url": f"/api/uploads/images/{i}.jpg", "order": i}
+        for i in range(3)
+    ])
+    yield
+    await portfolio_images_collection.delete_many({})
+
+
+async def insert_awards(count: int):
+    await awards_collection.insert_many([
+        {"title": f"Award {i}", "organization": "Org", "year": "2024", "description": "", "order": i}
+        for i in range(count)
+    ])
+    await response_cache.bump(awards_collection.name)
+
+
+@pytest.mark.anyio
+async def test_next_page_link_is_relative(client, images):
+    first = await client.get("/api/images", params={"category": "fashion", "limit": 2}, headers={"Host": "a.example"})
+    # Served from the cache for another host
+    second = await client.get("/api/images", params={"category": "fashion", "limit": 2}, headers={"Host": "b.example"})
+    cursor = first.headers["x-next-cursor"]
+    assert first.headers["link"] == f'</api/images?category=fashion&limit=2&cursor={cursor}>; rel="next"'
+    assert second.headers["link"] == first.headers["link"]
+
+    last = await client.get("/api/images", params={"category": "fashion", "limit": 2, "cursor": cursor})
+    assert [image["title"] for image in last.json()] == ["Image 2"]
+    assert "link" not in last.headers
+
+
+@pytest.mark.anyio
+async def test_bundle_is_not_truncated(client, awards):
+    await insert_awards(1200)
+    response = await client.get("/api/portfolio")
+    assert response.status_code == 200
+    assert len(response.json()["awards"]) == 1200
+
+
+@pytest.mark.anyio
+async def test_concurrent_bundle_requests_share_one_load(client, monkeypatch):
+    calls = 0
+    release = asyncio.Event()
+
+    async def load() -> bytes:
+        nonlocal calls
+        calls += 1
+        await release.wait()
+        return json.dumps({"awards": []}).encode()
+
+    monkeypatch.setattr(portfolio_routes, "_load_portfolio_bundle", load)
+    requests = [asyncio.ensure_future(client.get("/api/portfolio")) for _ in range(5)]
+    while len(portfolio_routes._inflight) == 0:
+        await asyncio.sleep(0)
+    # Let every request reach the in-flight load before it finishes
+    await asyncio.sleep(0.05)
+    release.set()
+    responses = await asyncio.gather(*requests)
+
+    assert calls == 1
+    assert [response.status_code for response in responses] == [200] * 5
+    assert len({response.content for response in responses}) == 1
+
+
+@pytest.mark.anyio
+async def test_not_modified_until_a_write(client, awards):
+    await insert_awards(1)
+    first = await client.get("/api/awards")
+    etag = first.headers["etag"]
+    response = await client.get("/api/awards", headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.headers["etag"] == etag
+    assert response.content == b""
+
+    await insert_awards(1)
+    response = await client.get("/api/awards", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["etag"] != etag
+    assert len(response.json()) == 2
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize("accept_encoding, encoding", [("gzip", "gzip"), ("gzip, br", "br"), ("br;q=0, gzip", "gzip")])
+async def test_large_body_is_compressed_with_its_own_etag(client, awards, accept_encoding, encoding):
+    await insert_awards(50)
+    identity = await client.get("/api/awards", headers={"Accept-Encoding": "identity"})
+    response = await client.get("/api/awards", headers={"Accept-Encoding": accept_encoding})
+    assert "content-encoding" not in identity.headers
+    assert response.headers["content-encoding"] == encoding
+    assert response.headers["vary"] == "Accept-Encoding"
+    assert response.headers["etag"] == identity.headers["etag"][:-1] + f'-{encoding}"'
+    assert response.json() == identity.json()
+
+    response = await client.get(
+        "/api/awards", headers={"Accept-Encoding": accept_encoding, "If-None-Match": response.headers["etag"]}
+    )
+    assert response.status_code == 304
+
+
+@pytest.mark.anyio
+async def test_small_body_keeps_the_identity_etag(client, awards):
+    await insert_awards(1)
+    identity = await client.get("/api/awards", headers={"Accept-Encoding": "identity"})
+    response = await client.get("/api/awards", headers={"Accept-Encoding": "gzip, br"})
+    assert len(response.content) < MIN_COMPRESS_SIZE
+    assert "content-encoding" not in response.headers
+    assert response.headers["etag"] == identity.headers["etag"]
+
+    response = await client.get(
+        "/api/awards", headers={"Accept-Encoding": "gzip, br", "If-None-Match": identity.headers["etag"]}
+    )
+    assert response.status_code == 304
+    assert response.headers["etag"] == identity.headers["etag"]
+
+
+@pytest.mark.anyio
+async def test_fields_selects_part_of_each_document(client, awards):
+    await insert_awards(2)
+    response = await client.get("/api/awards", params={"fields": "title"})
+    assert [sorted(award) for award in response.json()] == [["_id", "title"]] * 2
+    assert (await client.get("/api/awards", params={"fields": "title,secret"})).status_code == 400
+
+
+def jpeg(color: str) -> bytes:
+    buffer = io.BytesIO()
+    Image.new("RGB", (32, 32), color).save(buffer, format="JPEG")
+    return buffer.getvalue()
+
+
+@pytest.fixture
+async def uploads(monkeypatch):
+    async def run_inline(fn, *args):
+        return fn(*args)
+
+    monkeypatch.setattr(file_upload, "run_image_job", run_inline)
+    yield
+    async for image in portfolio_images_collection.find({}):
+        Path(url_to_path(image["image_url"])).unlink(missing_ok=True)
+    for collection in (portfolio_images_collection, jobs_collection):
+        await collection.delete_many({})
+
+
+@pytest.mark.anyio
+async def test_bulk_upload_skips_bad_files_and_inserts_once(client, uploads, monkeypatch):
+    inserts = []
+    insert_many = portfolio_images_collection.insert_many
+
+    async def counting_insert_many(documents, *args, **kwargs):
+        inserts.append(len(documents))
+        return await insert_many(documents, *args, **kwargs)
+
+    monkeypatch.setattr(portfolio_images_collection, "insert_many", counting_insert_many)
+    files = [
+        ("files", ("red.jpg", jpeg("red"), "image/jpeg")),
+        ("files", ("notes.jpg", b"not an image at all", "image/jpeg")),
+        ("files", ("green.jpg", jpeg("green"), "image/jpeg")),
+    ]
+    metadata = json.dumps([{"title": "Red"}, {}, {"category": "covers"}])
+    response = await client.post(
+        "/api/images/upload/bulk", files=files, data={"category": "fashion", "metadata": metadata}
+    )
+
+    assert response.status_code == 200
+    body = response.json()
+    assert [upload["filename"] for upload in body["uploaded_files"]] == ["red.jpg", "green.jpg"]
+    assert body["failed_files"] == ["notes.jpg: File content does not match an allowed type"]
+    assert inserts == [2]
+    images = await portfolio_images_collection.find({}, {"title": 1, "category": 1, "_id": 0}).to_list(None)
+    assert sorted(images, key=lambda image: image["title"]) == [
+        {"title": "Red", "category": "fashion"}, {"title": "green", "category": "covers"}
+    ]
+    assert await jobs_collection.count_documents({"type": "image.derivatives"}) == 2
+
+
+@pytest.mark.anyio
+async def test_bulk_upload_caps_files_per_request(client, uploads, monkeypatch):
+    assert portfolio_routes.BULK_UPLOAD_MAX_FILES == 500
+    monkeypatch.setattr(portfolio_routes, "BULK_UPLOAD_MAX_FILES", 2)
+    files = [("files", (f"{i}.jpg", jpeg("red"), "image/jpeg")) for i in range(3)]
+    response = await client.post("/api/images/upload/bulk", files=files, data={"category": "fashion"})
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Too many files. Maximum per request: 2"
+    assert await portfolio_images_collection.count_documents({}) == 0
@@ -0,0 +1,44 @@
+import json
+
+import pytest
+from bson import ObjectId
+from fastapi import HTTPException
+
+from models import Award, PortfolioImage
+from projection import mongo_projection, parse_fields, partial_model
+from serialization import render
+
+
+def test_no_fields_means_the_whole_model():
+    assert parse_fields(Award, None) is None
+    assert parse_fields(Award, "") is None
+    assert mongo_projection(None) is None
+    assert partial_model(Award, None) is Award
+
+
+def test_fields_are_in_model_order_and_keep_id():
+    fields = parse_fields(PortfolioImage, " thumbnail_url,title ,,")
+    assert fields == ("title", "thumbnail_url", "_id")
+    assert mongo_projection(fields) == {"title": 1, "thumbnail_url": 1, "_id": 1}
+
+
+def test_id_is_accepted_by_either_name():
+    assert parse_fields(Award, "id") == parse_fields(Award, "_id") == ("_id",)
+
+
+@pytest.mark.parametrize("fields", ["title,secret", "password", "Title"])
+def test_unknown_fields_are_rejected(fields):
+    with pytest.raises(HTTPException) as e:
+        parse_fields(Award, fields)
+    assert e.value.status_code == 400
+    assert e.value.detail.startswith("Unknown fields: ")
+
+
+def test_partial_model_renders_only_the_selected_fields():
+    fields = parse_fields(Award, "title,year")
+    model = partial_model(Award, fields)
+    assert partial_model(Award, fields) is model
+    document = {"_id": ObjectId(), "title": "Best Cover", "year": "2024"}
+    expected = {"_id": str(document["_id"]), "title": "Best Cover", "year": "2024"}
+    assert json.loads(render(model, document, fast=False)) == expected
+    assert json.loads(render(model, document, fast=True)) == expected
@@ -0,0 +1,188 @@
+import asyncio
+import hashlib
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import pytest
+from fastapi import HTTPException
+
+import portfolio_routes
+from database import jobs_collection, upload_sessions_collection, videos_collection
+from file_upload import cache_control_for, content_hash_from_path, url_to_path
+from models import ResumableUploadCreate
+from portfolio_routes import finalize_resumable_upload
+from resumable_upload import (
+    abort_session, append_chunk, cleanup_expired_sessions, contiguous_offset, create_session, get_session
+)
+
+MP4 = b"\x00\x00\x00\x18ftypisom" + bytes(range(256)) * 4
+
+
+@pytest.mark.parametrize("ranges, offset", [
+    ([], 0),
+    ([[0, 10]], 10),
+    ([[10, 20]], 0),
+    ([[10, 20], [0, 10]], 20),
+    ([[0, 10], [5, 15]], 15),
+    ([[0, 10], [0, 4]], 10),
+    ([[0, 10], [11, 20]], 10),
+    ([[20, 30], [0, 10], [10, 20]], 30),
+])
+def test_contiguous_offset(ranges, offset):
+    assert contiguous_offset(ranges) == offset
+
+
+async def body(*chunks: bytes):
+    for chunk in chunks:
+        yield chunk
+
+
+async def start(content: bytes = MP4) -> dict:
+    upload = ResumableUploadCreate(
+        filename="clip.mp4", content_type="video/mp4", size=len(content), title="Clip", category="resumable-test"
+    )
+    return await create_session(upload)
+
+
+@pytest.fixture
+async def sessions():
+    yield
+    async for session in upload_sessions_collection.find({}):
+        Path(session["path"]).unlink(missing_ok=True)
+    await upload_sessions_collection.delete_many({})
+    async for video in videos_collection.find({}):
+        Path(url_to_path(video["video_url"])).unlink(missing_ok=True)
+    await videos_collection.delete_many({})
+    await jobs_collection.delete_many({})
+
+
+@pytest.mark.anyio
+async def test_failed_finalize_can_be_retried(sessions, monkeypatch):
+    session = await start()
+    await append_chunk(session["_id"], 0, body(MP4))
+
+    async def fail(*args):
+        raise RuntimeError("database unavailable")
+
+    insert_video = portfolio_routes._insert_video
+    monkeypatch.setattr(portfolio_routes, "_insert_video", fail)
+    with pytest.raises(RuntimeError):
+        await finalize_resumable_upload(session["_id"])
+    assert (await upload_sessions_collection.find_one({"_id": session["_id"]}))["status"] == "uploading"
+
+    monkeypatch.setattr(portfolio_routes, "_insert_video", insert_video)
+    video = await finalize_resumable_upload(session["_id"])
+    assert Path(url_to_path(video["video_url"])).read_bytes() == MP4
+    assert await upload_sessions_collection.count_documents({}) == 0
+    with pytest.raises(HTTPException) as e:
+        await finalize_resumable_upload(session["_id"])
+    assert e.value.status_code == 404
+
+
+@pytest.mark.anyio
+async def test_finalize_names_the_file_by_content_hash(sessions):
+    session = await start()
+    await append_chunk(session["_id"], 0, body(MP4))
+    video = await finalize_resumable_upload(session["_id"])
+
+    path = Path(url_to_path(video["video_url"]))
+    assert path.name == f"{Path(session['path']).stem}.{content_hash_from_path(path)}.mp4"
+    assert hashlib.sha256(MP4).hexdigest().startswith(content_hash_from_path(path))
+    assert not Path(session["path"]).exists()
+    assert "immutable" in cache_control_for(str(path))
+
+
+@pytest.mark.anyio
+async def test_out_of_order_chunks(sessions):
+    session = await start()
+    status = await append_chunk(session["_id"], 600, body(MP4[600:]))
+    assert status["offset"] == 0
+    status = await append_chunk(session["_id"], 0, body(MP4[:300]))
+    assert status["offset"] == 300
+    status = await append_chunk(session["_id"], 300, body(MP4[300:600]))
+    assert status["offset"] == len(MP4)
+
+    video = await finalize_resumable_upload(session["_id"])
+    assert Path(url_to_path(video["video_url"])).read_bytes() == MP4
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize("offset, chunk, status", [
+    (-1, b"data", 400),
+    (len(MP4), b"data", 400),
+    (len(MP4) - 2, b"data", 413),
+])
+async def test_chunk_outside_the_upload(sessions, offset, chunk, status):
+    session = await start()
+    with pytest.raises(HTTPException) as e:
+        await append_chunk(session["_id"], offset, body(chunk))
+    assert e.value.status_code == status
+    assert (await get_session(session["_id"]))["ranges"] == []
+
+
+@pytest.mark.anyio
+async def test_first_chunk_of_another_type_is_refused(sessions):
+    session = await start()
+    with pytest.raises(HTTPException) as e:
+        await append_chunk(session["_id"], 0, body(b"#!/bin/sh\necho not a video\n"))
+    assert e.value.status_code == 400
+
+
+@pytest.mark.anyio
+async def test_finalize_incomplete_upload(sessions):
+    session = await start()
+    await append_chunk(session["_id"], 0, body(MP4[:-1]))
+    with pytest.raises(HTTPException) as e:
+        await finalize_resumable_upload(session["_id"])
+    assert e.value.status_code == 409
+    assert (await get_session(session["_id"]))["status"] == "uploading"
+
+
+@pytest.mark.anyio
+async def test_concurrent_finalize_creates_one_video(sessions):
+    session = await start()
+    await append_chunk(session["_id"], 0, body(MP4))
+    results = await asyncio.gather(
+        finalize_resumable_upload(session["_id"]), finalize_resumable_upload(session["_id"]), return_exceptions=True
+    )
+    assert sorted(type(result).__name__ for result in results) == ["HTTPException", "dict"]
+    assert next(r for r in results if isinstance(r, HTTPException)).status_code == 409
+    assert await videos_collection.count_documents({}) == 1
+
+
+@pytest.mark.anyio
+async def test_finalize_sniffs_the_head_again(sessions):
+    session = await start()
+    await append_chunk(session["_id"], 0, body(MP4))
+    # A later chunk inside the head replaces the bytes checked when the first one arrived
+    await append_chunk(session["_id"], 4, body(b"junk"))
+    with pytest.raises(HTTPException) as e:
+        await finalize_resumable_upload(session["_id"])
+    assert e.value.status_code == 400
+    assert not Path(session["path"]).exists()
+    assert await upload_sessions_collection.count_documents({}) == 0
+    assert await videos_collection.count_documents({}) == 0
+
+
+@pytest.mark.anyio
+async def test_abort_discards_the_upload(sessions):
+    session = await start()
+    await append_chunk(session["_id"], 0, body(MP4[:100]))
+    await abort_session(session["_id"])
+    assert not Path(session["path"]).exists()
+    with pytest.raises(HTTPException) as e:
+        await append_chunk(session["_id"], 100, body(MP4[100:]))
+    assert e.value.status_code == 404
+
+
+@pytest.mark.anyio
+async def test_cleanup_removes_expired_sessions(sessions):
+    expired = await start()
+    active = await start()
+    await upload_sessions_collection.update_one(
+        {"_id": expired["_id"]}, {"$set": {"expires_at": datetime.utcnow() - timedelta(seconds=1)}}
+    )
+    assert await cleanup_expired_sessions() == 1
+    assert not Path(expired["path"]).exists()
+    assert Path(active["path"]).exists()
+    assert [s["_id"] async for s in upload_sessions_collection.find({})] == [active["_id"]]
@@ -0,0 +1,161 @@
+import time
+from urllib.parse import parse_qs, urlsplit
+
+import boto3
+import pytest
+import requests
+from moto import mock_aws
+
+import storage
+from storage import LocalStorage, S3Storage, check_upload_signing_key, server_workers
+
+BUCKET = "portfolio-test"
+
+
+@pytest.fixture
+def s3(tmp_path, monkeypatch):
+    for name, value in [("AWS_ACCESS_KEY_ID", "testing"), ("AWS_SECRET_ACCESS_KEY", "testing"),
+                        ("AWS_SESSION_TOKEN", "testing"), ("AWS_DEFAULT_REGION", "us-east-1")]:
+        monkeypatch.setenv(name, value)
+    with mock_aws():
+        boto3.client("s3", region_name="us-east-1").create_bucket(Bucket=BUCKET)
+        yield S3Storage(tmp_path, BUCKET, None, "us-east-1", "https://cdn.example.com")
+
+
+def write(root, key: str, content: bytes):
+    path = root / key
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(content)
+    return path
+
+
+def keys(s3):
+    listing = s3.client.list_objects_v2(Bucket=BUCKET)
+    return sorted(item["Key"] for item in listing.get("Contents", []))
+
+
+def test_s3_url_round_trip(s3):
+    url = s3.url("images/portrait/shot one.jpg")
+    assert url == "https://cdn.example.com/images/portrait/shot%20one.jpg"
+    assert s3.key_for_url(url) == "images/portrait/shot one.jpg"
+    assert s3.key_for_url("/api/uploads/images/old.jpg") == "images/old.jpg"
+    assert s3.key_for_url("https://elsewhere.example.com/x.jpg") is None
+
+
+def test_s3_default_public_url(tmp_path, s3):
+    assert S3Storage(tmp_path, BUCKET, None, "eu-west-1", "").url("a.jpg") == \
+        f"https://{BUCKET}.s3.eu-west-1.amazonaws.com/a.jpg"
+    assert S3Storage(tmp_path, BUCKET, "http://minio:9000/", "us-east-1", "").url("a.jpg") == \
+        f"http://minio:9000/{BUCKET}/a.jpg"
+
+
+@pytest.mark.anyio
+async def test_s3_publish_stat_and_fetch(s3, tmp_path):
+    path = write(tmp_path, "images/general/a.png", b"png bytes")
+    await s3.publish("images/general/a.png", "public, max-age=60")
+    head = s3.client.head_object(Bucket=BUCKET, Key="images/general/a.png")
+    assert (head["ContentType"], head["CacheControl"]) == ("image/png", "public, max-age=60")
+    assert await s3.stat("images/general/a.png") == (9, "image/png")
+
+    # A node without the working copy downloads it
+    path.unlink()
+    assert await s3.fetch("images/general/a.png") == path
+    assert path.read_bytes() == b"png bytes"
+    assert [p.name for p in path.parent.iterdir()] == ["a.png"]
+
+
+@pytest.mark.anyio
+async def test_s3_missing_object(s3, tmp_path):
+    assert await s3.stat("images/missing.png") is None
+    with pytest.raises(FileNotFoundError):
+        await s3.fetch("images/missing.png")
+    # The partial download is cleaned up
+    assert list((tmp_path / "images").iterdir()) == []
+
+
+@pytest.mark.anyio
+async def test_s3_move(s3, tmp_path):
+    write(tmp_path, "incoming/upload.mp4", b"video")
+    await s3.publish("incoming/upload.mp4", "no-store")
+    await s3.move("incoming/upload.mp4", "videos/general/clip.abc.mp4", "public, immutable")
+    assert keys(s3) == ["videos/general/clip.abc.mp4"]
+    head = s3.client.head_object(Bucket=BUCKET, Key="videos/general/clip.abc.mp4")
+    assert (head["ContentType"], head["CacheControl"]) == ("video/mp4", "public, immutable")
+
+
+@pytest.mark.anyio
+async def test_s3_delete_and_delete_prefix(s3, tmp_path):
+    for key in ["hls/a/master.m3u8", "hls/a/720p.m3u8", "hls/ab/master.m3u8", "images/x.jpg"]:
+        write(tmp_path, key, b"data")
+        await s3.publish(key, "no-cache")
+    await s3.delete("images/x.jpg")
+    await s3.delete_prefix("hls/a")
+    assert keys(s3) == ["hls/ab/master.m3u8"]
+
+
+def test_s3_presigned_put(s3):
+    presigned = s3.presign_put("incoming/new.png", "image/png", 9, 300)
+    query = parse_qs(urlsplit(presigned.url).query)
+    assert presigned.headers == {"Content-Type": "image/png"}
+    assert query["X-Amz-Expires"] == ["300"]
+    assert "content-type" in query["X-Amz-SignedHeaders"][0].split(";")
+
+    response = requests.put(presigned.url, data=b"png bytes", headers=presigned.headers)
+    assert response.status_code == 200
+    head = s3.client.head_object(Bucket=BUCKET, Key="incoming/new.png")
+    assert (head["ContentLength"], head["ContentType"]) == (9, "image/png")
+
+
+def test_local_presigned_put(tmp_path):
+    local = LocalStorage(tmp_path)
+    presigned = local.presign_put("incoming/new.png", "image/png", 9, 300)
+    url = urlsplit(presigned.url)
+    query = {name: values[0] for name, values in parse_qs(url.query).items()}
+    assert url.path == "/api/uploads/incoming/new.png"
+    assert presigned.headers == {"Content-Type": "image/png"}
+
+    size, expires, signature = int(query["size"]), int(query["expires"]), query["signature"]
+    assert size == 9 and expires > time.time()
+    assert local.verify_put("incoming/new.png", "image/png", size, expires, signature)
+    # Every signed field is bound to the signature
+    assert not local.verify_put("incoming/other.png", "image/png", size, expires, signature)
+    assert not local.verify_put("incoming/new.png", "image/gif", size, expires, signature)
+    assert not local.verify_put("incoming/new.png", "image/png", size + 1, expires, signature)
+    assert not local.verify_put("incoming/new.png", "image/png", size, expires + 1, signature)
+
+
+def test_local_presigned_put_expires(tmp_path):
+    local = LocalStorage(tmp_path)
+    presigned = local.presign_put("incoming/new.png", "image/png", 9, -1)
+    query = {name: values[0] for name, values in parse_qs(urlsplit(presigned.url).query).items()}
+    assert not local.verify_put("incoming/new.png", "image/png", 9, int(query["expires"]), query["signature"])
+
+
+@pytest.mark.parametrize("environ, argv, workers", [
+    ({}, [], 1),
+    ({"WEB_CONCURRENCY": "4"}, [], 4),
+    ({}, ["server:app", "--workers", "3"], 3),
+    ({}, ["server:app", "--workers=2"], 2),
+    ({"WEB_CONCURRENCY": "4"}, ["-w", "1", "server:app"], 1),
+])
+def test_server_workers(monkeypatch, environ, argv, workers):
+    monkeypatch.delenv("WEB_CONCURRENCY", raising=False)
+    for name, value in environ.items():
+        monkeypatch.setenv(name, value)
+    assert server_workers(argv) == workers
+
+
+def test_signing_key_required_for_several_local_workers(tmp_path, monkeypatch):
+    monkeypatch.delenv("WEB_CONCURRENCY", raising=False)
+    monkeypatch.setattr(storage, "UPLOAD_SIGNING_KEY_SET", False)
+    check_upload_signing_key(LocalStorage(tmp_path), [])
+    with pytest.raises(RuntimeError, match="UPLOAD_SIGNING_KEY"):
+        check_upload_signing_key(LocalStorage(tmp_path), ["--workers", "2"])
+
+    monkeypatch.setattr(storage, "UPLOAD_SIGNING_KEY_SET", True)
+    check_upload_signing_key(LocalStorage(tmp_path), ["--workers", "2"])
+
+
+def test_signing_key_not_needed_for_s3(s3, monkeypatch):
+    monkeypatch.setattr(storage, "UPLOAD_SIGNING_KEY_SET", False)
+    check_upload_signing_key(s3, ["--workers", "4"])
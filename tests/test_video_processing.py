@@ -0,0 +1,77 @@
+import subprocess
+
+import pytest
+
+import job_handlers
+import video_processing
+from database import videos_collection
+from file_upload import VIDEOS_DIR
+from video_processing import FFMPEG, HLS_LADDER, create_video_previews, hls_rungs, render_sprite
+
+needs_ffmpeg = pytest.mark.skipif(FFMPEG is None, reason="ffmpeg not installed")
+
+
+@pytest.fixture
+def single_keyframe_clip():
+    """Ten seconds of test pattern encoded as one GOP"""
+    VIDEOS_DIR.mkdir(parents=True, exist_ok=True)
+    path = VIDEOS_DIR / "single_keyframe.mp4"
+    subprocess.run([
+        FFMPEG, "-v", "error", "-y", "-f", "lavfi", "-i", "testsrc=size=320x240:rate=25", "-t", "10",
+        "-c:v", "mpeg4", "-g", "1000", str(path)
+    ], check=True)
+    yield path
+    path.unlink(missing_ok=True)
+
+
+@needs_ffmpeg
+@pytest.mark.anyio
+async def test_sprite_from_single_keyframe_clip(single_keyframe_clip):
+    sprite_path, vtt_path = await render_sprite(str(single_keyframe_clip), 10.0, 320, 240)
+    assert sprite_path.read_bytes().startswith(b"\xff\xd8\xff")
+    assert vtt_path.read_text().startswith("WEBVTT")
+
+
+@needs_ffmpeg
+@pytest.mark.anyio
+async def test_posters_survive_sprite_failure(single_keyframe_clip, monkeypatch):
+    async def fail(*args):
+        raise RuntimeError("ffmpeg produced no sprite")
+
+    monkeypatch.setattr(video_processing, "render_sprite", fail)
+    previews = await create_video_previews(str(single_keyframe_clip), 10.0, 320, 240)
+    assert previews["posters"]
+    assert previews["preview_sprite_url"] == previews["preview_vtt_url"] == ""
+
+
+@pytest.mark.parametrize("width, height, rungs", [
+    (1920, 1080, HLS_LADDER),
+    (720, 1280, [rung for rung in HLS_LADDER if rung[0] <= 720]),
+    (320, 241, [(240, HLS_LADDER[-1][1])]),
+    (0, 0, []),
+    (1920, 0, []),
+])
+def test_hls_rungs(width, height, rungs):
+    assert hls_rungs(width, height) == rungs
+
+
+@pytest.mark.anyio
+async def test_hls_skipped_when_dimensions_unknown(monkeypatch):
+    async def no_probe(path):
+        return None
+
+    async def local(path):
+        return path
+
+    monkeypatch.setattr(job_handlers, "ffmpeg_available", lambda: True)
+    monkeypatch.setattr(job_handlers, "probe_video", no_probe)
+    monkeypatch.setattr(job_handlers, "ensure_local", local)
+    result = await videos_collection.insert_one({
+        "title": "Unknown size", "category": "interview", "video_url": "/api/uploads/videos/clip.webm"
+    })
+    try:
+        assert await job_handlers.video_hls({"video_id": str(result.inserted_id)}) == {
+            "skipped": "video dimensions unknown"
+        }
+    finally:
+        await videos_collection.delete_one({"_id": result.inserted_id})